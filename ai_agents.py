@@ -1,18 +1,57 @@
-from deepseek_client import DeepSeekClient
-from typing import Dict, Any
+from deepseek_client import DeepSeekClient, stream_to
+from typing import Callable, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from contextlib import nullcontext
+import queue
 import time
+import config
 
 class StockAnalysisAgents:
     """股票分析AI智能体集合"""
     
-    def __init__(self, model="deepseek-chat"):
+    def __init__(self, model="deepseek-chat", max_concurrency: int = None, agent_timeout: int = None):
+        """
+        Args:
+            model: AI模型
+            max_concurrency: 分析师并发数上限，默认读取 config.AGENT_MAX_CONCURRENCY
+            agent_timeout: 单个分析师超时时间（秒），默认读取 config.AGENT_TIMEOUT
+        """
         self.model = model
         self.deepseek_client = DeepSeekClient(model=model)
+        self.max_concurrency = max(1, max_concurrency or config.AGENT_MAX_CONCURRENCY)
+        self.agent_timeout = agent_timeout or config.AGENT_TIMEOUT
+    
+    def _wait_agent(self, future, key: str, started_at: Dict[str, float],
+                    on_tick: Callable[[], None] = None) -> Dict[str, Any]:
+        """等待分析师完成；超时从该分析师真正开始运行时算起，排队时间不计入
+        
+        Args:
+            on_tick: 每轮等待后在调用线程执行的回调（用于转发流式输出），提供时轮询间隔缩短
+        """
+        poll_interval = 0.2 if on_tick else 1
+        while True:
+            done, _ = wait([future], timeout=poll_interval)
+            if on_tick:
+                on_tick()
+            if done:
+                return future.result()
+            start = started_at.get(key)
+            if start is not None and time.time() - start > self.agent_timeout:
+                raise FutureTimeoutError()
+    
+    def _failed_agent_result(self, agent_name: str, message: str) -> Dict[str, Any]:
+        """分析师未能完成时的占位结果"""
+        return {
+            "agent_name": agent_name,
+            "agent_role": "",
+            "analysis": message,
+            "focus_areas": [],
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
         
     def technical_analyst_agent(self, stock_info: Dict, stock_data: Any, indicators: Dict) -> Dict[str, Any]:
         """技术面分析智能体"""
         print("🔍 技术分析师正在分析中...")
-        time.sleep(1)  # 模拟分析时间
         
         analysis = self.deepseek_client.technical_analysis(stock_info, stock_data, indicators)
         
@@ -37,8 +76,6 @@ class StockAnalysisAgents:
         else:
             print("   ⚠ 未获取到季报数据，将基于基本财务数据分析")
         
-        time.sleep(1)
-        
         analysis = self.deepseek_client.fundamental_analysis(stock_info, financial_data, quarterly_data)
         
         return {
@@ -60,8 +97,6 @@ class StockAnalysisAgents:
         else:
             print("   ⚠ 未获取到资金流向数据，将基于技术指标分析")
         
-        time.sleep(1)
-        
         analysis = self.deepseek_client.fund_flow_analysis(stock_info, indicators, fund_flow_data)
         
         return {
@@ -83,8 +118,6 @@ class StockAnalysisAgents:
         else:
             print("   ⚠ 未获取到风险数据，将基于基本信息分析")
         
-        time.sleep(1)
-        
         # 构建风险数据文本
         risk_data_text = ""
         if risk_data and risk_data.get('data_success'):
@@ -226,8 +259,6 @@ class StockAnalysisAgents:
         else:
             print("   ⚠ 未获取到详细情绪数据，将基于基本信息分析")
         
-        time.sleep(1)
-        
         # 构建带有市场情绪数据的prompt
         sentiment_data_text = ""
         if sentiment_data and sentiment_data.get('data_success'):
@@ -316,8 +347,6 @@ class StockAnalysisAgents:
         else:
             print("   ⚠ 未获取到新闻数据，将基于基本信息分析")
         
-        time.sleep(1)
-        
         # 构建带有新闻数据的prompt
         news_text = ""
         if news_data and news_data.get('data_success'):
@@ -408,14 +437,27 @@ class StockAnalysisAgents:
                                  financial_data: Dict = None, fund_flow_data: Dict = None, 
                                  sentiment_data: Dict = None, news_data: Dict = None,
                                  quarterly_data: Dict = None, risk_data: Dict = None,
-                                 enabled_analysts: Dict = None) -> Dict[str, Any]:
+                                 enabled_analysts: Dict = None, data_bundle: Dict = None,
+                                 stream_callback: Callable[[str, str], None] = None) -> Dict[str, Any]:
         """运行多智能体分析
         
         Args:
             enabled_analysts: 字典，指定哪些分析师参与分析
                 例如: {'technical': True, 'fundamental': True, ...}
                 如果为None，则运行所有分析师
+            data_bundle: AnalysisDataGatherer.gather 返回的数据包，
+                提供时其中的数据优先于单独传入的各项数据
+            stream_callback: 流式输出回调，参数为 (分析师key, 截至当前的报告文本)；
+                始终在调用线程中执行，可直接更新Streamlit组件
         """
+        if data_bundle:
+            financial_data = data_bundle.get('financial_data', financial_data)
+            fund_flow_data = data_bundle.get('fund_flow_data', fund_flow_data)
+            sentiment_data = data_bundle.get('sentiment_data', sentiment_data)
+            news_data = data_bundle.get('news_data', news_data)
+            quarterly_data = data_bundle.get('quarterly_data', quarterly_data)
+            risk_data = data_bundle.get('risk_data', risk_data)
+        
         # 如果未指定，默认所有分析师都参与
         if enabled_analysts is None:
             enabled_analysts = {
@@ -435,40 +477,84 @@ class StockAnalysisAgents:
         print(f"📋 参与分析的分析师: {', '.join(active_analysts)}")
         print("=" * 50)
         
-        # 并行运行各个分析师
-        agents_results = {}
-        
-        # 技术面分析
+        # 按固定顺序列出待运行的分析师（结果字典也按此顺序组装）
+        agent_tasks = []
         if enabled_analysts.get('technical', True):
-            agents_results["technical"] = self.technical_analyst_agent(stock_info, stock_data, indicators)
-        
-        # 基本面分析
+            agent_tasks.append(("technical", "技术分析师", self.technical_analyst_agent,
+                                (stock_info, stock_data, indicators)))
         if enabled_analysts.get('fundamental', True):
-            agents_results["fundamental"] = self.fundamental_analyst_agent(stock_info, financial_data, quarterly_data)
-        
-        # 资金面分析（传入资金流向数据）
+            agent_tasks.append(("fundamental", "基本面分析师", self.fundamental_analyst_agent,
+                                (stock_info, financial_data, quarterly_data)))
         if enabled_analysts.get('fund_flow', True):
-            agents_results["fund_flow"] = self.fund_flow_analyst_agent(stock_info, indicators, fund_flow_data)
-        
-        # 风险管理分析（传入风险数据）
+            agent_tasks.append(("fund_flow", "资金面分析师", self.fund_flow_analyst_agent,
+                                (stock_info, indicators, fund_flow_data)))
         if enabled_analysts.get('risk', True):
-            agents_results["risk_management"] = self.risk_management_agent(stock_info, indicators, risk_data)
-        
-        # 市场情绪分析（传入市场情绪数据）
+            agent_tasks.append(("risk_management", "风险管理师", self.risk_management_agent,
+                                (stock_info, indicators, risk_data)))
         if enabled_analysts.get('sentiment', False):
-            agents_results["market_sentiment"] = self.market_sentiment_agent(stock_info, sentiment_data)
-        
-        # 新闻分析（传入新闻数据）
+            agent_tasks.append(("market_sentiment", "市场情绪分析师", self.market_sentiment_agent,
+                                (stock_info, sentiment_data)))
         if enabled_analysts.get('news', False):
-            agents_results["news"] = self.news_analyst_agent(stock_info, news_data)
+            agent_tasks.append(("news", "新闻分析师", self.news_analyst_agent,
+                                (stock_info, news_data)))
+        
+        # 并行运行各个分析师
+        agents_results = {}
+        if agent_tasks:
+            started_at = {}
+            # 工作线程只把流式文本放入队列，由调用线程统一转发（Streamlit组件只能在主线程更新）
+            stream_updates = queue.Queue()
+            
+            def run_agent(key, func, args):
+                started_at[key] = time.time()
+                if stream_callback is None:
+                    return func(*args)
+                with stream_to(lambda text: stream_updates.put((key, text))):
+                    return func(*args)
+            
+            def flush_stream_updates():
+                latest = {}
+                while True:
+                    try:
+                        key, text = stream_updates.get_nowait()
+                    except queue.Empty:
+                        break
+                    latest[key] = text
+                for key, text in latest.items():
+                    stream_callback(key, text)
+            
+            on_tick = flush_stream_updates if stream_callback else None
+            
+            executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(agent_tasks)))
+            try:
+                futures = [(key, name, executor.submit(run_agent, key, func, args))
+                           for key, name, func, args in agent_tasks]
+                for key, name, future in futures:
+                    try:
+                        agents_results[key] = self._wait_agent(future, key, started_at, on_tick)
+                    except FutureTimeoutError:
+                        print(f"⏱️ {name}分析超时（{self.agent_timeout}秒）")
+                        agents_results[key] = self._failed_agent_result(
+                            name, f"分析超时（{self.agent_timeout}秒），未能生成报告")
+                    except Exception as e:
+                        print(f"❌ {name}分析失败: {e}")
+                        agents_results[key] = self._failed_agent_result(name, f"分析失败: {str(e)}")
+            finally:
+                # 超时的分析无法中断，不等待其结束
+                executor.shutdown(wait=False, cancel_futures=True)
         
         print("✅ 所有已选择的分析师完成分析")
         print("=" * 50)
         
         return agents_results
     
-    def conduct_team_discussion(self, agents_results: Dict[str, Any], stock_info: Dict) -> str:
-        """进行团队讨论"""
+    def conduct_team_discussion(self, agents_results: Dict[str, Any], stock_info: Dict,
+                                stream_callback: Callable[[str], None] = None) -> str:
+        """进行团队讨论
+        
+        Args:
+            stream_callback: 流式输出回调，参数为截至当前的讨论文本
+        """
         print("🤝 分析团队正在进行综合讨论...")
         time.sleep(2)
         
@@ -529,7 +615,8 @@ class StockAnalysisAgents:
             {"role": "user", "content": discussion_prompt}
         ]
         
-        discussion_result = self.deepseek_client.call_api(messages, max_tokens=6000)
+        with stream_to(stream_callback) if stream_callback else nullcontext():
+            discussion_result = self.deepseek_client.call_api(messages, max_tokens=6000)
         
         print("✅ 团队讨论完成")
         return discussion_result
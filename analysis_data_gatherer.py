@@ -0,0 +1,157 @@
+"""
+分析数据采集模块
+并发获取单只股票分析所需的各类数据（财务、季报、资金流向、市场情绪、新闻、风险），
+每个数据源独立超时，最终汇总为一个数据包交给 StockAnalysisAgents
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from stock_data import StockDataFetcher
+
+# 各数据源的默认超时时间（秒）
+DEFAULT_SOURCE_TIMEOUTS = {
+    'financial_data': 60,
+    'quarterly_data': 60,
+    'fund_flow_data': 45,
+    'sentiment_data': 90,
+    'news_data': 60,
+    'risk_data': 90,
+}
+
+# 分析师启用字典中缺省项的默认值（与 StockAnalysisAgents.run_multi_agent_analysis 一致）
+DEFAULT_ENABLED_ANALYSTS = {
+    'fundamental': True,
+    'fund_flow': True,
+    'risk': True,
+    'sentiment': False,
+    'news': False,
+}
+
+# 数据包中由分析师使用的字段（与 run_multi_agent_analysis 参数名一致）
+BUNDLE_KEYS = list(DEFAULT_SOURCE_TIMEOUTS.keys())
+
+
+def _fetch_financial_data(symbol, stock_data):
+    return StockDataFetcher().get_financial_data(symbol)
+
+
+def _fetch_quarterly_data(symbol, stock_data):
+    from quarterly_report_data import QuarterlyReportDataFetcher
+    return QuarterlyReportDataFetcher().get_quarterly_reports(symbol)
+
+
+def _fetch_fund_flow_data(symbol, stock_data):
+    from fund_flow_akshare import FundFlowAkshareDataFetcher
+    return FundFlowAkshareDataFetcher().get_fund_flow_data(symbol)
+
+
+def _fetch_sentiment_data(symbol, stock_data):
+    from market_sentiment_data import MarketSentimentDataFetcher
+    return MarketSentimentDataFetcher().get_market_sentiment_data(symbol, stock_data)
+
+
+def _fetch_news_data(symbol, stock_data):
+    from qstock_news_data import QStockNewsDataFetcher
+    return QStockNewsDataFetcher().get_stock_news(symbol)
+
+
+def _fetch_risk_data(symbol, stock_data):
+    return StockDataFetcher().get_risk_data(symbol)
+
+
+# 数据源 -> (获取函数, 对应的分析师开关, 是否仅支持A股)
+SOURCES = {
+    'financial_data': (_fetch_financial_data, None, False),
+    'quarterly_data': (_fetch_quarterly_data, 'fundamental', True),
+    'fund_flow_data': (_fetch_fund_flow_data, 'fund_flow', True),
+    'sentiment_data': (_fetch_sentiment_data, 'sentiment', True),
+    'news_data': (_fetch_news_data, 'news', True),
+    'risk_data': (_fetch_risk_data, 'risk', True),
+}
+
+
+class AnalysisDataGatherer:
+    """分析数据并发采集器"""
+
+    def __init__(self, timeouts=None, max_workers=None):
+        """
+        初始化采集器
+
+        Args:
+            timeouts: 各数据源超时时间（秒），覆盖 DEFAULT_SOURCE_TIMEOUTS 中的对应项
+            max_workers: 最大并发数，默认等于数据源数量
+        """
+        self.timeouts = dict(DEFAULT_SOURCE_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.max_workers = max_workers or len(SOURCES)
+
+    def gather(self, symbol, stock_data, enabled_analysts):
+        """
+        并发获取所有已启用分析师需要的数据
+
+        Args:
+            symbol: 股票代码
+            stock_data: 股票历史数据（供市场情绪ARBR计算复用）
+            enabled_analysts: 分析师启用字典，如 {'fundamental': True, 'news': False, ...}
+
+        Returns:
+            dict: 数据包，包含 BUNDLE_KEYS 中的各项数据（未获取的为None），
+                  以及 errors（数据源 -> 错误信息）和 elapsed（数据源 -> 耗时秒数）
+        """
+        is_chinese = StockDataFetcher()._is_chinese_stock(symbol)
+
+        bundle = {key: None for key in BUNDLE_KEYS}
+        bundle['errors'] = {}
+        bundle['elapsed'] = {}
+
+        tasks = {}
+        for key, (func, analyst, china_only) in SOURCES.items():
+            if analyst and not enabled_analysts.get(analyst, DEFAULT_ENABLED_ANALYSTS[analyst]):
+                continue
+            if china_only and not is_chinese:
+                continue
+            tasks[key] = func
+
+        if not tasks:
+            return bundle
+
+        print(f"📡 并发获取 {symbol} 的分析数据: {', '.join(tasks.keys())}")
+        start_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)))
+        try:
+            futures = {key: executor.submit(self._timed_call, func, symbol, stock_data)
+                       for key, func in tasks.items()}
+
+            for key, future in futures.items():
+                # 所有数据源同时开始，超时从提交时刻算起
+                remaining = self.timeouts.get(key, 60) - (time.time() - start_time)
+                try:
+                    data, elapsed = future.result(timeout=max(remaining, 0))
+                    bundle[key] = data
+                    bundle['elapsed'][key] = elapsed
+                except FutureTimeoutError:
+                    bundle['errors'][key] = f"获取超时（{self.timeouts.get(key, 60)}秒）"
+                    print(f"   ⏱️ {key} 获取超时")
+                except Exception as e:
+                    bundle['errors'][key] = str(e)
+                    print(f"   ❌ {key} 获取失败: {e}")
+        finally:
+            # 超时的任务无法中断，不等待其结束
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        print(f"✅ 数据采集完成，耗时 {time.time() - start_time:.1f} 秒")
+        return bundle
+
+    @staticmethod
+    def _timed_call(func, symbol, stock_data):
+        """执行获取函数并记录耗时"""
+        begin = time.time()
+        data = func(symbol, stock_data)
+        return data, time.time() - begin
+
+
+def gather_analysis_data(symbol, stock_data, enabled_analysts, timeouts=None):
+    """并发获取分析数据（AnalysisDataGatherer 的便捷函数）"""
+    return AnalysisDataGatherer(timeouts=timeouts).gather(symbol, stock_data, enabled_analysts)
@@ -12,8 +12,10 @@ from model_config import model_options
 
 from stock_data import StockDataFetcher
 from ai_agents import StockAnalysisAgents
+from analysis_data_gatherer import gather_analysis_data
 from pdf_generator import display_pdf_export_section
 from database import db
+from report_search import SEARCH_RANGES, range_start
 from monitor_manager import display_monitor_manager, get_monitor_summary
 from monitor_service import monitor_service
 from notification_service import notification_service
@@ -731,6 +733,50 @@ def get_stock_data(symbol, period):
 
     return stock_info, stock_data_with_indicators, indicators
 
+def prepare_batch_stock_data(stock_list, period, max_workers=3):
+    """批量准备股票数据（用于批量分析）
+
+    并发获取各股票的基本信息和K线，再以面板模式一次计算所有股票的技术指标，
+    代替逐只股票在 get_stock_data 中分别计算。
+
+    Args:
+        stock_list: 股票代码列表
+        period: 数据周期
+        max_workers: 获取数据的并发数
+
+    Returns:
+        dict: {股票代码: (stock_info, stock_data_with_indicators, indicators)}，
+              获取数据或计算指标出错的股票不在结果中（分析时回退到 get_stock_data）
+    """
+    import concurrent.futures
+
+    fetcher = StockDataFetcher()
+
+    def fetch(symbol):
+        return fetcher.get_stock_info(symbol), fetcher.get_stock_data(symbol, period)
+
+    raw = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_symbol = {executor.submit(fetch, symbol): symbol for symbol in dict.fromkeys(stock_list)}
+        for future in concurrent.futures.as_completed(future_to_symbol):
+            symbol = future_to_symbol[future]
+            try:
+                raw[symbol] = future.result()
+            except Exception as e:
+                print(f"⚠️ {symbol} 批量获取数据失败，分析时单独获取: {e}")
+
+    frames = {symbol: stock_data for symbol, (_, stock_data) in raw.items()
+              if not (isinstance(stock_data, dict) and "error" in stock_data)}
+    frames = fetcher.calculate_technical_indicators_panel(frames)
+
+    prepared = {}
+    for symbol, (stock_info, _) in raw.items():
+        stock_data = frames.get(symbol)
+        if stock_data is None or (isinstance(stock_data, dict) and "error" in stock_data):
+            continue
+        prepared[symbol] = (stock_info, stock_data, fetcher.get_latest_indicators(stock_data))
+    return prepared
+
 def parse_stock_list(stock_input):
     """解析股票代码列表
 
@@ -773,7 +819,8 @@ def parse_stock_list(stock_input):
 
     return unique_list
 
-def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None, selected_model='deepseek-chat'):
+def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None, selected_model='deepseek-chat',
+                                   prepared_data=None):
     """单个股票分析（用于批量分析）
 
     Args:
@@ -781,6 +828,7 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
         period: 数据周期
         enabled_analysts_config: 分析师配置字典
         selected_model: 选择的AI模型
+        prepared_data: prepare_batch_stock_data 准备好的 (stock_info, stock_data, indicators)，为None时单独获取
 
     返回分析结果或错误信息
     """
@@ -796,8 +844,11 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
                 'news': False
             }
 
-        # 1. 获取股票数据
-        stock_info, stock_data, indicators = get_stock_data(symbol, period)
+        # 1. 获取股票数据（批量分析时已预先以面板模式计算好指标）
+        if prepared_data is not None:
+            stock_info, stock_data, indicators = prepared_data
+        else:
+            stock_info, stock_data, indicators = get_stock_data(symbol, period)
 
         if "error" in stock_info:
             return {"symbol": symbol, "error": stock_info['error'], "success": False}
@@ -805,82 +856,26 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
         if stock_data is None:
             return {"symbol": symbol, "error": "无法获取股票历史数据", "success": False}
 
-        # 2. 获取财务数据
-        fetcher = StockDataFetcher()
-        financial_data = fetcher.get_financial_data(symbol)
-
-        # 2.5 获取季报数据（仅A股）
-        quarterly_data = None
-        enable_fundamental = enabled_analysts_config.get('fundamental', True)
-        if enable_fundamental and fetcher._is_chinese_stock(symbol):
-            try:
-                from quarterly_report_data import QuarterlyReportDataFetcher
-                quarterly_fetcher = QuarterlyReportDataFetcher()
-                quarterly_data = quarterly_fetcher.get_quarterly_reports(symbol)
-            except:
-                pass
-
-        # 获取分析师选择状态（从参数而不是session_state）
-        enable_fund_flow = enabled_analysts_config.get('fund_flow', True)
-        enable_sentiment = enabled_analysts_config.get('sentiment', False)
-        enable_news = enabled_analysts_config.get('news', False)
-
-        # 3. 获取资金流向数据（akshare数据源，可选）
-        fund_flow_data = None
-        if enable_fund_flow and fetcher._is_chinese_stock(symbol):
-            try:
-                from fund_flow_akshare import FundFlowAkshareDataFetcher
-                fund_flow_fetcher = FundFlowAkshareDataFetcher()
-                fund_flow_data = fund_flow_fetcher.get_fund_flow_data(symbol)
-            except:
-                pass
+        # 2. 并发获取财务、季报、资金流向、市场情绪、新闻和风险数据
+        data_bundle = gather_analysis_data(symbol, stock_data, enabled_analysts_config)
 
-        # 4. 获取市场情绪数据（可选）
-        sentiment_data = None
-        if enable_sentiment and fetcher._is_chinese_stock(symbol):
-            try:
-                from market_sentiment_data import MarketSentimentDataFetcher
-                sentiment_fetcher = MarketSentimentDataFetcher()
-                sentiment_data = sentiment_fetcher.get_market_sentiment_data(symbol, stock_data)
-            except:
-                pass
-
-        # 5. 获取新闻数据（qstock数据源，可选）
-        news_data = None
-        if enable_news and fetcher._is_chinese_stock(symbol):
-            try:
-                from qstock_news_data import QStockNewsDataFetcher
-                news_fetcher = QStockNewsDataFetcher()
-                news_data = news_fetcher.get_stock_news(symbol)
-            except:
-                pass
-
-        # 5.5 获取风险数据（限售解禁、大股东减持、重要事件，可选）
-        risk_data = None
-        enable_risk = enabled_analysts_config.get('risk', True)
-        if enable_risk and fetcher._is_chinese_stock(symbol):
-            try:
-                risk_data = fetcher.get_risk_data(symbol)
-            except:
-                pass
-
-        # 6. 初始化AI分析系统
+        # 3. 初始化AI分析系统
         agents = StockAnalysisAgents(model=selected_model)
 
         # 使用传入的分析师配置
         enabled_analysts = enabled_analysts_config
 
-        # 7. 运行多智能体分析
+        # 4. 运行多智能体分析
         agents_results = agents.run_multi_agent_analysis(
-            stock_info, stock_data, indicators, financial_data,
-            fund_flow_data, sentiment_data, news_data, quarterly_data, risk_data,
-            enabled_analysts=enabled_analysts_config
+            stock_info, stock_data, indicators,
+            enabled_analysts=enabled_analysts_config,
+            data_bundle=data_bundle
         )
 
-        # 8. 团队讨论
+        # 5. 团队讨论
         discussion_result = agents.conduct_team_discussion(agents_results, stock_info)
 
-        # 9. 最终决策
+        # 6. 最终决策
         final_decision = agents.make_final_decision(discussion_result, stock_info, indicators)
 
         # 保存到数据库
@@ -943,6 +938,10 @@ def run_batch_analysis(stock_list, period, batch_mode="顺序分析"):
     results = []
     total = len(stock_list)
 
+    # 预先获取所有股票数据，技术指标一次性批量计算
+    status_text.text(f"📈 正在获取 {total} 只股票的行情数据...")
+    prepared = prepare_batch_stock_data(stock_list, period)
+
     if batch_mode == "多线程并行":
         # 多线程并行分析
         status_text.text(f"🚀 使用多线程并行分析 {total} 只股票...")
@@ -955,7 +954,8 @@ def run_batch_analysis(stock_list, period, batch_mode="顺序分析"):
         def analyze_with_progress(symbol):
             """包装分析函数，不在线程中访问Streamlit上下文"""
             try:
-                result = analyze_single_stock_for_batch(symbol, period, enabled_analysts_config, selected_model)
+                result = analyze_single_stock_for_batch(symbol, period, enabled_analysts_config, selected_model,
+                                                        prepared_data=prepared.get(symbol))
                 with lock:
                     completed[0] += 1
                     progress_status[0][symbol] = result
@@ -1004,7 +1004,8 @@ def run_batch_analysis(stock_list, period, batch_mode="顺序分析"):
             status_text.text(f"🔍 [{i}/{total}] 正在分析 {symbol}...")
 
             try:
-                result = analyze_single_stock_for_batch(symbol, period, enabled_analysts_config, selected_model)
+                result = analyze_single_stock_for_batch(symbol, period, enabled_analysts_config, selected_model,
+                                                        prepared_data=prepared.get(symbol))
             except Exception as e:
                 result = {"symbol": symbol, "error": str(e), "success": False}
 
@@ -1078,126 +1079,102 @@ def run_stock_analysis(symbol, period):
         display_stock_chart(stock_data, stock_info)
         progress_bar.progress(30)
 
-        # 2. 获取财务数据
-        status_text.text("📊 正在获取财务数据...")
-        fetcher = StockDataFetcher()  # 创建fetcher实例
-        financial_data = fetcher.get_financial_data(symbol)
-        progress_bar.progress(35)
-
-        # 2.5 获取季报数据（仅在选择了基本面分析师且为A股时）
-        enable_fundamental = st.session_state.get('enable_fundamental', True)
-        quarterly_data = None
-        if enable_fundamental and fetcher._is_chinese_stock(symbol):
-            status_text.text("📊 正在获取季报数据（akshare数据源）...")
-            try:
-                from quarterly_report_data import QuarterlyReportDataFetcher
-                quarterly_fetcher = QuarterlyReportDataFetcher()
-                quarterly_data = quarterly_fetcher.get_quarterly_reports(symbol)
-                if quarterly_data and quarterly_data.get('data_success'):
-                    income_count = quarterly_data.get('income_statement', {}).get('periods', 0) if quarterly_data.get('income_statement') else 0
-                    balance_count = quarterly_data.get('balance_sheet', {}).get('periods', 0) if quarterly_data.get('balance_sheet') else 0
-                    cash_flow_count = quarterly_data.get('cash_flow', {}).get('periods', 0) if quarterly_data.get('cash_flow') else 0
-                    st.info(f"✅ 成功获取季报数据：利润表{income_count}期，资产负债表{balance_count}期，现金流量表{cash_flow_count}期")
-                else:
-                    st.warning("⚠️ 未能获取季报数据，将基于基本财务数据分析")
-            except Exception as e:
-                st.warning(f"⚠️ 获取季报数据时出错: {str(e)}")
-                quarterly_data = None
-        elif enable_fundamental and not fetcher._is_chinese_stock(symbol):
-            st.info("ℹ️ 美股暂不支持季报数据")
-        progress_bar.progress(37)
-
         # 获取分析师选择状态
+        enable_fundamental = st.session_state.get('enable_fundamental', True)
         enable_fund_flow = st.session_state.get('enable_fund_flow', True)
         enable_sentiment = st.session_state.get('enable_sentiment', False)
         enable_news = st.session_state.get('enable_news', False)
+        enable_risk = st.session_state.get('enable_risk', True)
 
-        # 3. 获取资金流向数据（仅在选择了资金面分析师时，使用akshare数据源）
-        fund_flow_data = None
-        if enable_fund_flow and fetcher._is_chinese_stock(symbol):
-            status_text.text("💰 正在获取资金流向数据（akshare数据源）...")
-            try:
-                from fund_flow_akshare import FundFlowAkshareDataFetcher
-                fund_flow_fetcher = FundFlowAkshareDataFetcher()
-                fund_flow_data = fund_flow_fetcher.get_fund_flow_data(symbol)
-                if fund_flow_data and fund_flow_data.get('data_success'):
-                    days = fund_flow_data.get('fund_flow_data', {}).get('days', 0) if fund_flow_data.get('fund_flow_data') else 0
-                    st.info(f"✅ 成功获取 {days} 个交易日的资金流向数据")
-                else:
-                    st.warning("⚠️ 未能获取资金流向数据，将基于技术指标进行资金面分析")
-            except Exception as e:
-                st.warning(f"⚠️ 获取资金流向数据时出错: {str(e)}")
-                fund_flow_data = None
-        elif enable_fund_flow and not fetcher._is_chinese_stock(symbol):
+        # 2. 并发获取财务、季报、资金流向、市场情绪、新闻和风险数据
+        status_text.text("📡 正在并发获取财务、季报、资金流向、市场情绪、新闻和风险数据...")
+        fetcher = StockDataFetcher()
+        is_chinese = fetcher._is_chinese_stock(symbol)
+        data_bundle = gather_analysis_data(symbol, stock_data, {
+            'fundamental': enable_fundamental,
+            'fund_flow': enable_fund_flow,
+            'sentiment': enable_sentiment,
+            'news': enable_news,
+            'risk': enable_risk
+        })
+        fetch_errors = data_bundle['errors']
+        progress_bar.progress(45)
+
+        # 季报数据（仅在选择了基本面分析师且为A股时）
+        quarterly_data = data_bundle['quarterly_data']
+        if enable_fundamental and is_chinese:
+            if 'quarterly_data' in fetch_errors:
+                st.warning(f"⚠️ 获取季报数据时出错: {fetch_errors['quarterly_data']}")
+            elif quarterly_data and quarterly_data.get('data_success'):
+                income_count = quarterly_data.get('income_statement', {}).get('periods', 0) if quarterly_data.get('income_statement') else 0
+                balance_count = quarterly_data.get('balance_sheet', {}).get('periods', 0) if quarterly_data.get('balance_sheet') else 0
+                cash_flow_count = quarterly_data.get('cash_flow', {}).get('periods', 0) if quarterly_data.get('cash_flow') else 0
+                st.info(f"✅ 成功获取季报数据：利润表{income_count}期，资产负债表{balance_count}期，现金流量表{cash_flow_count}期")
+            else:
+                st.warning("⚠️ 未能获取季报数据，将基于基本财务数据分析")
+        elif enable_fundamental and not is_chinese:
+            st.info("ℹ️ 美股暂不支持季报数据")
+
+        # 资金流向数据（仅在选择了资金面分析师时，使用akshare数据源）
+        fund_flow_data = data_bundle['fund_flow_data']
+        if enable_fund_flow and is_chinese:
+            if 'fund_flow_data' in fetch_errors:
+                st.warning(f"⚠️ 获取资金流向数据时出错: {fetch_errors['fund_flow_data']}")
+            elif fund_flow_data and fund_flow_data.get('data_success'):
+                days = fund_flow_data.get('fund_flow_data', {}).get('days', 0) if fund_flow_data.get('fund_flow_data') else 0
+                st.info(f"✅ 成功获取 {days} 个交易日的资金流向数据")
+            else:
+                st.warning("⚠️ 未能获取资金流向数据，将基于技术指标进行资金面分析")
+        elif enable_fund_flow and not is_chinese:
             st.info("ℹ️ 美股暂不支持资金流向数据")
-        progress_bar.progress(40)
 
-        # 4. 获取市场情绪数据（仅在选择了市场情绪分析师时）
-        sentiment_data = None
-        if enable_sentiment and fetcher._is_chinese_stock(symbol):
-            status_text.text("📊 正在获取市场情绪数据（ARBR等指标）...")
-            try:
-                from market_sentiment_data import MarketSentimentDataFetcher
-                sentiment_fetcher = MarketSentimentDataFetcher()
-                sentiment_data = sentiment_fetcher.get_market_sentiment_data(symbol, stock_data)
-                if sentiment_data and sentiment_data.get('data_success'):
-                    st.info("✅ 成功获取市场情绪数据（ARBR、换手率、涨跌停等）")
-                else:
-                    st.warning("⚠️ 未能获取完整的市场情绪数据，将基于基本信息进行分析")
-            except Exception as e:
-                st.warning(f"⚠️ 获取市场情绪数据时出错: {str(e)}")
-                sentiment_data = None
-        elif enable_sentiment and not fetcher._is_chinese_stock(symbol):
+        # 市场情绪数据（仅在选择了市场情绪分析师时）
+        sentiment_data = data_bundle['sentiment_data']
+        if enable_sentiment and is_chinese:
+            if 'sentiment_data' in fetch_errors:
+                st.warning(f"⚠️ 获取市场情绪数据时出错: {fetch_errors['sentiment_data']}")
+            elif sentiment_data and sentiment_data.get('data_success'):
+                st.info("✅ 成功获取市场情绪数据（ARBR、换手率、涨跌停等）")
+            else:
+                st.warning("⚠️ 未能获取完整的市场情绪数据，将基于基本信息进行分析")
+        elif enable_sentiment and not is_chinese:
             st.info("ℹ️ 美股暂不支持市场情绪数据（ARBR等指标）")
-        progress_bar.progress(45)
 
-        # 5. 获取新闻数据（仅在选择了新闻分析师时，使用qstock数据源）
-        news_data = None
-        if enable_news and fetcher._is_chinese_stock(symbol):
-            status_text.text("📰 正在获取新闻数据...")
-            try:
-                from qstock_news_data import QStockNewsDataFetcher
-                news_fetcher = QStockNewsDataFetcher()
-                news_data = news_fetcher.get_stock_news(symbol)
-                if news_data and news_data.get('data_success'):
-                    news_count = news_data.get('news_data', {}).get('count', 0) if news_data.get('news_data') else 0
-                    st.info(f"✅ 成功从东方财富获取个股 {news_count} 条新闻")
-                else:
-                    st.warning("⚠️ 未能获取新闻数据，将基于基本信息进行分析")
-            except Exception as e:
-                st.warning(f"⚠️ 获取新闻数据时出错: {str(e)}")
-                news_data = None
-        elif enable_news and not fetcher._is_chinese_stock(symbol):
+        # 新闻数据（仅在选择了新闻分析师时）
+        news_data = data_bundle['news_data']
+        if enable_news and is_chinese:
+            if 'news_data' in fetch_errors:
+                st.warning(f"⚠️ 获取新闻数据时出错: {fetch_errors['news_data']}")
+            elif news_data and news_data.get('data_success'):
+                news_count = news_data.get('news_data', {}).get('count', 0) if news_data.get('news_data') else 0
+                st.info(f"✅ 成功从东方财富获取个股 {news_count} 条新闻")
+            else:
+                st.warning("⚠️ 未能获取新闻数据，将基于基本信息进行分析")
+        elif enable_news and not is_chinese:
             st.info("ℹ️ 美股暂不支持新闻数据")
-        progress_bar.progress(45)
 
-        # 5.5 获取风险数据（仅在选择了风险管理师时，使用问财数据源）
-        enable_risk = st.session_state.get('enable_risk', True)
-        risk_data = None
-        if enable_risk and fetcher._is_chinese_stock(symbol):
-            status_text.text("⚠️ 正在获取风险数据（限售解禁、大股东减持、重要事件）...")
-            try:
-                risk_data = fetcher.get_risk_data(symbol)
-                if risk_data and risk_data.get('data_success'):
-                    # 统计获取到的风险数据类型
-                    risk_types = []
-                    if risk_data.get('lifting_ban') and risk_data['lifting_ban'].get('has_data'):
-                        risk_types.append("限售解禁")
-                    if risk_data.get('shareholder_reduction') and risk_data['shareholder_reduction'].get('has_data'):
-                        risk_types.append("大股东减持")
-                    if risk_data.get('important_events') and risk_data['important_events'].get('has_data'):
-                        risk_types.append("重要事件")
-
-                    if risk_types:
-                        st.info(f"✅ 成功获取风险数据：{', '.join(risk_types)}")
-                    else:
-                        st.info("ℹ️ 暂无风险相关数据")
+        # 风险数据（仅在选择了风险管理师时，使用问财数据源）
+        risk_data = data_bundle['risk_data']
+        if enable_risk and is_chinese:
+            if 'risk_data' in fetch_errors:
+                st.warning(f"⚠️ 获取风险数据时出错: {fetch_errors['risk_data']}")
+            elif risk_data and risk_data.get('data_success'):
+                # 统计获取到的风险数据类型
+                risk_types = []
+                if risk_data.get('lifting_ban') and risk_data['lifting_ban'].get('has_data'):
+                    risk_types.append("限售解禁")
+                if risk_data.get('shareholder_reduction') and risk_data['shareholder_reduction'].get('has_data'):
+                    risk_types.append("大股东减持")
+                if risk_data.get('important_events') and risk_data['important_events'].get('has_data'):
+                    risk_types.append("重要事件")
+
+                if risk_types:
+                    st.info(f"✅ 成功获取风险数据：{', '.join(risk_types)}")
                 else:
-                    st.info("ℹ️ 暂无风险相关数据，将基于基本信息进行风险分析")
-            except Exception as e:
-                st.warning(f"⚠️ 获取风险数据时出错: {str(e)}")
-                risk_data = None
-        elif enable_risk and not fetcher._is_chinese_stock(symbol):
+                    st.info("ℹ️ 暂无风险相关数据")
+            else:
+                st.info("ℹ️ 暂无风险相关数据，将基于基本信息进行风险分析")
+        elif enable_risk and not is_chinese:
             st.info("ℹ️ 美股暂不支持风险数据（限售解禁、大股东减持等）")
         progress_bar.progress(50)
 
@@ -1208,10 +1185,8 @@ def run_stock_analysis(symbol, period):
         agents = StockAnalysisAgents(model=selected_model)
         progress_bar.progress(55)
 
-        # 获取所有分析师选择状态
+        # 获取技术分析师选择状态
         enable_technical = st.session_state.get('enable_technical', True)
-        enable_fundamental = st.session_state.get('enable_fundamental', True)
-        enable_risk = st.session_state.get('enable_risk', True)
 
         # 创建分析师启用字典
         enabled_analysts = {
@@ -1225,23 +1200,30 @@ def run_stock_analysis(symbol, period):
 
         # 7. 运行多智能体分析（传入所有数据和分析师选择）
         status_text.text("🔍 AI分析师团队正在分析,请耐心等待几分钟...")
+        agents_area, on_agent_stream = create_agents_stream_view(enabled_analysts)
         agents_results = agents.run_multi_agent_analysis(
-            stock_info, stock_data, indicators, financial_data,
-            fund_flow_data, sentiment_data, news_data, quarterly_data, risk_data,
-            enabled_analysts=enabled_analysts
+            stock_info, stock_data, indicators,
+            enabled_analysts=enabled_analysts,
+            data_bundle=data_bundle,
+            stream_callback=on_agent_stream
         )
         progress_bar.progress(75)
 
-        # 显示各分析师报告
-        display_agents_analysis(agents_results)
+        # 显示各分析师报告（替换实时预览）
+        with agents_area.container():
+            display_agents_analysis(agents_results)
 
         # 8. 团队讨论
         status_text.text("🤝 分析团队正在讨论...")
-        discussion_result = agents.conduct_team_discussion(agents_results, stock_info)
+        discussion_area, on_discussion_stream = create_discussion_stream_view()
+        discussion_result = agents.conduct_team_discussion(
+            agents_results, stock_info, stream_callback=on_discussion_stream
+        )
         progress_bar.progress(88)
 
-        # 显示团队讨论
-        display_team_discussion(discussion_result)
+        # 显示团队讨论（替换实时预览）
+        with discussion_area.container():
+            display_team_discussion(discussion_result)
 
         # 9. 最终决策
         status_text.text("📋 正在制定最终投资决策...")
@@ -1449,6 +1431,72 @@ def display_stock_chart(stock_data, stock_info):
         volume_key = f"volume_chart_{stock_info.get('symbol', 'unknown')}_{int(time.time())}"
         st.plotly_chart(fig_volume, use_container_width=True, config={'responsive': True}, key=volume_key)
 
+# 分析师key -> 名称（与 StockAnalysisAgents.run_multi_agent_analysis 的运行顺序一致）
+ANALYST_STREAM_NAMES = [
+    ('technical', 'technical', "技术分析师"),
+    ('fundamental', 'fundamental', "基本面分析师"),
+    ('fund_flow', 'fund_flow', "资金面分析师"),
+    ('risk', 'risk_management', "风险管理师"),
+    ('sentiment', 'market_sentiment', "市场情绪分析师"),
+    ('news', 'news', "新闻分析师"),
+]
+
+
+def create_agents_stream_view(enabled_analysts):
+    """
+    创建分析师报告的实时预览区域
+
+    Args:
+        enabled_analysts: 分析师启用字典
+
+    Returns:
+        (预览区域, 流式回调)：回调参数为 (分析师key, 截至当前的报告文本)；
+        分析完成后可在预览区域中渲染最终报告
+    """
+    defaults = {'sentiment': False, 'news': False}
+    agents = [(agent_key, name) for switch, agent_key, name in ANALYST_STREAM_NAMES
+              if enabled_analysts.get(switch, defaults.get(switch, True))]
+
+    stream_area = st.empty()
+    placeholders = {}
+    if not agents:
+        return stream_area, None
+
+    with stream_area.container():
+        st.subheader("🤖 AI分析师团队报告（生成中）")
+        tabs = st.tabs([name for _, name in agents])
+        for (agent_key, _), tab in zip(agents, tabs):
+            with tab:
+                placeholders[agent_key] = st.empty()
+                placeholders[agent_key].caption("⏳ 等待分析...")
+
+    def on_stream(agent_key, text):
+        placeholder = placeholders.get(agent_key)
+        if placeholder is not None:
+            placeholder.markdown(text + " ▌")
+
+    return stream_area, on_stream
+
+
+def create_discussion_stream_view():
+    """
+    创建团队讨论的实时预览区域
+
+    Returns:
+        (预览区域, 流式回调)：回调参数为截至当前的讨论文本
+    """
+    stream_area = st.empty()
+    with stream_area.container():
+        st.subheader("🤝 分析团队讨论（进行中）")
+        placeholder = st.empty()
+        placeholder.caption("⏳ 等待讨论...")
+
+    def on_stream(text):
+        placeholder.markdown(text + " ▌")
+
+    return stream_area, on_stream
+
+
 def display_agents_analysis(agents_results):
     """显示各分析师报告"""
     st.subheader("🤖 AI分析师团队报告")
@@ -1618,19 +1666,17 @@ def show_example_interface():
     盈利能力（6项）、营运能力（3项）、偿债能力（2项）、市场表现（4项）、分红指标（3项）、股本结构（3项）
     """)
 
+# 历史记录列表每页条数
+HISTORY_PAGE_SIZE = 20
+
 def display_history_records():
     """显示历史分析记录"""
     st.subheader("📚 历史分析记录")
 
-    # 获取所有记录
-    records = db.get_all_records()
-
-    if not records:
+    if db.get_record_count() == 0:
         st.info("📭 暂无历史分析记录")
         return
 
-    st.write(f"📊 共找到 {len(records)} 条分析记录")
-
     # 搜索和筛选
     col1, col2 = st.columns([3, 1])
     with col1:
@@ -1639,21 +1685,46 @@ def display_history_records():
         st.write("")
         st.write("")
         if st.button("🔄 刷新列表"):
+            st.session_state.history_page_cursors = [None]
             st.rerun()
 
-    # 筛选记录
-    filtered_records = records
-    if search_term:
-        filtered_records = [
-            record for record in records
-            if search_term.lower() in record['symbol'].lower() or
-               search_term.lower() in record['stock_name'].lower()
-        ]
+    col3, col4 = st.columns([3, 1])
+    with col3:
+        fulltext_query = st.text_input("📝 全文检索报告内容", placeholder="如：半导体 放量，多个词用空格分隔")
+    with col4:
+        search_range = st.selectbox("时间范围", list(SEARCH_RANGES.keys()), key="history_search_range")
+
+    # 分页游标栈：第N页的起始游标；搜索条件变化时回到第一页
+    if st.session_state.get('history_search_term') != search_term or 'history_page_cursors' not in st.session_state:
+        st.session_state.history_search_term = search_term
+        st.session_state.history_page_cursors = [None]
+    page_cursors = st.session_state.history_page_cursors
+
+    if fulltext_query.strip():
+        # 全文检索按相关度返回命中记录，不分页
+        filtered_records = db.search_records(
+            fulltext_query, limit=HISTORY_PAGE_SIZE, since=range_start(SEARCH_RANGES[search_range])
+        )
+        page = {'next_cursor': None}
+        if search_term:
+            filtered_records = [
+                record for record in filtered_records
+                if search_term.lower() in record['symbol'].lower() or
+                   search_term.lower() in (record['stock_name'] or '').lower()
+            ]
+        summary_text = f"📊 全文检索命中 {len(filtered_records)} 条分析记录（按相关度排序）"
+    else:
+        total = db.count_records(search=search_term)
+        page = db.get_records_page(limit=HISTORY_PAGE_SIZE, cursor=page_cursors[-1], search=search_term)
+        filtered_records = page['records']
+        summary_text = f"📊 共找到 {total} 条分析记录（第 {len(page_cursors)} 页）"
 
     if not filtered_records:
         st.warning("🔍 未找到匹配的记录")
         return
 
+    st.write(summary_text)
+
     # 显示记录列表
     for record in filtered_records:
         # 根据评级设置颜色和图标
@@ -1687,6 +1758,10 @@ def display_history_records():
                     st.session_state.add_to_monitor_id = record['id']
                     st.session_state.viewing_record_id = record['id']
 
+            # 全文检索命中片段
+            if record.get('snippet'):
+                st.caption(record['snippet'])
+
             # 删除按钮（新增一行）
             col5, _, _, _ = st.columns(4)
             with col5:
@@ -1697,6 +1772,17 @@ def display_history_records():
                     else:
                         st.error("❌ 删除失败")
 
+    # 翻页
+    col_prev, col_next, _ = st.columns([1, 1, 4])
+    with col_prev:
+        if len(page_cursors) > 1 and st.button("⬅️ 上一页"):
+            page_cursors.pop()
+            st.rerun()
+    with col_next:
+        if page['next_cursor'] and st.button("下一页 ➡️"):
+            page_cursors.append(page['next_cursor'])
+            st.rerun()
+
     # 查看详细记录
     if 'viewing_record_id' in st.session_state:
         display_record_detail(st.session_state.viewing_record_id)
@@ -1882,7 +1968,7 @@ def display_record_detail(record_id):
     st.markdown("---")
     st.subheader("📋 详细分析记录")
 
-    record = db.get_record_by_id(record_id)
+    record = db.get_record_summary(record_id)
     if not record:
         st.error("❌ 记录不存在")
         return
@@ -1898,7 +1984,7 @@ def display_record_detail(record_id):
 
     # 股票基本信息
     st.subheader("📊 股票基本信息")
-    stock_info = record['stock_info']
+    stock_info = db.get_record_fields(record_id, ['stock_info'])['stock_info']
     if stock_info:
         col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -1931,7 +2017,7 @@ def display_record_detail(record_id):
 
     # 各分析师报告
     st.subheader("🤖 AI分析师团队报告")
-    agents_results = record['agents_results']
+    agents_results = db.get_record_fields(record_id, ['agents_results'])['agents_results']
     if agents_results:
         tab_names = []
         tab_contents = []
@@ -1960,7 +2046,7 @@ def display_record_detail(record_id):
 
     # 团队讨论
     st.subheader("🤝 分析团队讨论")
-    discussion_result = record['discussion_result']
+    discussion_result = db.get_record_fields(record_id, ['discussion_result'])['discussion_result']
     if discussion_result:
         st.markdown("""
         <div class="agent-card">
@@ -1971,7 +2057,8 @@ def display_record_detail(record_id):
 
     # 最终决策
     st.subheader("📋 最终投资决策")
-    final_decision = record['final_decision']
+    final_decision = db.get_record_fields(record_id, ['final_decision'])['final_decision']
+    record['final_decision'] = final_decision
     if final_decision:
         if isinstance(final_decision, dict) and "decision_text" not in final_decision:
             col1, col2 = st.columns([1, 2])
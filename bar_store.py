@@ -0,0 +1,340 @@
+"""
+本地日K线存储模块
+按 (股票代码, 复权类型) 持久化日线数据，只增量拉取最后一个已存日期之后的K线
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import config
+import sqlite_pool
+
+# 存储的K线字段（与 DataSourceManager 标准化后的列名一致）
+BAR_COLUMNS = ['open', 'close', 'high', 'low', 'volume', 'amount',
+               'amplitude', 'pct_change', 'change', 'turnover']
+
+# 收盘后数据不再变化的时间点
+MARKET_CLOSE_TIME = "15:30"
+
+# 标准列名 -> AKShare中文列名（供沿用 ak.stock_zh_a_hist 列名的模块使用）
+AKSHARE_COLUMN_MAP = {
+    'date': '日期',
+    'open': '开盘',
+    'close': '收盘',
+    'high': '最高',
+    'low': '最低',
+    'volume': '成交量',
+    'amount': '成交额',
+    'amplitude': '振幅',
+    'pct_change': '涨跌幅',
+    'change': '涨跌额',
+    'turnover': '换手率'
+}
+
+
+def to_akshare_columns(df):
+    """将标准列名的K线转换为AKShare中文列名"""
+    return df.rename(columns=AKSHARE_COLUMN_MAP).reset_index(drop=True)
+
+
+class BarStore:
+    """日K线本地存储 - 增量同步并合并新K线"""
+
+    def __init__(self, db_path=None, refresh_interval=None):
+        """
+        初始化K线存储
+
+        Args:
+            db_path: 数据库文件路径，默认读取 config.BAR_STORE_PATH
+            refresh_interval: 盘中两次增量同步的最小间隔（秒），默认读取 config.BAR_STORE_REFRESH_INTERVAL
+        """
+        self.db_path = db_path or config.BAR_STORE_PATH
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else config.BAR_STORE_REFRESH_INTERVAL)
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        """初始化数据库表结构"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+
+        column_defs = ",\n                ".join(f"{col} REAL" for col in BAR_COLUMNS)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS daily_bars (
+                symbol TEXT NOT NULL,
+                adjust TEXT NOT NULL,
+                date TEXT NOT NULL,
+                {column_defs},
+                PRIMARY KEY (symbol, adjust, date)
+            )
+        ''')
+
+        # 同步状态表：记录已覆盖的日期区间和最后一次检查时间
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bar_sync_state (
+                symbol TEXT NOT NULL,
+                adjust TEXT NOT NULL,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                checked_at TEXT NOT NULL,
+                PRIMARY KEY (symbol, adjust)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def get_bars(self, symbol, start_date, end_date, adjust, fetcher):
+        """
+        获取日K线，缺失的日期区间通过 fetcher 补齐后写入本地
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期（'20240101'或'2024-01-01'）
+            end_date: 结束日期
+            adjust: 复权类型（'qfq'/'hfq'/''）
+            fetcher: 网络获取函数 fetcher(symbol, start_date, end_date, adjust)，
+                     日期为'YYYYMMDD'，返回带 date 列的标准化DataFrame或None
+
+        Returns:
+            DataFrame: date列为datetime的K线数据，无数据时返回None
+        """
+        start = self._to_iso(start_date)
+        end = self._to_iso(end_date)
+
+        with self._symbol_lock(symbol, adjust):
+            state = self._get_sync_state(symbol, adjust)
+
+            if state is None:
+                df = self._fetch(fetcher, symbol, start, end, adjust)
+                if df is None:
+                    return None
+                self._replace_bars(symbol, adjust, df, start)
+            else:
+                first_date, last_date, checked_at = state
+
+                # 向前补齐：请求的开始日期早于已存区间
+                # 拉取区间包含第一个已存日期，成功时结果必然非空，返回None即为拉取失败，下次重试
+                if start < first_date:
+                    df = self._fetch(fetcher, symbol, start, first_date, adjust)
+                    if df is not None:
+                        self._upsert_bars(symbol, adjust, df)
+                        self._update_sync_state(symbol, adjust, first_date=start)
+
+                # 向后增量：从倒数第二个已存日期开始拉取
+                # 最后一根K线可能是盘中写入的未完成K线，需要覆盖；倒数第二根必然已收盘，用于校验复权
+                if end >= last_date and self._needs_refresh(checked_at):
+                    anchor_date = self._previous_bar_date(symbol, adjust, last_date) or last_date
+                    df = self._fetch(fetcher, symbol, anchor_date, end, adjust)
+                    if df is not None:
+                        if self._adjustment_changed(symbol, adjust, df, anchor_date):
+                            # 除权除息导致复权价格整体变化，丢弃旧数据重新拉取完整区间
+                            print(f"[K线存储] {symbol} 复权价格已变化，重新拉取完整历史")
+                            full_start = min(start, first_date)
+                            full_df = self._fetch(fetcher, symbol, full_start, end, adjust)
+                            if full_df is not None:
+                                self._replace_bars(symbol, adjust, full_df, full_start)
+                        else:
+                            self._upsert_bars(symbol, adjust, df)
+                            self._update_sync_state(symbol, adjust, checked=True)
+                    # 拉取失败时不记录检查时间（_replace_bars 会自行记录），避免收盘后当天不再重试
+
+            return self._read_bars(symbol, adjust, start, end)
+
+    def clear(self, symbol=None, adjust=None):
+        """
+        清除本地K线数据
+
+        Args:
+            symbol: 股票代码，为None时清除全部
+            adjust: 复权类型，为None时清除该股票所有复权类型
+        """
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        where, params = self._where(symbol, adjust)
+        cursor.execute(f'DELETE FROM daily_bars{where}', params)
+        cursor.execute(f'DELETE FROM bar_sync_state{where}', params)
+        conn.commit()
+        conn.close()
+
+    # ========== 内部方法 ==========
+
+    def _symbol_lock(self, symbol, adjust):
+        """获取单只股票的同步锁，避免并发重复拉取"""
+        with self._locks_guard:
+            key = (symbol, adjust)
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _fetch(self, fetcher, symbol, start, end, adjust):
+        """调用网络获取函数并标准化结果"""
+        if start > end:
+            return None
+        df = fetcher(symbol, start.replace('-', ''), end.replace('-', ''), adjust)
+        if df is None or df.empty or 'date' not in df.columns:
+            return None
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        for col in BAR_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        return df[['date'] + BAR_COLUMNS]
+
+    def _needs_refresh(self, checked_at):
+        """判断是否需要再次向数据源增量同步"""
+        checked = datetime.fromisoformat(checked_at)
+        now = datetime.now()
+        if (now - checked).total_seconds() < self.refresh_interval:
+            return False
+        # 当天收盘后已检查过，数据不会再变化
+        if checked.date() == now.date() and checked.strftime('%H:%M') >= MARKET_CLOSE_TIME:
+            return False
+        return True
+
+    def _previous_bar_date(self, symbol, adjust, last_date):
+        """获取最后一个已存日期之前的那根K线日期"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MAX(date) FROM daily_bars
+            WHERE symbol = ? AND adjust = ? AND date < ?
+        ''', (symbol, adjust, last_date))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def _adjustment_changed(self, symbol, adjust, df, anchor_date):
+        """比较重叠日的收盘价，判断复权基准是否变化"""
+        # 当天盘中K线本身会变化，只校验已收盘的日期
+        if anchor_date == datetime.now().strftime('%Y-%m-%d'):
+            return False
+        overlap = df[df['date'] == anchor_date]
+        if overlap.empty:
+            return False
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT close FROM daily_bars WHERE symbol = ? AND adjust = ? AND date = ?',
+            (symbol, adjust, anchor_date)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        if row is None or row[0] is None:
+            return False
+        new_close = overlap.iloc[0]['close']
+        if pd.isna(new_close):
+            return False
+        return abs(float(new_close) - float(row[0])) > 1e-6
+
+    def _upsert_bars(self, symbol, adjust, df):
+        """写入或覆盖K线，并扩展已覆盖区间"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        self._write_rows(cursor, symbol, adjust, df)
+        cursor.execute('''
+            UPDATE bar_sync_state SET last_date = MAX(last_date, ?)
+            WHERE symbol = ? AND adjust = ?
+        ''', (df['date'].max(), symbol, adjust))
+        conn.commit()
+        conn.close()
+
+    def _replace_bars(self, symbol, adjust, df, first_date):
+        """用新数据整体替换某只股票的K线"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM daily_bars WHERE symbol = ? AND adjust = ?', (symbol, adjust))
+        self._write_rows(cursor, symbol, adjust, df)
+        cursor.execute('''
+            INSERT OR REPLACE INTO bar_sync_state (symbol, adjust, first_date, last_date, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (symbol, adjust, first_date, df['date'].max(), datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+    def _write_rows(self, cursor, symbol, adjust, df):
+        """批量写入K线行"""
+        columns = ', '.join(BAR_COLUMNS)
+        placeholders = ', '.join('?' for _ in BAR_COLUMNS)
+        rows = []
+        for record in df.itertuples(index=False):
+            values = [None if pd.isna(v) else float(v) for v in record[1:]]
+            rows.append((symbol, adjust, record[0], *values))
+        cursor.executemany(f'''
+            INSERT OR REPLACE INTO daily_bars (symbol, adjust, date, {columns})
+            VALUES (?, ?, ?, {placeholders})
+        ''', rows)
+
+    def _get_sync_state(self, symbol, adjust):
+        """读取同步状态 (first_date, last_date, checked_at)"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT first_date, last_date, checked_at FROM bar_sync_state
+            WHERE symbol = ? AND adjust = ?
+        ''', (symbol, adjust))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+
+    def _update_sync_state(self, symbol, adjust, first_date=None, checked=False):
+        """更新同步状态"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        if first_date:
+            cursor.execute('''
+                UPDATE bar_sync_state SET first_date = MIN(first_date, ?)
+                WHERE symbol = ? AND adjust = ?
+            ''', (first_date, symbol, adjust))
+        if checked:
+            cursor.execute('''
+                UPDATE bar_sync_state SET checked_at = ?
+                WHERE symbol = ? AND adjust = ?
+            ''', (datetime.now().isoformat(), symbol, adjust))
+        conn.commit()
+        conn.close()
+
+    def _read_bars(self, symbol, adjust, start, end):
+        """从本地读取指定区间的K线"""
+        conn = sqlite_pool.connect(self.db_path)
+        df = pd.read_sql_query(f'''
+            SELECT date, {', '.join(BAR_COLUMNS)} FROM daily_bars
+            WHERE symbol = ? AND adjust = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        ''', conn, params=(symbol, adjust, start, end))
+        conn.close()
+        if df.empty:
+            return None
+        df['date'] = pd.to_datetime(df['date'])
+        # 去掉数据源未提供的列，保持与直接拉取时一致
+        return df.dropna(axis=1, how='all')
+
+    @staticmethod
+    def _where(symbol, adjust):
+        """构造按股票/复权类型过滤的WHERE子句"""
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if adjust is not None:
+            clauses.append('adjust = ?')
+            params.append(adjust)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    @staticmethod
+    def _to_iso(date_str):
+        """'20240101' / '2024-01-01' -> '2024-01-01'"""
+        date_str = date_str.replace('-', '')
+        return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
+
+
+# 全局K线存储实例
+bar_store = BarStore()
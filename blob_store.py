@@ -0,0 +1,213 @@
+"""
+大文本压缩存储
+分析报告、JSON结果等大字段压缩后写入同一数据库内的 blob_store 表，原表只保留摘要列和
+<字段名>_blob 引用列，列表查询不再读取大字段：
+- 压缩算法由 config.BLOB_COMPRESSION 指定（zlib / zstd / none），zstd 需要安装 zstandard，未安装时回退 zlib
+- 短于 config.BLOB_INLINE_MAX 个字符的文本仍内联存储在原列
+- 读取时同时兼容内联文本和引用，ensure_schema() 会把旧库中的内联大文本迁移到 blob_store
+"""
+
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BLOB_TABLE = 'blob_store'
+
+# IN 查询每批的ID数量（低于SQLite默认变量上限）
+_QUERY_BATCH = 500
+
+
+def blob_column(column: str) -> str:
+    """大字段对应的引用列名"""
+    return f'{column}_blob'
+
+
+def _codec() -> str:
+    """当前使用的压缩算法"""
+    codec = config.BLOB_COMPRESSION
+    if codec == 'zstd' and zstandard is None:
+        return 'zlib'
+    if codec not in ('zlib', 'zstd', 'none'):
+        return 'zlib'
+    return codec
+
+
+def encode(text: str) -> Tuple[str, bytes]:
+    """
+    压缩文本
+
+    Returns:
+        tuple: (压缩算法, 压缩后的字节)
+    """
+    raw = text.encode('utf-8')
+    codec = _codec()
+    if codec == 'zstd':
+        return codec, zstandard.ZstdCompressor(level=config.BLOB_COMPRESSION_LEVEL).compress(raw)
+    if codec == 'zlib':
+        return codec, zlib.compress(raw, config.BLOB_COMPRESSION_LEVEL)
+    return 'none', raw
+
+
+def decode(codec: str, data: bytes) -> str:
+    """解压文本"""
+    if codec == 'zlib':
+        raw = zlib.decompress(data)
+    elif codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("读取zstd压缩数据需要安装 zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = bytes(data)
+    return raw.decode('utf-8')
+
+
+def store(cursor: sqlite3.Cursor, text: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    保存大字段
+
+    Args:
+        cursor: 数据库游标（与业务表写入处于同一事务）
+        text: 字段文本
+
+    Returns:
+        tuple: (原列写入的值, 引用列写入的blob ID)；短文本原样内联，引用为None
+    """
+    if text is None or len(text) < config.BLOB_INLINE_MAX:
+        return text, None
+    codec, data = encode(text)
+    cursor.execute(
+        f'INSERT INTO {BLOB_TABLE} (codec, raw_size, data) VALUES (?, ?, ?)',
+        (codec, len(text), sqlite3.Binary(data))
+    )
+    return '', cursor.lastrowid
+
+
+def load(cursor: sqlite3.Cursor, blob_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    批量读取大字段
+
+    Returns:
+        dict: {blob ID: 文本}
+    """
+    ids = list({blob_id for blob_id in blob_ids if blob_id is not None})
+    texts = {}
+    for start in range(0, len(ids), _QUERY_BATCH):
+        batch = ids[start:start + _QUERY_BATCH]
+        cursor.execute(
+            f"SELECT id, codec, data FROM {BLOB_TABLE} WHERE id IN ({', '.join('?' * len(batch))})",
+            batch
+        )
+        for blob_id, codec, data in cursor.fetchall():
+            texts[blob_id] = decode(codec, data)
+    return texts
+
+
+def resolve(cursor: sqlite3.Cursor, inline: Optional[str], blob_id: Optional[int]) -> Optional[str]:
+    """取单个字段的文本（有引用时读取blob，否则返回内联值）"""
+    if blob_id is None:
+        return inline
+    return load(cursor, [blob_id]).get(blob_id)
+
+
+def inflate(cursor: sqlite3.Cursor, rows: List[dict], columns: Iterable[str]) -> List[dict]:
+    """
+    还原查询结果中的大字段（原地修改并移除引用列）
+
+    Args:
+        cursor: 数据库游标
+        rows: 查询结果字典列表（需包含引用列）
+        columns: 大字段列名
+    """
+    columns = list(columns)
+    texts = load(cursor, (row.get(blob_column(column)) for row in rows for column in columns))
+    for row in rows:
+        for column in columns:
+            blob_id = row.pop(blob_column(column), None)
+            if blob_id is not None:
+                row[column] = texts.get(blob_id)
+    return rows
+
+
+def delete_refs(cursor: sqlite3.Cursor, table: str, columns: Iterable[str], where: str, params=()) -> int:
+    """
+    删除业务表中符合条件的行所引用的blob（在删除业务行之前调用）
+
+    Returns:
+        int: 删除的blob数量
+    """
+    refs = ', '.join(blob_column(column) for column in columns)
+    cursor.execute(f'SELECT {refs} FROM {table} WHERE {where}', params)
+    ids = [blob_id for row in cursor.fetchall() for blob_id in row if blob_id is not None]
+    for start in range(0, len(ids), _QUERY_BATCH):
+        batch = ids[start:start + _QUERY_BATCH]
+        cursor.execute(f"DELETE FROM {BLOB_TABLE} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+    return len(ids)
+
+
+def ensure_schema(conn: sqlite3.Connection, table: str, columns: Iterable[str], batch_size: int = 200) -> int:
+    """
+    创建blob表、为业务表添加引用列，并把已有的内联大文本迁移到blob表
+
+    迁移只处理尚未迁移且长度超过内联阈值的行，重复调用代价很小；
+    有数据迁移时提交后执行 VACUUM 回收空间。
+
+    Args:
+        conn: 数据库连接
+        table: 业务表名
+        columns: 需要压缩存储的大字段列名
+        batch_size: 每批迁移的行数
+
+    Returns:
+        int: 迁移的字段数量
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {BLOB_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    ''')
+
+    migrated = 0
+    for column in columns:
+        ref = blob_column(column)
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {ref} INTEGER")
+        except sqlite3.OperationalError:
+            pass
+
+        last_id = 0
+        while True:
+            cursor.execute(f'''
+                SELECT id, {column} FROM {table}
+                WHERE id > ? AND {ref} IS NULL AND length({column}) >= ?
+                ORDER BY id LIMIT ?
+            ''', (last_id, config.BLOB_INLINE_MAX, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for row_id, text in rows:
+                inline, blob_id = store(cursor, str(text))
+                cursor.execute(f"UPDATE {table} SET {column} = ?, {ref} = ? WHERE id = ?", (inline, blob_id, row_id))
+            migrated += len(rows)
+            last_id = rows[-1][0]
+        conn.commit()
+
+    if migrated:
+        print(f"[压缩存储] {table}: 已迁移 {migrated} 个大字段到 {BLOB_TABLE}")
+        try:
+            conn.execute('VACUUM')
+            # WAL模式下整理结果先写入WAL，检查点后主文件才会变小
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error as e:
+            print(f"[压缩存储] ⚠️ VACUUM 失败，空间将在下次整理时回收: {e}")
+    return migrated
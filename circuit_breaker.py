@@ -0,0 +1,266 @@
+"""
+数据源熔断器
+按 数据源+接口（如 akshare/stock_hist）分别统计最近调用的失败率和耗时分位数：
+- 只有网络、超时、HTTP错误计为数据源故障；代码不存在等单只股票的数据错误照常抛出，不触发熔断
+- 连续失败达到阈值，或窗口内失败率过高时熔断，熔断期间不再调用该数据源，直接使用备用数据源
+- 冷却期结束后放行一次试探请求（半开），成功则恢复，失败则重新熔断
+- 多个数据源都可用时，P95耗时过长的数据源排到其他数据源之后
+"""
+
+import http.client
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _transport_errors() -> tuple:
+    """网络、超时、HTTP类异常（requests/urllib3 未安装时跳过）"""
+    errors = [OSError, http.client.HTTPException]
+    try:
+        import requests
+        errors.append(requests.RequestException)
+    except ImportError:
+        pass
+    try:
+        import urllib3
+        errors.append(urllib3.exceptions.HTTPError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+# OSError 已包含 ConnectionError、TimeoutError、socket.timeout
+TRANSPORT_ERRORS = _transport_errors()
+
+
+def is_source_failure(error: BaseException) -> bool:
+    """
+    异常是否属于数据源故障（网络、超时、HTTP错误），沿 __cause__/__context__ 查找被包装的原始异常
+
+    Args:
+        error: 调用数据源时抛出的异常
+
+    Returns:
+        bool: 是否计入熔断统计
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, TRANSPORT_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitOpenError(Exception):
+    """数据源处于熔断状态，本次调用被跳过"""
+
+
+class CircuitBreaker:
+    """单个 数据源+接口 的熔断器（线程安全）"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 熔断器名称（数据源/接口）
+        """
+        self.name = name
+        self.state = CLOSED
+        self._calls = deque(maxlen=config.CIRCUIT_WINDOW)  # (是否成功, 耗时秒)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.RLock()
+
+    def _open(self, reason: str):
+        """进入熔断状态（调用方持有锁）"""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        print(f"[熔断] ⛔ {self.name} 已熔断（{reason}），{config.CIRCUIT_COOLDOWN:.0f}秒后试探恢复")
+
+    def allow(self) -> bool:
+        """
+        判断本次是否可以调用；冷却期结束后只放行一个试探请求
+
+        Returns:
+            bool: 是否可以调用（放行后必须调用 record_success / record_failure）
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= config.CIRCUIT_COOLDOWN:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        """记录一次成功调用"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # 熔断前的失败记录不再参与统计
+                self._calls.clear()
+                self.state = CLOSED
+                self._probing = False
+                print(f"[熔断] ✅ {self.name} 试探成功，已恢复")
+            self._calls.append((True, latency))
+            self._consecutive_failures = 0
+
+    def record_failure(self, latency: float):
+        """记录一次失败调用"""
+        with self._lock:
+            self._calls.append((False, latency))
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open("试探请求失败")
+            elif self.state == CLOSED:
+                if self._consecutive_failures >= config.CIRCUIT_FAILURE_THRESHOLD:
+                    self._open(f"连续失败{self._consecutive_failures}次")
+                elif len(self._calls) >= config.CIRCUIT_MIN_CALLS and self.error_rate() >= config.CIRCUIT_ERROR_RATE:
+                    self._open(f"失败率{self.error_rate():.0%}")
+
+    def error_rate(self) -> float:
+        """统计窗口内的失败率"""
+        with self._lock:
+            if not self._calls:
+                return 0.0
+            return sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+
+    def latency_percentile(self, percent: float) -> Optional[float]:
+        """
+        统计窗口内的耗时分位数（秒）
+
+        Args:
+            percent: 分位（0-100）
+
+        Returns:
+            float: 耗时，尚无调用记录时返回None
+        """
+        with self._lock:
+            latencies = sorted(latency for _, latency in self._calls)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, int(round(percent / 100 * len(latencies))) - 1))
+        return latencies[index]
+
+    def is_slow(self) -> bool:
+        """P95耗时是否超过慢调用阈值（调用次数不足时不判定）"""
+        with self._lock:
+            if len(self._calls) < config.CIRCUIT_MIN_CALLS:
+                return False
+            return self.latency_percentile(95) > config.CIRCUIT_SLOW_CALL
+
+    def stats(self) -> Dict:
+        """当前状态和统计数据"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'calls': len(self._calls),
+                'error_rate': self.error_rate(),
+                'p50': self.latency_percentile(50),
+                'p95': self.latency_percentile(95),
+                'consecutive_failures': self._consecutive_failures,
+            }
+
+
+class CircuitBreakerRegistry:
+    """全部数据源熔断器的注册表，负责按健康状况选择数据源"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str, endpoint: str) -> CircuitBreaker:
+        """获取（不存在时创建）数据源某个接口的熔断器"""
+        key = (source, endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(f"{source}/{endpoint}"))
+        return breaker
+
+    def call(self, source: str, endpoint: str, func: Callable, *args, **kwargs):
+        """
+        通过熔断器调用数据源接口
+
+        Args:
+            source: 数据源名称（如 akshare、tushare）
+            endpoint: 接口名称
+            func: 实际调用的函数；抛出网络、超时、HTTP错误时计为失败，其他异常照常抛出但不计为失败
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            CircuitOpenError: 数据源处于熔断状态
+        """
+        breaker = self.get(source, endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{breaker.name} 熔断中，已跳过")
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_source_failure(e):
+                breaker.record_failure(time.monotonic() - start)
+            else:
+                # 数据源正常响应，只是该请求的数据有误（如股票代码不存在）
+                breaker.record_success(time.monotonic() - start)
+            raise
+        breaker.record_success(time.monotonic() - start)
+        return result
+
+    def order(self, endpoint: str, sources: List[str]) -> List[str]:
+        """
+        按健康状况排列数据源：保持原有优先级，P95耗时过长的数据源排到其他数据源之后
+
+        Args:
+            endpoint: 接口名称
+            sources: 按优先级排列的数据源
+        """
+        return sorted(sources, key=lambda source: self.get(source, endpoint).is_slow())
+
+    def route(self, endpoint: str, fetchers: Dict[str, Callable]):
+        """
+        依次尝试各数据源，跳过熔断中的数据源，返回第一个非空结果
+
+        返回None或空数据表示该数据源没有数据（不计为失败），继续尝试下一个数据源；
+        抛出异常时同样尝试下一个数据源，其中只有网络、超时、HTTP错误计为失败。
+
+        Args:
+            endpoint: 接口名称
+            fetchers: {数据源名称: 无参获取函数}，按优先级排列
+
+        Returns:
+            第一个非空结果，全部失败时返回None
+        """
+        for source in self.order(endpoint, list(fetchers)):
+            try:
+                result = self.call(source, endpoint, fetchers[source])
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                print(f"[{source.capitalize()}] ❌ {endpoint} 获取失败: {e}")
+                continue
+            if result is None or getattr(result, 'empty', False):
+                continue
+            return result
+        return None
+
+    def snapshot(self) -> List[Dict]:
+        """全部熔断器的状态和统计数据"""
+        return [breaker.stats() for breaker in list(self._breakers.values())]
+
+
+# 全局熔断器注册表
+circuit_breakers = CircuitBreakerRegistry()
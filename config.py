@@ -15,6 +15,87 @@ TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN", "")
 DEFAULT_PERIOD = "1y"  # 默认获取1年数据
 DEFAULT_INTERVAL = "1d"  # 默认日线数据
 
+# 全市场行情快照有效期（秒），同一周期内所有模块共享一份 stock_zh_a_spot_em 数据
+MARKET_SNAPSHOT_TTL = int(os.getenv("MARKET_SNAPSHOT_TTL", "60"))
+# 快照刷新失败后多久再重试（秒），期间直接使用旧快照，不再重复下载
+MARKET_SNAPSHOT_RETRY_INTERVAL = int(os.getenv("MARKET_SNAPSHOT_RETRY_INTERVAL", "15"))
+# 刷新失败时旧快照的最长可用时间（秒），超过后视为无数据
+MARKET_SNAPSHOT_MAX_AGE = int(os.getenv("MARKET_SNAPSHOT_MAX_AGE", "300"))
+
+# 价格监测：批量模式下每轮只取一次全市场行情快照，为所有到期股票定价
+MONITOR_BATCH_REFRESH = os.getenv("MONITOR_BATCH_REFRESH", "true").lower() == "true"
+# 监测到期队列的全量重建间隔（秒），用于同步其他进程对监测列表的修改
+MONITOR_RESYNC_INTERVAL = int(os.getenv("MONITOR_RESYNC_INTERVAL", "1800"))
+
+# 本地日K线存储（增量同步）
+BAR_STORE_PATH = os.getenv("BAR_STORE_PATH", "stock_bars.db")
+BAR_STORE_REFRESH_INTERVAL = int(os.getenv("BAR_STORE_REFRESH_INTERVAL", "300"))  # 盘中增量同步最小间隔（秒）
+
+# 增量技术指标：每只股票每隔多少次增量更新与批量计算校验一次（0表示只在重建状态时校验）
+INDICATOR_VERIFY_INTERVAL = int(os.getenv("INDICATOR_VERIFY_INTERVAL", "50"))
+
+# 龙虎榜增量模式：只获取本地数据库缺失的日期，评分排名由每日评分汇总滚动合并
+LONGHUBANG_INCREMENTAL = os.getenv("LONGHUBANG_INCREMENTAL", "true").lower() == "true"
+# StockAPI 请求限流（次/秒，所有线程共享）与龙虎榜按日期并发请求的线程数
+STOCKAPI_RATE_LIMIT = float(os.getenv("STOCKAPI_RATE_LIMIT", "40"))
+LONGHUBANG_FETCH_WORKERS = int(os.getenv("LONGHUBANG_FETCH_WORKERS", "8"))
+
+# SQLite连接管理：忙等待超时（秒）与每个连接缓存的预编译语句数
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+
+# 大文本（分析报告、JSON结果）压缩存储：算法 zlib/zstd/none、压缩级别、小于该字符数的文本不压缩直接内联
+BLOB_COMPRESSION = os.getenv("BLOB_COMPRESSION", "zlib").lower()
+BLOB_COMPRESSION_LEVEL = int(os.getenv("BLOB_COMPRESSION_LEVEL", "6"))
+BLOB_INLINE_MAX = int(os.getenv("BLOB_INLINE_MAX", "256"))
+
+# 共享LLM客户端配置（连接池 + 全局并发限制）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # 同时在途的LLM请求数上限
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))  # HTTP连接池大小
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "600"))  # 单次请求超时（秒）
+
+# LLM响应缓存（相同模型、消息和温度的请求直接复用结果）
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "43200"))  # 缓存有效期（秒），默认12小时
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))  # 最大缓存条数
+
+# 流式输出回调的最小间隔（秒），避免每个token都重新渲染页面
+LLM_STREAM_CALLBACK_INTERVAL = float(os.getenv("LLM_STREAM_CALLBACK_INTERVAL", "0.1"))
+
+# 提示词数据段的token预算（format_*_for_ai 按此压缩表格数据）
+PROMPT_TOKEN_BUDGETS = {
+    'default': int(os.getenv("PROMPT_TOKENS_DEFAULT", "3000")),
+    'fund_flow': int(os.getenv("PROMPT_TOKENS_FUND_FLOW", "2500")),
+    'quarterly': int(os.getenv("PROMPT_TOKENS_QUARTERLY", "4000")),
+    'risk': int(os.getenv("PROMPT_TOKENS_RISK", "3000")),
+    'longhubang': int(os.getenv("PROMPT_TOKENS_LONGHUBANG", "5000")),
+    'sector': int(os.getenv("PROMPT_TOKENS_SECTOR", "4000")),
+}
+
+# AI分析师并发配置
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))  # 同时运行的分析师数量上限
+AGENT_TIMEOUT = int(os.getenv("AGENT_TIMEOUT", "300"))  # 单个分析师超时时间（秒）
+
+# 智能盯盘监控工作池
+SMART_MONITOR_MAX_WORKERS = int(os.getenv("SMART_MONITOR_MAX_WORKERS", "4"))  # 同时执行的盯盘分析数上限
+SMART_MONITOR_LLM_CONCURRENCY = int(os.getenv("SMART_MONITOR_LLM_CONCURRENCY", "2"))  # 同时进行的AI决策数上限
+
+# 智能盯盘AI决策预筛：行情与上次决策输入相比无实质变化时复用上次决策，不再调用AI
+SMART_MONITOR_PRESCREEN_ENABLED = os.getenv("SMART_MONITOR_PRESCREEN_ENABLED", "true").lower() == "true"
+SMART_MONITOR_PRESCREEN_PRICE_PCT = float(os.getenv("SMART_MONITOR_PRESCREEN_PRICE_PCT", "0.5"))  # 价格变动阈值（%）
+SMART_MONITOR_PRESCREEN_VOLUME_PCT = float(os.getenv("SMART_MONITOR_PRESCREEN_VOLUME_PCT", "30"))  # 成交量增幅阈值（%）
+SMART_MONITOR_PRESCREEN_FLOW_PCT = float(os.getenv("SMART_MONITOR_PRESCREEN_FLOW_PCT", "3"))  # 主力净占比变动阈值（百分点）
+SMART_MONITOR_PRESCREEN_MAX_AGE = int(os.getenv("SMART_MONITOR_PRESCREEN_MAX_AGE", "1800"))  # 决策最长复用时间（秒）
+
+# 数据源熔断：按 数据源+接口 统计失败率和耗时，连续失败后暂停调用，冷却期后放行一次试探请求
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))  # 连续失败多少次后熔断
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))  # 统计窗口内失败率达到该值时熔断
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))  # 按失败率熔断所需的最少调用次数
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "50"))  # 统计窗口（最近调用次数）
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "60"))  # 熔断后多久放行试探请求（秒）
+CIRCUIT_SLOW_CALL = float(os.getenv("CIRCUIT_SLOW_CALL", "10"))  # P95耗时超过该值（秒）的数据源排到备用源之后
+
 # MiniQMT量化交易配置
 MINIQMT_CONFIG = {
     'enabled': os.getenv("MINIQMT_ENABLED", "false").lower() == "true",
@@ -8,12 +8,14 @@ import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from circuit_breaker import circuit_breakers
+
 # 加载环境变量
 load_dotenv()
 
 
 class DataSourceManager:
-    """数据源管理器 - 实现akshare与tushare自动切换"""
+    """数据源管理器 - 实现akshare与tushare自动切换（按接口熔断，熔断中的数据源直接跳过）"""
     
     def __init__(self):
         self.tushare_token = os.getenv('TUSHARE_TOKEN', '')
@@ -34,15 +36,16 @@ class DataSourceManager:
         else:
             print("ℹ️ 未配置Tushare Token，将仅使用Akshare数据源")
     
-    def get_stock_hist_data(self, symbol, start_date=None, end_date=None, adjust='qfq'):
+    def get_stock_hist_data(self, symbol, start_date=None, end_date=None, adjust='qfq', use_cache=True):
         """
-        获取股票历史数据（优先akshare，失败时使用tushare）
+        获取股票历史数据（优先读取本地K线存储，只增量拉取缺失部分）
         
         Args:
             symbol: 股票代码（6位数字）
             start_date: 开始日期（格式：'20240101'或'2024-01-01'）
             end_date: 结束日期
             adjust: 复权类型（'qfq'前复权, 'hfq'后复权, ''不复权）
+            use_cache: 是否使用本地K线存储（未指定开始日期时总是直接拉取）
             
         Returns:
             DataFrame: 包含日期、开盘、收盘、最高、最低、成交量等列
@@ -55,8 +58,33 @@ class DataSourceManager:
         else:
             end_date = datetime.now().strftime('%Y%m%d')
         
-        # 优先使用akshare
-        try:
+        if use_cache and start_date:
+            try:
+                from bar_store import bar_store
+                df = bar_store.get_bars(symbol, start_date, end_date, adjust,
+                                        fetcher=self._fetch_stock_hist_data)
+                if df is not None and not df.empty:
+                    print(f"[K线存储] ✅ {symbol} 共 {len(df)} 条数据")
+                    return df
+            except Exception as e:
+                print(f"[K线存储] ⚠️ 读取失败，直接从数据源获取: {e}")
+        
+        return self._fetch_stock_hist_data(symbol, start_date, end_date, adjust)
+    
+    def _fetch_stock_hist_data(self, symbol, start_date, end_date, adjust='qfq'):
+        """
+        从数据源拉取股票历史数据（优先akshare，失败或熔断时使用tushare）
+        
+        Args:
+            symbol: 股票代码（6位数字）
+            start_date: 开始日期（格式：'20240101'）
+            end_date: 结束日期（格式：'20240101'）
+            adjust: 复权类型
+            
+        Returns:
+            DataFrame: 标准化列名后的历史数据，失败时返回None
+        """
+        def fetch_akshare():
             import akshare as ak
             print(f"[Akshare] 正在获取 {symbol} 的历史数据...")
             
@@ -85,53 +113,47 @@ class DataSourceManager:
                 })
                 df['date'] = pd.to_datetime(df['date'])
                 print(f"[Akshare] ✅ 成功获取 {len(df)} 条数据")
-                return df
-        except Exception as e:
-            print(f"[Akshare] ❌ 获取失败: {e}")
+            return df
         
-        # akshare失败，尝试tushare
-        if self.tushare_available:
-            try:
-                print(f"[Tushare] 正在获取 {symbol} 的历史数据（备用数据源）...")
-                
-                # 转换股票代码格式（添加市场后缀）
-                ts_code = self._convert_to_ts_code(symbol)
-                
-                # 转换复权类型
-                adj_dict = {'qfq': 'qfq', 'hfq': 'hfq', '': None}
-                adj = adj_dict.get(adjust, 'qfq')
-                
-                # 格式化日期
-                start = f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:]}" if start_date else None
-                end = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}" if end_date else None
+        def fetch_tushare():
+            print(f"[Tushare] 正在获取 {symbol} 的历史数据（备用数据源）...")
+            
+            # 转换股票代码格式（添加市场后缀）
+            ts_code = self._convert_to_ts_code(symbol)
+            
+            # 转换复权类型
+            adj_dict = {'qfq': 'qfq', 'hfq': 'hfq', '': None}
+            adj = adj_dict.get(adjust, 'qfq')
+            
+            # 获取数据
+            df = self.tushare_api.daily(
+                ts_code=ts_code,
+                start_date=start_date,
+                end_date=end_date,
+                adj=adj
+            )
+            
+            if df is not None and not df.empty:
+                # 标准化列名和数据格式
+                df = df.rename(columns={
+                    'trade_date': 'date',
+                    'vol': 'volume',
+                    'amount': 'amount'
+                })
+                df['date'] = pd.to_datetime(df['date'])
+                df = df.sort_values('date')
                 
-                # 获取数据
-                df = self.tushare_api.daily(
-                    ts_code=ts_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adj=adj
-                )
+                # 转换成交量单位（tushare单位是手，转换为股）
+                df['volume'] = df['volume'] * 100
+                # 转换成交额单位（tushare单位是千元，转换为元）
+                df['amount'] = df['amount'] * 1000
                 
-                if df is not None and not df.empty:
-                    # 标准化列名和数据格式
-                    df = df.rename(columns={
-                        'trade_date': 'date',
-                        'vol': 'volume',
-                        'amount': 'amount'
-                    })
-                    df['date'] = pd.to_datetime(df['date'])
-                    df = df.sort_values('date')
-                    
-                    # 转换成交量单位（tushare单位是手，转换为股）
-                    df['volume'] = df['volume'] * 100
-                    # 转换成交额单位（tushare单位是千元，转换为元）
-                    df['amount'] = df['amount'] * 1000
-                    
-                    print(f"[Tushare] ✅ 成功获取 {len(df)} 条数据")
-                    return df
-            except Exception as e:
-                print(f"[Tushare] ❌ 获取失败: {e}")
+                print(f"[Tushare] ✅ 成功获取 {len(df)} 条数据")
+            return df
+        
+        df = circuit_breakers.route('stock_hist', self._fetchers(fetch_akshare, fetch_tushare))
+        if df is not None:
+            return df
         
         # 两个数据源都失败
         print("❌ 所有数据源均获取失败")
@@ -139,7 +161,7 @@ class DataSourceManager:
     
     def get_stock_basic_info(self, symbol):
         """
-        获取股票基本信息（优先akshare，失败时使用tushare）
+        获取股票基本信息（优先akshare，失败或熔断时使用tushare）
         
         Args:
             symbol: 股票代码
@@ -154,60 +176,57 @@ class DataSourceManager:
             "market": "未知"
         }
         
-        # 优先使用akshare
-        try:
+        def fetch_akshare():
             import akshare as ak
             print(f"[Akshare] 正在获取 {symbol} 的基本信息...")
             
             stock_info = ak.stock_individual_info_em(symbol=symbol)
-            if stock_info is not None and not stock_info.empty:
-                for _, row in stock_info.iterrows():
-                    key = row['item']
-                    value = row['value']
-                    
-                    if key == '股票简称':
-                        info['name'] = value
-                    elif key == '所处行业':
-                        info['industry'] = value
-                    elif key == '上市时间':
-                        info['list_date'] = value
-                    elif key == '总市值':
-                        info['market_cap'] = value
-                    elif key == '流通市值':
-                        info['circulating_market_cap'] = value
+            if stock_info is None or stock_info.empty:
+                return None
+            result = dict(info)
+            for _, row in stock_info.iterrows():
+                key = row['item']
+                value = row['value']
                 
-                print(f"[Akshare] ✅ 成功获取基本信息")
-                return info
-        except Exception as e:
-            print(f"[Akshare] ❌ 获取失败: {e}")
+                if key == '股票简称':
+                    result['name'] = value
+                elif key == '所处行业':
+                    result['industry'] = value
+                elif key == '上市时间':
+                    result['list_date'] = value
+                elif key == '总市值':
+                    result['market_cap'] = value
+                elif key == '流通市值':
+                    result['circulating_market_cap'] = value
+            
+            print(f"[Akshare] ✅ 成功获取基本信息")
+            return result
         
-        # akshare失败，尝试tushare
-        if self.tushare_available:
-            try:
-                print(f"[Tushare] 正在获取 {symbol} 的基本信息（备用数据源）...")
-                
-                ts_code = self._convert_to_ts_code(symbol)
-                df = self.tushare_api.stock_basic(
-                    ts_code=ts_code,
-                    fields='ts_code,name,area,industry,market,list_date'
-                )
-                
-                if df is not None and not df.empty:
-                    info['name'] = df.iloc[0]['name']
-                    info['industry'] = df.iloc[0]['industry']
-                    info['market'] = df.iloc[0]['market']
-                    info['list_date'] = df.iloc[0]['list_date']
-                    
-                    print(f"[Tushare] ✅ 成功获取基本信息")
-                    return info
-            except Exception as e:
-                print(f"[Tushare] ❌ 获取失败: {e}")
+        def fetch_tushare():
+            print(f"[Tushare] 正在获取 {symbol} 的基本信息（备用数据源）...")
+            
+            ts_code = self._convert_to_ts_code(symbol)
+            df = self.tushare_api.stock_basic(
+                ts_code=ts_code,
+                fields='ts_code,name,area,industry,market,list_date'
+            )
+            
+            if df is None or df.empty:
+                return None
+            result = dict(info)
+            result['name'] = df.iloc[0]['name']
+            result['industry'] = df.iloc[0]['industry']
+            result['market'] = df.iloc[0]['market']
+            result['list_date'] = df.iloc[0]['list_date']
+            
+            print(f"[Tushare] ✅ 成功获取基本信息")
+            return result
         
-        return info
+        return circuit_breakers.route('basic_info', self._fetchers(fetch_akshare, fetch_tushare)) or info
     
     def get_realtime_quotes(self, symbol):
         """
-        获取实时行情数据（优先akshare，失败时使用tushare）
+        获取实时行情数据（优先akshare，失败或熔断时使用tushare）
         
         Args:
             symbol: 股票代码
@@ -215,71 +234,60 @@ class DataSourceManager:
         Returns:
             dict: 实时行情数据
         """
-        quotes = {}
-        
-        # 优先使用akshare
-        try:
-            import akshare as ak
+        def fetch_akshare():
+            from market_snapshot import market_snapshot
             print(f"[Akshare] 正在获取 {symbol} 的实时行情...")
             
-            df = ak.stock_zh_a_spot_em()
-            stock_df = df[df['代码'] == symbol]
+            row = market_snapshot.get_quote(symbol)
+            if row is None:
+                return None
             
-            if not stock_df.empty:
-                row = stock_df.iloc[0]
-                quotes = {
-                    'symbol': symbol,
-                    'name': row['名称'],
-                    'price': row['最新价'],
-                    'change_percent': row['涨跌幅'],
-                    'change': row['涨跌额'],
-                    'volume': row['成交量'],
-                    'amount': row['成交额'],
-                    'high': row['最高'],
-                    'low': row['最低'],
-                    'open': row['今开'],
-                    'pre_close': row['昨收']
-                }
-                print(f"[Akshare] ✅ 成功获取实时行情")
-                return quotes
-        except Exception as e:
-            print(f"[Akshare] ❌ 获取失败: {e}")
+            print(f"[Akshare] ✅ 成功获取实时行情")
+            return {
+                'symbol': symbol,
+                'name': row['名称'],
+                'price': row['最新价'],
+                'change_percent': row['涨跌幅'],
+                'change': row['涨跌额'],
+                'volume': row['成交量'],
+                'amount': row['成交额'],
+                'high': row['最高'],
+                'low': row['最低'],
+                'open': row['今开'],
+                'pre_close': row['昨收']
+            }
         
-        # akshare失败，尝试tushare
-        if self.tushare_available:
-            try:
-                print(f"[Tushare] 正在获取 {symbol} 的实时行情（备用数据源）...")
-                
-                ts_code = self._convert_to_ts_code(symbol)
-                df = self.tushare_api.daily(
-                    ts_code=ts_code,
-                    start_date=datetime.now().strftime('%Y%m%d'),
-                    end_date=datetime.now().strftime('%Y%m%d')
-                )
-                
-                if df is not None and not df.empty:
-                    row = df.iloc[0]
-                    quotes = {
-                        'symbol': symbol,
-                        'price': row['close'],
-                        'change_percent': row['pct_chg'],
-                        'volume': row['vol'] * 100,
-                        'amount': row['amount'] * 1000,
-                        'high': row['high'],
-                        'low': row['low'],
-                        'open': row['open'],
-                        'pre_close': row['pre_close']
-                    }
-                    print(f"[Tushare] ✅ 成功获取实时行情")
-                    return quotes
-            except Exception as e:
-                print(f"[Tushare] ❌ 获取失败: {e}")
+        def fetch_tushare():
+            print(f"[Tushare] 正在获取 {symbol} 的实时行情（备用数据源）...")
+            
+            ts_code = self._convert_to_ts_code(symbol)
+            df = self.tushare_api.daily(
+                ts_code=ts_code,
+                start_date=datetime.now().strftime('%Y%m%d'),
+                end_date=datetime.now().strftime('%Y%m%d')
+            )
+            
+            if df is None or df.empty:
+                return None
+            row = df.iloc[0]
+            print(f"[Tushare] ✅ 成功获取实时行情")
+            return {
+                'symbol': symbol,
+                'price': row['close'],
+                'change_percent': row['pct_chg'],
+                'volume': row['vol'] * 100,
+                'amount': row['amount'] * 1000,
+                'high': row['high'],
+                'low': row['low'],
+                'open': row['open'],
+                'pre_close': row['pre_close']
+            }
         
-        return quotes
+        return circuit_breakers.route('realtime_quotes', self._fetchers(fetch_akshare, fetch_tushare)) or {}
     
     def get_financial_data(self, symbol, report_type='income'):
         """
-        获取财务数据（优先akshare，失败时使用tushare）
+        获取财务数据（优先akshare，失败或熔断时使用tushare）
         
         Args:
             symbol: 股票代码
@@ -288,8 +296,7 @@ class DataSourceManager:
         Returns:
             DataFrame: 财务数据
         """
-        # 优先使用akshare
-        try:
+        def fetch_akshare():
             import akshare as ak
             print(f"[Akshare] 正在获取 {symbol} 的财务数据...")
             
@@ -304,33 +311,43 @@ class DataSourceManager:
             
             if df is not None and not df.empty:
                 print(f"[Akshare] ✅ 成功获取财务数据")
-                return df
-        except Exception as e:
-            print(f"[Akshare] ❌ 获取失败: {e}")
+            return df
         
-        # akshare失败，尝试tushare
-        if self.tushare_available:
-            try:
-                print(f"[Tushare] 正在获取 {symbol} 的财务数据（备用数据源）...")
-                
-                ts_code = self._convert_to_ts_code(symbol)
-                
-                if report_type == 'income':
-                    df = self.tushare_api.income(ts_code=ts_code)
-                elif report_type == 'balance':
-                    df = self.tushare_api.balancesheet(ts_code=ts_code)
-                elif report_type == 'cashflow':
-                    df = self.tushare_api.cashflow(ts_code=ts_code)
-                else:
-                    df = None
-                
-                if df is not None and not df.empty:
-                    print(f"[Tushare] ✅ 成功获取财务数据")
-                    return df
-            except Exception as e:
-                print(f"[Tushare] ❌ 获取失败: {e}")
+        def fetch_tushare():
+            print(f"[Tushare] 正在获取 {symbol} 的财务数据（备用数据源）...")
+            
+            ts_code = self._convert_to_ts_code(symbol)
+            
+            if report_type == 'income':
+                df = self.tushare_api.income(ts_code=ts_code)
+            elif report_type == 'balance':
+                df = self.tushare_api.balancesheet(ts_code=ts_code)
+            elif report_type == 'cashflow':
+                df = self.tushare_api.cashflow(ts_code=ts_code)
+            else:
+                df = None
+            
+            if df is not None and not df.empty:
+                print(f"[Tushare] ✅ 成功获取财务数据")
+            return df
         
-        return None
+        return circuit_breakers.route('financial_' + report_type, self._fetchers(fetch_akshare, fetch_tushare))
+    
+    def _fetchers(self, fetch_akshare, fetch_tushare):
+        """
+        按优先级组装各数据源的获取函数（未配置tushare时只使用akshare）
+        
+        Args:
+            fetch_akshare: akshare获取函数
+            fetch_tushare: tushare获取函数
+        
+        Returns:
+            dict: {数据源名称: 获取函数}
+        """
+        fetchers = {'akshare': fetch_akshare}
+        if self.tushare_available:
+            fetchers['tushare'] = fetch_tushare
+        return fetchers
     
     def _convert_to_ts_code(self, symbol):
         """
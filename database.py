@@ -1,9 +1,23 @@
 import sqlite3
+import sqlite_pool
+import blob_store
+import report_search
 import json
 from datetime import datetime
 import os
 
 class StockAnalysisDatabase:
+    # 列表页使用的摘要字段（不含大体积JSON字段）
+    SUMMARY_COLUMNS = ['id', 'symbol', 'stock_name', 'analysis_date', 'period', 'rating', 'created_at']
+    # 按需加载的JSON字段（压缩存储在 blob_store）
+    JSON_FIELDS = ['stock_info', 'agents_results', 'discussion_result', 'final_decision']
+    # 全文检索索引（股票代码/名称、分析师报告、团队讨论、最终决策）
+    REPORT_INDEX = report_search.ReportIndex(
+        'analysis_records',
+        ['symbol', 'stock_name', 'agents_results', 'discussion_result', 'final_decision'],
+        ['agents_results', 'discussion_result', 'final_decision']
+    )
+    
     def __init__(self, db_path="stock_analysis.db"):
         """初始化数据库连接"""
         self.db_path = db_path
@@ -15,7 +29,7 @@ class StockAnalysisDatabase:
     
     def init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 创建分析记录表
@@ -34,12 +48,62 @@ class StockAnalysisDatabase:
             )
         ''')
         
+        # 添加评级摘要列（旧库升级时从 final_decision 回填，列表页不再解析JSON）
+        try:
+            cursor.execute("ALTER TABLE analysis_records ADD COLUMN rating TEXT")
+            self._backfill_ratings(cursor)
+        except sqlite3.OperationalError:
+            pass
+        
+        # 列表按时间倒序分页、按股票代码筛选
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analysis_records_created
+            ON analysis_records(created_at DESC, id DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analysis_records_symbol
+            ON analysis_records(symbol, created_at DESC)
+        ''')
+        
         conn.commit()
+        
+        # JSON字段压缩存储（迁移旧库中的内联JSON）
+        blob_store.ensure_schema(conn, 'analysis_records', self.JSON_FIELDS)
+        self.REPORT_INDEX.ensure(conn)
         conn.close()
     
+    @staticmethod
+    def _extract_rating(final_decision):
+        """从最终决策中提取评级"""
+        if isinstance(final_decision, dict):
+            return final_decision.get('rating', '未知')
+        return '未知'
+    
+    def _backfill_ratings(self, cursor, batch_size=500):
+        """为旧记录回填评级列（分批读取，避免一次加载全部JSON）"""
+        last_id = 0
+        while True:
+            cursor.execute('''
+                SELECT id, final_decision FROM analysis_records
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            updates = []
+            for record_id, final_decision_json in rows:
+                try:
+                    final_decision = json.loads(final_decision_json) if final_decision_json else {}
+                except (TypeError, ValueError):
+                    final_decision = {}
+                updates.append((self._extract_rating(final_decision), record_id))
+            cursor.executemany('UPDATE analysis_records SET rating = ? WHERE id = ?', updates)
+            last_id = rows[-1][0]
+    
     def save_analysis(self, symbol, stock_name, period, stock_info, agents_results, discussion_result, final_decision):
         """保存分析记录到数据库"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 准备数据
@@ -51,95 +115,247 @@ class StockAnalysisDatabase:
         agents_results_json = json.dumps(agents_results, ensure_ascii=False, default=str)
         discussion_result_json = json.dumps(discussion_result, ensure_ascii=False, default=str)
         final_decision_json = json.dumps(final_decision, ensure_ascii=False, default=str)
+        rating = self._extract_rating(final_decision)
+        
+        # JSON字段压缩后写入 blob_store，与记录在同一事务中提交
+        values = []
+        for field_json in (stock_info_json, agents_results_json, discussion_result_json, final_decision_json):
+            values.extend(blob_store.store(cursor, field_json))
         
         cursor.execute('''
             INSERT INTO analysis_records 
-            (symbol, stock_name, analysis_date, period, stock_info, agents_results, discussion_result, final_decision, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (symbol, stock_name, analysis_date, period, stock_info_json, agents_results_json, discussion_result_json, final_decision_json, created_at))
+            (symbol, stock_name, analysis_date, period,
+             stock_info, stock_info_blob, agents_results, agents_results_blob,
+             discussion_result, discussion_result_blob, final_decision, final_decision_blob,
+             rating, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (symbol, stock_name, analysis_date, period, *values, rating, created_at))
+        record_id = cursor.lastrowid
+        
+        self.REPORT_INDEX.add(cursor, record_id, [symbol, stock_name, agents_results_json, discussion_result_json, final_decision_json])
         
         conn.commit()
         conn.close()
         
-        return cursor.lastrowid
+        return record_id
+    
+    @staticmethod
+    def _search_clause(search):
+        """构造股票代码/名称模糊搜索条件（不区分大小写）"""
+        if not search:
+            return '', []
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return "(symbol LIKE ? ESCAPE '\\' OR stock_name LIKE ? ESCAPE '\\')", [pattern, pattern]
+    
+    def _summary_from_row(self, row):
+        """摘要查询结果转字典"""
+        record = dict(zip(self.SUMMARY_COLUMNS, row))
+        record['rating'] = record['rating'] or '未知'
+        return record
     
     def get_all_records(self):
-        """获取所有分析记录"""
-        conn = sqlite3.connect(self.db_path)
+        """获取所有分析记录（仅摘要字段）"""
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT id, symbol, stock_name, analysis_date, period, final_decision, created_at
+        cursor.execute(f'''
+            SELECT {', '.join(self.SUMMARY_COLUMNS)}
             FROM analysis_records 
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
         ''')
         
         records = cursor.fetchall()
         conn.close()
         
-        result = []
-        for record in records:
-            # 解析final_decision获取评级
-            final_decision = json.loads(record[5]) if record[5] else {}
-            rating = final_decision.get('rating', '未知') if isinstance(final_decision, dict) else '未知'
+        return [self._summary_from_row(record) for record in records]
+    
+    def get_records_page(self, limit=20, cursor=None, symbol=None, search=None):
+        """
+        按时间倒序分页获取分析记录摘要（键集分页，翻页耗时与历史记录总数无关）
+        
+        Args:
+            limit: 每页条数
+            cursor: 上一页返回的 next_cursor，None 表示第一页
+            symbol: 按股票代码精确筛选
+            search: 按股票代码或名称模糊搜索
             
-            result.append({
-                'id': record[0],
-                'symbol': record[1],
-                'stock_name': record[2],
-                'analysis_date': record[3],
-                'period': record[4],
-                'rating': rating,
-                'created_at': record[6]
-            })
-        
-        return result
+        Returns:
+            dict: {'records': 摘要记录列表, 'next_cursor': 下一页游标（没有更多时为None）}
+        """
+        conditions = []
+        params = []
+        if cursor:
+            created_at, record_id = cursor
+            # created_at <= ? 使游标条件可走索引范围扫描
+            conditions.append('created_at <= ? AND (created_at < ? OR id < ?)')
+            params.extend([created_at, created_at, record_id])
+        if symbol:
+            conditions.append('symbol = ?')
+            params.append(symbol)
+        search_clause, search_params = self._search_clause(search)
+        if search_clause:
+            conditions.append(search_clause)
+            params.extend(search_params)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = sqlite_pool.connect(self.db_path)
+        db_cursor = conn.cursor()
+        
+        # 多取一条用于判断是否还有下一页
+        db_cursor.execute(f'''
+            SELECT {', '.join(self.SUMMARY_COLUMNS)}
+            FROM analysis_records
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1])
+        
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        records = [self._summary_from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (records[-1]['created_at'], records[-1]['id'])
+        
+        return {'records': records, 'next_cursor': next_cursor}
     
-    def get_record_count(self):
-        """获取记录总数"""
-        conn = sqlite3.connect(self.db_path)
+    def count_records(self, symbol=None, search=None):
+        """
+        统计符合条件的记录数
+        
+        Args:
+            symbol: 按股票代码精确筛选
+            search: 按股票代码或名称模糊搜索
+        """
+        conditions = []
+        params = []
+        if symbol:
+            conditions.append('symbol = ?')
+            params.append(symbol)
+        search_clause, search_params = self._search_clause(search)
+        if search_clause:
+            conditions.append(search_clause)
+            params.extend(search_params)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT COUNT(*) FROM analysis_records')
+        cursor.execute(f'SELECT COUNT(*) FROM analysis_records {where}', params)
         count = cursor.fetchone()[0]
         conn.close()
         
         return count
     
-    def get_record_by_id(self, record_id):
-        """根据ID获取详细分析记录"""
-        conn = sqlite3.connect(self.db_path)
+    def get_record_summary(self, record_id):
+        """根据ID获取记录摘要（不加载JSON字段）"""
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM analysis_records WHERE id = ?
+        cursor.execute(f'''
+            SELECT {', '.join(self.SUMMARY_COLUMNS)} FROM analysis_records WHERE id = ?
         ''', (record_id,))
         
-        record = cursor.fetchone()
+        row = cursor.fetchone()
         conn.close()
         
+        return self._summary_from_row(row) if row else None
+    
+    def get_record_fields(self, record_id, fields=None):
+        """
+        根据ID按需加载JSON字段
+        
+        Args:
+            record_id: 记录ID
+            fields: 字段列表（JSON_FIELDS 的子集），None 表示全部
+        
+        Returns:
+            dict: {字段名: 解析后的值}，记录不存在时返回None
+        """
+        fields = list(fields) if fields else list(self.JSON_FIELDS)
+        invalid = [field for field in fields if field not in self.JSON_FIELDS]
+        if invalid:
+            raise ValueError(f"不支持的字段: {invalid}")
+        
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        columns = fields + [blob_store.blob_column(field) for field in fields]
+        cursor.execute(f'''
+            SELECT {', '.join(columns)} FROM analysis_records WHERE id = ?
+        ''', (record_id,))
+        
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return None
+        
+        values = blob_store.inflate(cursor, [dict(zip(columns, row))], fields)[0]
+        conn.close()
+        
+        return {field: json.loads(value) if value else {} for field, value in values.items()}
+    
+    def search_records(self, query, limit=20, since=None, until=None):
+        """
+        全文检索分析记录（股票代码/名称、分析师报告、团队讨论、最终决策）
+        
+        Args:
+            query: 检索词，多个词用空格分隔
+            limit: 返回条数
+            since: 起始日期（含），格式 YYYY-MM-DD
+            until: 截止日期（含），格式 YYYY-MM-DD
+        
+        Returns:
+            list: 按相关度排序的摘要记录，额外包含 rank 和 snippet
+        """
+        conditions = []
+        params = []
+        if since:
+            conditions.append('substr(t.created_at, 1, 10) >= ?')
+            params.append(since)
+        if until:
+            conditions.append('substr(t.created_at, 1, 10) <= ?')
+            params.append(until)
+        
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        hits = self.REPORT_INDEX.search(cursor, query, self.SUMMARY_COLUMNS, limit, ' AND '.join(conditions), params)
+        conn.close()
+        
+        for hit in hits:
+            hit['rating'] = hit['rating'] or '未知'
+        return hits
+    
+    def get_record_count(self):
+        """获取记录总数"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM analysis_records')
+        count = cursor.fetchone()[0]
+        conn.close()
+        
+        return count
+    
+    def get_record_by_id(self, record_id):
+        """根据ID获取详细分析记录"""
+        record = self.get_record_summary(record_id)
         if not record:
             return None
         
         # 解析JSON数据
-        return {
-            'id': record[0],
-            'symbol': record[1],
-            'stock_name': record[2],
-            'analysis_date': record[3],
-            'period': record[4],
-            'stock_info': json.loads(record[5]) if record[5] else {},
-            'agents_results': json.loads(record[6]) if record[6] else {},
-            'discussion_result': json.loads(record[7]) if record[7] else {},
-            'final_decision': json.loads(record[8]) if record[8] else {},
-            'created_at': record[9]
-        }
+        record.update(self.get_record_fields(record_id) or {})
+        return record
     
     def delete_record(self, record_id):
         """删除指定记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
+        self.REPORT_INDEX.remove(cursor, 'id = ?', (record_id,))
+        blob_store.delete_refs(cursor, 'analysis_records', self.JSON_FIELDS, 'id = ?', (record_id,))
         cursor.execute('DELETE FROM analysis_records WHERE id = ?', (record_id,))
         conn.commit()
         conn.close()
@@ -148,7 +364,7 @@ class StockAnalysisDatabase:
     
     def get_record_count(self):
         """获取记录总数"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM analysis_records')
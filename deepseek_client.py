@@ -1,21 +1,41 @@
-import openai
 import json
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Any, Optional
 import config
+from llm_client import get_llm_client
+
+# 线程级的流式输出回调：在 stream_to() 作用域内，call_api 改为流式调用并实时回传已生成的文本
+_stream_local = threading.local()
+
+
+@contextmanager
+def stream_to(callback: Callable[[str], None]):
+    """
+    在当前线程内把 DeepSeekClient.call_api 的输出以流式方式回传
+    
+    Args:
+        callback: 回调函数，参数为截至当前已生成的完整文本
+    """
+    previous = getattr(_stream_local, 'callback', None)
+    _stream_local.callback = callback
+    try:
+        yield
+    finally:
+        _stream_local.callback = previous
+
 
 class DeepSeekClient:
     """DeepSeek API客户端"""
     
     def __init__(self, model="deepseek-chat"):
         self.model = model
-        self.client = openai.OpenAI(
-            api_key=config.DEEPSEEK_API_KEY,
-            base_url=config.DEEPSEEK_BASE_URL
-        )
-        
-    def call_api(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
-                 temperature: float = 0.7, max_tokens: int = 2000) -> str:
-        """调用DeepSeek API"""
+        # 进程内共享的客户端：连接池复用，并受全局并发上限约束
+        self.llm = get_llm_client(config.DEEPSEEK_API_KEY, config.DEEPSEEK_BASE_URL)
+    
+    def _prepare_request(self, model: Optional[str], max_tokens: int):
+        """确定实际使用的模型和 max_tokens"""
         # 使用实例的模型，如果没有传入则使用默认模型
         model_to_use = model or self.model
         
@@ -23,33 +43,133 @@ class DeepSeekClient:
         if "reasoner" in model_to_use.lower() and max_tokens <= 2000:
             max_tokens = 8000  # reasoner 模型需要更多 tokens 来输出推理过程
         
+        return model_to_use, max_tokens
+    
+    def _format_response(self, response) -> str:
+        """将模型响应整理为文本"""
+        # reasoner 模型可能包含 reasoning_content（推理过程）和 content（最终答案）
+        # 我们返回完整内容，包括推理过程（如果有的话）
+        result = ""
+        
+        # 检查是否有推理内容
+        if response.reasoning_content:
+            result += f"【推理过程】\n{response.reasoning_content}\n\n"
+        
+        # 添加最终内容
+        if response.content:
+            result += response.content
+        
+        return result if result else "API返回空响应"
+        
+    def call_api(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                 temperature: float = 0.7, max_tokens: int = 2000, use_cache: bool = True) -> str:
+        """调用DeepSeek API（相同模型、消息和温度的请求优先读取响应缓存）"""
+        model_to_use, max_tokens = self._prepare_request(model, max_tokens)
+        
+        cached = self._get_cached(model_to_use, messages, temperature, use_cache)
+        if cached is not None:
+            callback = getattr(_stream_local, 'callback', None)
+            if callback is not None:
+                callback(cached)
+            return cached
+        
+        callback = getattr(_stream_local, 'callback', None)
+        if callback is not None:
+            return self._call_api_streaming(messages, model_to_use, temperature, max_tokens,
+                                            use_cache, callback)
+        
         try:
-            response = self.client.chat.completions.create(
+            response = self.llm.complete(
+                messages,
                 model=model_to_use,
-                messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
-            
-            # 处理 reasoner 模型的响应
-            message = response.choices[0].message
-            
-            # reasoner 模型可能包含 reasoning_content（推理过程）和 content（最终答案）
-            # 我们返回完整内容，包括推理过程（如果有的话）
-            result = ""
-            
-            # 检查是否有推理内容
-            if hasattr(message, 'reasoning_content') and message.reasoning_content:
-                result += f"【推理过程】\n{message.reasoning_content}\n\n"
-            
-            # 添加最终内容
-            if message.content:
-                result += message.content
-            
-            return result if result else "API返回空响应"
+            result = self._format_response(response)
             
         except Exception as e:
             return f"API调用失败: {str(e)}"
+        
+        self._set_cached(model_to_use, messages, temperature, result, use_cache)
+        return result
+    
+    def call_api_stream(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                        temperature: float = 0.7, max_tokens: int = 2000) -> Iterator[str]:
+        """
+        流式调用DeepSeek API，逐块产出新增文本
+        
+        所有产出文本依次拼接后与 call_api 的返回格式一致（含【推理过程】前缀）
+        """
+        model_to_use, max_tokens = self._prepare_request(model, max_tokens)
+        in_reasoning = False
+        has_output = False
+        
+        for delta in self.llm.stream(messages, model=model_to_use,
+                                     temperature=temperature, max_tokens=max_tokens):
+            if delta.reasoning_content:
+                if not in_reasoning:
+                    in_reasoning = True
+                    yield "【推理过程】\n"
+                yield delta.reasoning_content
+                has_output = True
+            if delta.content:
+                if in_reasoning:
+                    in_reasoning = False
+                    yield "\n\n"
+                yield delta.content
+                has_output = True
+        
+        if not has_output:
+            yield "API返回空响应"
+    
+    def _call_api_streaming(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                            max_tokens: int, use_cache: bool, callback: Callable[[str], None]) -> str:
+        """流式调用并把累计文本交给回调（按时间间隔节流，结束时再回调一次），返回完整文本"""
+        result = ""
+        last_callback = 0.0
+        pending = False
+        try:
+            for piece in self.call_api_stream(messages, model, temperature, max_tokens):
+                result += piece
+                pending = True
+                now = time.monotonic()
+                if now - last_callback >= config.LLM_STREAM_CALLBACK_INTERVAL:
+                    callback(result)
+                    last_callback = now
+                    pending = False
+        except Exception as e:
+            return f"API调用失败: {str(e)}"
+        
+        if pending:
+            callback(result)
+        self._set_cached(model, messages, temperature, result, use_cache)
+        return result
+    
+    def _get_cached(self, model: str, messages: List[Dict[str, str]], temperature: float,
+                    use_cache: bool) -> Optional[str]:
+        """读取响应缓存，缓存不可用时视为未命中"""
+        if not (use_cache and config.LLM_CACHE_ENABLED):
+            return None
+        try:
+            from llm_cache import llm_cache
+            cached = llm_cache.get(model, messages, temperature)
+            if cached is not None:
+                print("♻️ 命中LLM响应缓存")
+            return cached
+        except Exception as e:
+            print(f"⚠️ 读取LLM响应缓存失败: {e}")
+            return None
+    
+    def _set_cached(self, model: str, messages: List[Dict[str, str]], temperature: float,
+                    result: str, use_cache: bool):
+        """写入响应缓存（空响应不缓存）"""
+        if not (use_cache and config.LLM_CACHE_ENABLED) or result == "API返回空响应":
+            return
+        try:
+            from llm_cache import llm_cache
+            llm_cache.set(model, messages, temperature, result)
+        except Exception as e:
+            print(f"⚠️ 写入LLM响应缓存失败: {e}")
     
     def technical_analysis(self, stock_info: Dict, stock_data: Any, indicators: Dict) -> str:
         """技术面分析"""
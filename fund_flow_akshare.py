@@ -9,7 +9,9 @@ import io
 import warnings
 from datetime import datetime, timedelta
 import akshare as ak
+from circuit_breaker import circuit_breakers
 from data_source_manager import data_source_manager
+from prompt_compactor import compact_table, get_token_budget
 
 warnings.filterwarnings('ignore')
 
@@ -31,6 +33,17 @@ def _setup_stdout_encoding():
 
 _setup_stdout_encoding()
 
+# 提示词中保留的资金流向列（akshare列名在前，tushare备用数据源列名在后，不存在的列自动跳过）
+FUND_FLOW_PROMPT_COLUMNS = [
+    '日期', '收盘价', '涨跌幅',
+    '主力净流入-净额', '主力净流入-净占比',
+    '超大单净流入-净额', '超大单净流入-净占比',
+    '大单净流入-净额', '大单净流入-净占比',
+    '中单净流入-净额', '中单净流入-净占比',
+    '小单净流入-净额', '小单净流入-净占比',
+    '净额', '超大单买入', '超大单卖出', '大单买入', '大单卖出',
+]
+
 
 class FundFlowAkshareDataFetcher:
     """资金流向数据获取类（使用akshare数据源）"""
@@ -112,7 +125,13 @@ class FundFlowAkshareDataFetcher:
             # 优先使用akshare的stock_individual_fund_flow接口
             print(f"   [Akshare] 正在获取资金流向 (市场: {market})...")
             
-            df = ak.stock_individual_fund_flow(stock=symbol, market=market)
+            try:
+                df = circuit_breakers.call('akshare', 'fund_flow', ak.stock_individual_fund_flow,
+                                           stock=symbol, market=market)
+            except Exception as e:
+                # 接口异常或熔断中时同样使用备用数据源
+                print(f"   [Akshare] ❌ 获取资金流向失败: {e}")
+                df = None
             
             if df is None or df.empty:
                 print(f"   [Akshare] 未找到资金流向数据，尝试备用数据源...")
@@ -128,7 +147,8 @@ class FundFlowAkshareDataFetcher:
                         start_date = (datetime.now() - timedelta(days=self.days * 2)).strftime('%Y%m%d')
                         
                         # 获取资金流向数据
-                        df = data_source_manager.tushare_api.moneyflow(
+                        df = circuit_breakers.call(
+                            'tushare', 'moneyflow', data_source_manager.tushare_api.moneyflow,
                             ts_code=ts_code,
                             start_date=start_date,
                             end_date=end_date
@@ -200,13 +220,20 @@ class FundFlowAkshareDataFetcher:
             traceback.print_exc()
             return None
     
-    def format_fund_flow_for_ai(self, data):
+    def format_fund_flow_for_ai(self, data, max_tokens=None):
         """
         将资金流向数据格式化为适合AI阅读的文本
+        
+        Args:
+            data: get_fund_flow_data 返回的数据
+            max_tokens: 明细表的token预算，默认读取 config.PROMPT_TOKEN_BUDGETS['fund_flow']
         """
         if not data or not data.get("data_success"):
             return "未能获取资金流向数据"
         
+        if max_tokens is None:
+            max_tokens = get_token_budget('fund_flow')
+        
         text_parts = []
         
         fund_flow_data = data.get("fund_flow_data")
@@ -217,44 +244,19 @@ class FundFlowAkshareDataFetcher:
 市场：{fund_flow_data.get('market', 'N/A').upper()}
 交易日数：最近{fund_flow_data.get('days', 0)}个交易日
 查询时间：{fund_flow_data.get('query_time', 'N/A')}
+金额单位：元（万/亿为换算后数值），占比单位：%
 
 ═══════════════════════════════════════
-[资金流向详细数据]
+[资金流向明细（最新交易日在前）]
 ═══════════════════════════════════════
 """)
             
-            # 显示每个交易日的数据
-            for idx, item in enumerate(fund_flow_data.get('data', []), 1):
-                date = item.get('日期', 'N/A')
-                close_price = item.get('收盘价', 'N/A')
-                change_pct = item.get('涨跌幅', 'N/A')
-                
-                text_parts.append(f"""
-第 {idx} 个交易日 ({date}):
-  基本信息:
-    - 收盘价: {close_price}
-    - 涨跌幅: {change_pct}%
-  
-  主力资金:
-    - 主力净流入-净额: {item.get('主力净流入-净额', 'N/A')}
-    - 主力净流入-净占比: {item.get('主力净流入-净占比', 'N/A')}%
-  
-  超大单:
-    - 超大单净流入-净额: {item.get('超大单净流入-净额', 'N/A')}
-    - 超大单净流入-净占比: {item.get('超大单净流入-净占比', 'N/A')}%
-  
-  大单:
-    - 大单净流入-净额: {item.get('大单净流入-净额', 'N/A')}
-    - 大单净流入-净占比: {item.get('大单净流入-净占比', 'N/A')}%
-  
-  中单:
-    - 中单净流入-净额: {item.get('中单净流入-净额', 'N/A')}
-    - 中单净流入-净占比: {item.get('中单净流入-净占比', 'N/A')}%
-  
-  小单:
-    - 小单净流入-净额: {item.get('小单净流入-净额', 'N/A')}
-    - 小单净流入-净占比: {item.get('小单净流入-净占比', 'N/A')}%
-""")
+            # 每个交易日一行，只保留与资金流向分析相关的列
+            text_parts.append(compact_table(
+                fund_flow_data.get('data', []),
+                columns=FUND_FLOW_PROMPT_COLUMNS,
+                max_tokens=max_tokens
+            ))
             
             # 添加统计汇总
             text_parts.append("""
@@ -0,0 +1,410 @@
+"""
+增量技术指标模块
+为每只股票保存指标的滚动状态（EMA累加器、窗口环形缓冲），新K线到来时O(1)更新，
+盯盘循环每个检查周期不必再对整段历史重新计算均线、MACD、RSI、KDJ、布林带和量能均线。
+
+指标口径与 SmartMonitorDataFetcher._calculate_all_indicators 完全一致：
+- 已收盘的K线提交（commit）进状态；最后一根K线视为盘中未完成K线，只基于状态临时求值（evaluate），不改变状态
+- 状态定期与批量计算结果校验，偏差超出容差时丢弃状态并以批量结果为准；
+  盯盘传入的是滚动窗口K线，批量MACD的EMA起点每天后移，与增量状态存在微小的起点误差，按价格量级放宽容差
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+import config
+
+MA_WINDOWS = (5, 20, 60)
+VOL_MA_WINDOWS = (5, 10)
+RSI_PERIODS = (6, 12, 24)
+MACD_PARAMS = (12, 26, 9)
+KDJ_PARAMS = (9, 3, 3)
+BOLL_PARAMS = (20, 2)
+
+# 计算指标所需的最少K线数（与批量计算一致）
+MIN_BARS = 60
+
+# 参与批量校验的数值字段
+NUMERIC_KEYS = ('ma5', 'ma20', 'ma60', 'macd_dif', 'macd_dea', 'macd',
+                'rsi6', 'rsi12', 'rsi24', 'kdj_k', 'kdj_d', 'kdj_j',
+                'boll_upper', 'boll_mid', 'boll_lower', 'vol_ma5', 'volume_ratio')
+
+# 依赖EMA起点的字段（滚动窗口下与批量结果存在起点误差）
+EMA_KEYS = ('macd_dif', 'macd_dea', 'macd')
+
+
+class _RollingWindow:
+    """定长窗口的滚动和/平方和（环形缓冲）"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._pushes = 0
+
+    def _sums_with(self, x: float):
+        """加入 x（并挤出最旧值）后的窗口和与平方和，窗口未满时返回None"""
+        if len(self.values) < self.size - 1:
+            return None
+        oldest = self.values[0] if len(self.values) == self.size else 0.0
+        return self.total - oldest + x, self.total_sq - oldest * oldest + x * x
+
+    def mean_with(self, x: float) -> float:
+        sums = self._sums_with(x)
+        return sums[0] / self.size if sums else math.nan
+
+    def std_with(self, x: float) -> float:
+        """样本标准差（ddof=1，与 pandas rolling().std() 一致）"""
+        sums = self._sums_with(x)
+        if not sums or self.size < 2:
+            return math.nan
+        total, total_sq = sums
+        var = (total_sq - total * total / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            oldest = self.values[0]
+            self.total -= oldest
+            self.total_sq -= oldest * oldest
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        # 定期重新求和，避免长时间累加的浮点误差
+        self._pushes += 1
+        if self._pushes % (self.size * 50) == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+
+class _Ema:
+    """指数移动平均（与 pandas ewm(adjust=False) 一致，含缺失值处理）"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value = None
+        # 上一个有效值之后连续缺失的个数
+        self.gap = 0
+
+    def with_(self, x: float) -> float:
+        if self.value is None:
+            return math.nan if math.isnan(x) else x
+        if math.isnan(x):
+            return self.value
+        # ignore_na=False：缺失期间旧值的权重继续衰减
+        old_weight = (1 - self.alpha) ** (self.gap + 1)
+        return (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha)
+
+    def push(self, x: float):
+        value = self.with_(x)
+        if self.value is not None and math.isnan(x):
+            self.gap += 1
+        elif not math.isnan(value):
+            self.gap = 0
+        self.value = None if math.isnan(value) else value
+
+
+class IndicatorState:
+    """单只股票的指标滚动状态"""
+
+    def __init__(self):
+        fast, slow, signal = MACD_PARAMS
+        kdj_n, kdj_m1, kdj_m2 = KDJ_PARAMS
+
+        self.count = 0
+        self.last_date = None
+        self.last_close = None
+
+        self.ma = {w: _RollingWindow(w) for w in MA_WINDOWS}
+        self.vol_ma = {w: _RollingWindow(w) for w in VOL_MA_WINDOWS}
+        self.boll = _RollingWindow(BOLL_PARAMS[0])
+
+        self.ema_fast = _Ema(2 / (fast + 1))
+        self.ema_slow = _Ema(2 / (slow + 1))
+        self.dea = _Ema(2 / (signal + 1))
+
+        self.gains = {p: _RollingWindow(p) for p in RSI_PERIODS}
+        self.losses = {p: _RollingWindow(p) for p in RSI_PERIODS}
+
+        self.highs = deque(maxlen=kdj_n)
+        self.lows = deque(maxlen=kdj_n)
+        self.kdj_k = _Ema(1 / kdj_m1)
+        self.kdj_d = _Ema(1 / kdj_m2)
+
+    def _step(self, date: str, high: float, low: float, close: float,
+              volume: float, commit: bool) -> Dict:
+        """计算加入一根K线后的指标值，commit=True 时同时更新状态"""
+        values = {f'ma{w}': window.mean_with(close) for w, window in self.ma.items()}
+        values.update({f'vol_ma{w}': window.mean_with(volume) for w, window in self.vol_ma.items()})
+
+        boll_mid = self.boll.mean_with(close)
+        boll_std = self.boll.std_with(close)
+        values['boll_mid'] = boll_mid
+        values['boll_upper'] = boll_mid + BOLL_PARAMS[1] * boll_std
+        values['boll_lower'] = boll_mid - BOLL_PARAMS[1] * boll_std
+
+        dif = self.ema_fast.with_(close) - self.ema_slow.with_(close)
+        dea = self.dea.with_(dif)
+        values['macd_dif'] = dif
+        values['macd_dea'] = dea
+        values['macd'] = (dif - dea) * 2
+
+        # 第一根K线没有涨跌，涨幅、跌幅均记为0
+        delta = close - self.last_close if self.last_close is not None else 0.0
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        for period in RSI_PERIODS:
+            avg_gain = self.gains[period].mean_with(gain)
+            avg_loss = self.losses[period].mean_with(loss)
+            if math.isnan(avg_gain) or (avg_gain == 0 and avg_loss == 0):
+                values[f'rsi{period}'] = math.nan
+            elif avg_loss == 0:
+                values[f'rsi{period}'] = 100.0
+            else:
+                values[f'rsi{period}'] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        kdj_n = KDJ_PARAMS[0]
+        if len(self.highs) >= kdj_n - 1:
+            window_highs = list(self.highs)[-(kdj_n - 1):] + [high]
+            window_lows = list(self.lows)[-(kdj_n - 1):] + [low]
+            high_n, low_n = max(window_highs), min(window_lows)
+            rsv = (close - low_n) / (high_n - low_n) * 100 if high_n != low_n else math.nan
+        else:
+            rsv = math.nan
+        k = self.kdj_k.with_(rsv)
+        d = self.kdj_d.with_(k)
+        values['kdj_k'] = k
+        values['kdj_d'] = d
+        values['kdj_j'] = 3 * k - 2 * d
+
+        if commit:
+            for w, window in self.ma.items():
+                window.push(close)
+            for w, window in self.vol_ma.items():
+                window.push(volume)
+            self.boll.push(close)
+            self.ema_fast.push(close)
+            self.ema_slow.push(close)
+            self.dea.push(dif)
+            for period in RSI_PERIODS:
+                self.gains[period].push(gain)
+                self.losses[period].push(loss)
+            self.highs.append(high)
+            self.lows.append(low)
+            self.kdj_k.push(rsv)
+            self.kdj_d.push(k)
+            self.count += 1
+            self.last_date = date
+            self.last_close = close
+
+        return values
+
+    def commit(self, date: str, high: float, low: float, close: float, volume: float):
+        """提交一根已收盘的K线"""
+        self._step(date, high, low, close, volume, commit=True)
+
+    def evaluate(self, high: float, low: float, close: float, volume: float) -> Optional[Dict]:
+        """
+        以一根未完成K线（盘中最新价）临时求值，不改变状态
+
+        Returns:
+            dict: 指标结果（格式同 build_indicator_result），K线不足时返回None
+        """
+        if self.count + 1 < MIN_BARS:
+            return None
+        values = self._step(None, high, low, close, volume, commit=False)
+        return build_indicator_result(close, volume, values)
+
+
+def build_indicator_result(close: float, volume: float, values: Dict) -> Dict:
+    """
+    把最新一根K线的指标值整理为盯盘使用的指标字典（含趋势与布林带位置判断）
+
+    Args:
+        close: 最新收盘价
+        volume: 最新成交量
+        values: 指标值（ma5/ma20/ma60、macd_*、rsi*、kdj_*、boll_*、vol_ma5）
+    """
+    ma5, ma20, ma60 = float(values['ma5']), float(values['ma20']), float(values['ma60'])
+    if close > ma5 > ma20 > ma60:
+        trend = 'up'
+    elif close < ma5 < ma20 < ma60:
+        trend = 'down'
+    else:
+        trend = 'sideways'
+
+    boll_upper = float(values['boll_upper'])
+    boll_mid = float(values['boll_mid'])
+    boll_lower = float(values['boll_lower'])
+    if close >= boll_upper:
+        boll_position = '上轨附近（超买）'
+    elif close <= boll_lower:
+        boll_position = '下轨附近（超卖）'
+    elif close > boll_mid:
+        boll_position = '中轨上方'
+    else:
+        boll_position = '中轨下方'
+
+    vol_ma5 = float(values['vol_ma5'])
+    return {
+        'ma5': ma5,
+        'ma20': ma20,
+        'ma60': ma60,
+        'trend': trend,
+        'macd_dif': float(values['macd_dif']),
+        'macd_dea': float(values['macd_dea']),
+        'macd': float(values['macd']),
+        'rsi6': float(values['rsi6']),
+        'rsi12': float(values['rsi12']),
+        'rsi24': float(values['rsi24']),
+        'kdj_k': float(values['kdj_k']),
+        'kdj_d': float(values['kdj_d']),
+        'kdj_j': float(values['kdj_j']),
+        'boll_upper': boll_upper,
+        'boll_mid': boll_mid,
+        'boll_lower': boll_lower,
+        'boll_position': boll_position,
+        'vol_ma5': vol_ma5,
+        'volume_ratio': float(volume) / vol_ma5 if vol_ma5 > 0 else 1.0
+    }
+
+
+def _bar_date(value) -> str:
+    """K线日期统一为 YYYYMMDD（兼容 datetime、'2024-01-02' 和 '20240102'）"""
+    return str(value).replace('-', '')[:8]
+
+
+def results_match(incremental: Dict, batch: Dict, tolerance: float = 1e-6,
+                  ema_tolerance: float = 1e-4) -> bool:
+    """
+    比较增量结果与批量结果的数值字段（相对/绝对容差）
+
+    EMA_KEYS 的取值常在0附近，相对误差没有意义，改用 ema_tolerance × 价格量级（boll_mid）作为绝对容差
+    """
+    price_scale = abs(batch.get('boll_mid') or 0.0)
+    for key in NUMERIC_KEYS:
+        a, b = incremental.get(key), batch.get(key)
+        if a is None or b is None:
+            return False
+        if math.isnan(a) and math.isnan(b):
+            continue
+        if key in EMA_KEYS:
+            rel_tol, abs_tol = ema_tolerance, max(ema_tolerance * price_scale, tolerance)
+        else:
+            rel_tol = abs_tol = tolerance
+        if not math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol):
+            return False
+    return True
+
+
+class IncrementalIndicatorEngine:
+    """按股票维护指标状态的增量计算引擎（线程安全）"""
+
+    def __init__(self, verify_interval: int = None, tolerance: float = 1e-6, ema_tolerance: float = 1e-4):
+        """
+        Args:
+            verify_interval: 每只股票每隔多少次增量更新与批量计算校验一次（0表示只在重建时校验），
+                             默认读取 config.INDICATOR_VERIFY_INTERVAL
+            tolerance: 校验容差
+            ema_tolerance: MACD等EMA字段的校验容差（相对价格量级）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.verify_interval = (config.INDICATOR_VERIFY_INTERVAL if verify_interval is None
+                                else verify_interval)
+        self.tolerance = tolerance
+        self.ema_tolerance = ema_tolerance
+        self._states = {}
+        self._updates = {}
+        self._lock = threading.Lock()
+        self.stats = {'incremental': 0, 'rebuilds': 0, 'mismatches': 0}
+
+    def update(self, key, df: pd.DataFrame,
+               batch_fn: Optional[Callable[[pd.DataFrame], Optional[Dict]]] = None) -> Optional[Dict]:
+        """
+        用最新K线更新状态并返回最新指标
+
+        已有状态时只提交上次之后新收盘的K线（通常0~1根），最后一根K线按未完成K线临时求值；
+        历史K线被改写（如复权价格变化、数据源切换）时自动重建状态。
+
+        Args:
+            key: 状态键（如 (股票代码, 周期)）
+            df: 按日期升序的K线（AKShare中文列名：日期/最高/最低/收盘/成交量）
+            batch_fn: 批量计算函数 batch_fn(df)，用于重建和定期校验，返回格式同 build_indicator_result
+
+        Returns:
+            dict: 指标结果，K线不足时返回None
+        """
+        if df is None or len(df) < MIN_BARS:
+            return None
+
+        dates = df['日期']
+        highs = df['最高'].to_numpy(dtype=float)
+        lows = df['最低'].to_numpy(dtype=float)
+        closes = df['收盘'].to_numpy(dtype=float)
+        volumes = df['成交量'].to_numpy(dtype=float)
+        n = len(df)
+
+        with self._lock:
+            state = self._states.get(key)
+            start = self._resume_index(state, dates, closes) if state else None
+            rebuilt = start is None
+            if rebuilt:
+                state = IndicatorState()
+                start = 0
+                self.stats['rebuilds'] += 1
+                self._updates[key] = 0
+            else:
+                self.stats['incremental'] += 1
+                self._updates[key] = self._updates.get(key, 0) + 1
+
+            for i in range(start, n - 1):
+                state.commit(_bar_date(dates.iloc[i]), highs[i], lows[i], closes[i], volumes[i])
+            self._states[key] = state
+            result = state.evaluate(highs[-1], lows[-1], closes[-1], volumes[-1])
+
+            verify = batch_fn is not None and (
+                rebuilt or (self.verify_interval > 0 and self._updates[key] % self.verify_interval == 0)
+            )
+
+        if verify:
+            batch = batch_fn(df)
+            if batch is not None and (result is None or
+                                      not results_match(result, batch, self.tolerance, self.ema_tolerance)):
+                self.stats['mismatches'] += 1
+                self.logger.warning(f"[{key}] 增量指标与批量计算不一致，已丢弃增量状态")
+                self.reset(key)
+                return batch
+        return result
+
+    def reset(self, key=None):
+        """丢弃指定（或全部）股票的指标状态"""
+        with self._lock:
+            if key is None:
+                self._states.clear()
+                self._updates.clear()
+            else:
+                self._states.pop(key, None)
+                self._updates.pop(key, None)
+
+    @staticmethod
+    def _resume_index(state: IndicatorState, dates, closes) -> Optional[int]:
+        """
+        在K线中定位状态最后提交的那根K线，返回需要继续提交的起始下标；
+        找不到或收盘价不一致（历史被改写）时返回None
+        """
+        n = len(dates)
+        if _bar_date(dates.iloc[n - 1]) <= state.last_date:
+            return None
+        i = n - 2
+        while i >= 0 and _bar_date(dates.iloc[i]) > state.last_date:
+            i -= 1
+        if i < 0 or _bar_date(dates.iloc[i]) != state.last_date:
+            return None
+        if not math.isclose(closes[i], state.last_close, rel_tol=1e-9, abs_tol=1e-9):
+            return None
+        return i + 1
@@ -0,0 +1,156 @@
+"""
+LLM响应缓存模块
+以 (model, messages, temperature) 的哈希为键，将补全结果持久化到SQLite。
+支持TTL过期、按条目数上限淘汰最久未访问的记录，并统计命中/未命中次数。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import config
+import sqlite_pool
+
+
+class LLMResponseCache:
+    """基于内容寻址的LLM响应缓存"""
+
+    def __init__(self, db_path=None, ttl=None, max_entries=None):
+        """
+        Args:
+            db_path: 数据库文件路径，默认读取 config.LLM_CACHE_PATH
+            ttl: 缓存有效期（秒），默认读取 config.LLM_CACHE_TTL
+            max_entries: 最大缓存条数，默认读取 config.LLM_CACHE_MAX_ENTRIES
+        """
+        self.db_path = db_path or config.LLM_CACHE_PATH
+        self.ttl = ttl if ttl is not None else config.LLM_CACHE_TTL
+        self.max_entries = max_entries or config.LLM_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        self.init_database()
+
+    def init_database(self):
+        """初始化数据库表结构"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model, messages, temperature):
+        """计算缓存键：(model, messages, temperature) 的SHA-256"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": round(float(temperature), 4)},
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, model, messages, temperature):
+        """
+        查询缓存
+
+        Returns:
+            str: 命中时返回缓存的响应文本，否则返回None
+        """
+        key = self.make_key(model, messages, temperature)
+        now = time.time()
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT response, created_at FROM llm_cache WHERE cache_key = ?', (key,))
+        row = cursor.fetchone()
+
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                cursor.execute('DELETE FROM llm_cache WHERE cache_key = ?', (key,))
+                conn.commit()
+            conn.close()
+            with self._lock:
+                self.misses += 1
+            return None
+
+        cursor.execute('''
+            UPDATE llm_cache SET last_access = ?, hit_count = hit_count + 1
+            WHERE cache_key = ?
+        ''', (now, key))
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self.hits += 1
+        return row[0]
+
+    def set(self, model, messages, temperature, response):
+        """写入缓存，并在超出容量时淘汰最久未访问的记录"""
+        key = self.make_key(model, messages, temperature)
+        now = time.time()
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO llm_cache (cache_key, model, response, created_at, last_access, hit_count)
+            VALUES (?, ?, ?, ?, ?, 0)
+        ''', (key, model, response, now, now))
+
+        cursor.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+        cursor.execute('SELECT COUNT(*) FROM llm_cache')
+        overflow = cursor.fetchone()[0] - self.max_entries
+        if overflow > 0:
+            cursor.execute('''
+                DELETE FROM llm_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache ORDER BY last_access ASC LIMIT ?
+                )
+            ''', (overflow,))
+        conn.commit()
+        conn.close()
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM llm_cache')
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """
+        获取缓存统计
+
+        Returns:
+            dict: hits/misses/hit_rate（本进程）以及 entries（当前缓存条数）
+        """
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM llm_cache')
+        entries = cursor.fetchone()[0]
+        conn.close()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": entries
+            }
+
+
+# 全局LLM响应缓存实例
+llm_cache = LLMResponseCache()
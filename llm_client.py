@@ -0,0 +1,210 @@
+"""
+共享LLM客户端模块
+进程内共享一个基于asyncio的OpenAI兼容客户端：连接池复用 + 全局并发限制。
+调用方通过 complete() 提交到后台事件循环执行并等待结果；
+stream() 以增量方式逐块返回内容，用于界面实时展示。
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Dict, List, Optional
+
+import openai
+
+import config
+
+
+class LLMResponse:
+    """一次补全调用的结果"""
+
+    def __init__(self, content: str = "", reasoning_content: str = ""):
+        self.content = content or ""
+        self.reasoning_content = reasoning_content or ""
+
+
+class AsyncLLMClient:
+    """异步LLM客户端 - 所有请求在同一个后台事件循环中执行，共享连接池和并发信号量"""
+
+    def __init__(self, api_key: str, base_url: str,
+                 max_concurrency: int = None, max_connections: int = None,
+                 timeout: float = None):
+        """
+        Args:
+            api_key: API密钥
+            base_url: API地址
+            max_concurrency: 同时在途的请求数上限，默认读取 config.LLM_MAX_CONCURRENCY
+            max_connections: 连接池大小，默认读取 config.LLM_MAX_CONNECTIONS
+            timeout: 单次请求超时（秒），默认读取 config.LLM_REQUEST_TIMEOUT
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+        self.max_connections = max_connections or config.LLM_MAX_CONNECTIONS
+        self.timeout = timeout or config.LLM_REQUEST_TIMEOUT
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    # ========== 事件循环管理 ==========
+
+    def _ensure_loop(self):
+        """懒启动后台事件循环线程，并在其中创建客户端和信号量"""
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._client = self._create_async_client()
+                ready.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_loop, name="llm-client-loop", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop = loop
+        return self._loop
+
+    def _create_async_client(self):
+        """创建带连接池限制的异步OpenAI客户端"""
+        kwargs = {
+            "api_key": self.api_key,
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+        }
+        # 新版openai支持自定义连接池大小；旧版使用默认连接池
+        try:
+            import httpx
+            if hasattr(openai, "DefaultAsyncHttpxClient"):
+                kwargs["http_client"] = openai.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+        except ImportError:
+            pass
+        return openai.AsyncOpenAI(**kwargs)
+
+    # ========== 调用接口 ==========
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str,
+                        temperature: float = 0.7, max_tokens: int = 2000,
+                        timeout: float = None) -> LLMResponse:
+        """
+        异步补全（必须在本客户端的事件循环中执行）
+        """
+        # 未指定时使用客户端的默认超时
+        options = {"timeout": timeout} if timeout else {}
+        async with self._semaphore:
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **options
+            )
+        message = response.choices[0].message
+        return LLMResponse(
+            content=message.content,
+            reasoning_content=getattr(message, 'reasoning_content', None)
+        )
+
+    def complete(self, messages: List[Dict[str, str]], model: str,
+                 temperature: float = 0.7, max_tokens: int = 2000,
+                 timeout: float = None) -> LLMResponse:
+        """
+        同步补全：提交到后台事件循环并阻塞等待结果
+
+        Args:
+            timeout: 本次请求超时（秒），默认使用客户端的超时设置
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self.acomplete(messages, model, temperature, max_tokens, timeout), loop
+        )
+        return future.result()
+
+    # ========== 流式接口 ==========
+
+    async def astream(self, messages: List[Dict[str, str]], model: str,
+                      temperature: float = 0.7, max_tokens: int = 2000):
+        """
+        异步流式补全（必须在本客户端的事件循环中执行），逐块产出增量 LLMResponse
+        """
+        async with self._semaphore:
+            stream = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                reasoning = getattr(delta, 'reasoning_content', None)
+                if delta.content or reasoning:
+                    yield LLMResponse(content=delta.content, reasoning_content=reasoning)
+
+    def stream(self, messages: List[Dict[str, str]], model: str,
+               temperature: float = 0.7, max_tokens: int = 2000):
+        """
+        同步流式补全：在后台事件循环中消费流，通过队列逐块交给调用线程
+
+        Yields:
+            LLMResponse: 增量内容（content / reasoning_content 为本块新增的文本）
+        """
+        loop = self._ensure_loop()
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for delta in self.astream(messages, model, temperature, max_tokens):
+                    chunks.put(delta)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 调用方提前结束迭代时取消后台请求，释放并发名额
+            if not future.done():
+                future.cancel()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> AsyncLLMClient:
+    """
+    获取进程内共享的LLM客户端（按 api_key + base_url 复用）
+    """
+    api_key = api_key or config.DEEPSEEK_API_KEY
+    base_url = base_url or config.DEEPSEEK_BASE_URL
+    key = (api_key, base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = AsyncLLMClient(api_key=api_key, base_url=base_url)
+        return _clients[key]
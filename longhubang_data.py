@@ -5,29 +5,41 @@
 
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import time
 import warnings
 
+import config
+from prompt_compactor import compact_table, estimate_tokens, get_token_budget
+from rate_limiter import TokenBucket
+from trading_calendar import trading_calendar
+
 warnings.filterwarnings('ignore')
 
+# StockAPI 请求限流（进程内所有获取器和线程共享同一配额）
+stockapi_rate_limiter = TokenBucket(config.STOCKAPI_RATE_LIMIT)
+
 
 class LonghubangDataFetcher:
     """龙虎榜数据获取类"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, database=None):
         """
         初始化数据获取器
         
         Args:
             api_key: StockAPI的API密钥（可选，普通请求每日免费1000次）
+            database: LonghubangDatabase实例（可选），提供时按日期范围获取会跳过库中已有的日期
         """
         print("[智瞰龙虎] 龙虎榜数据获取器初始化...")
         self.base_url = "https://www.stockapi.com.cn/v1"
         self.api_key = api_key
+        self.database = database
         self.max_retries = 3  # 最大重试次数
         self.retry_delay = 2  # 重试延迟（秒）
-        self.request_delay = 0.025  # 请求间隔（秒），40次/秒 = 0.025秒/次
+        self.rate_limiter = stockapi_rate_limiter  # 40次/秒，多线程共享
+        self.max_workers = config.LONGHUBANG_FETCH_WORKERS  # 按日期并发请求的线程数
     
     def _safe_request(self, url, params=None):
         """
@@ -42,11 +54,10 @@ class LonghubangDataFetcher:
         """
         for attempt in range(self.max_retries):
             try:
+                # 令牌桶限流，遵守40次/秒的限制
+                self.rate_limiter.acquire()
                 response = requests.get(url, params=params, timeout=10)
                 
-                # 添加请求延迟，遵守40次/秒的限制
-                time.sleep(self.request_delay)
-                
                 if response.status_code == 200:
                     data = response.json()
                     if data.get('code') == 20000:
@@ -104,27 +115,97 @@ class LonghubangDataFetcher:
         """
         print(f"[智瞰龙虎] 获取 {start_date} 至 {end_date} 的龙虎榜数据...")
         
-        all_data = []
-        
-        # 转换日期
-        current_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        while current_date <= end_date_obj:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            # 跳过周末
-            if current_date.weekday() < 5:  # 0-4表示周一到周五
-                result = self.get_longhubang_data(date_str)
-                if result and result.get('data'):
-                    all_data.extend(result['data'])
-            
-            # 下一天
-            current_date += timedelta(days=1)
+        dates = self.get_trading_dates(start_date, end_date)
+        if self.database is not None:
+            self.sync_dates(dates)
+            all_data = self.database.get_records_by_dates(dates)
+        else:
+            all_data = [record for data in self.fetch_dates(dates).values() for record in data]
         
         print(f"[智瞰龙虎] ✓ 共获取 {len(all_data)} 条记录")
         return all_data
     
+    def get_trading_dates(self, start_date, end_date):
+        """
+        获取日期范围内的交易日（按交易日历跳过周末和节假日）
+        
+        Args:
+            start_date: 开始日期，格式为 YYYY-MM-DD
+            end_date: 结束日期，格式为 YYYY-MM-DD
+        
+        Returns:
+            list: 日期列表（升序）
+        """
+        return trading_calendar.trading_dates(start_date, end_date)
+    
+    def fetch_dates(self, dates):
+        """
+        逐日获取指定日期的龙虎榜数据（增量模式只请求本地缺失的日期）
+        
+        Args:
+            dates: 日期列表，格式为 YYYY-MM-DD
+        
+        Returns:
+            dict: {日期: 龙虎榜数据列表}，接口正常返回但无数据的日期为空列表，请求失败的日期不包含在内
+        """
+        if not dates:
+            return {}
+        
+        def fetch(date):
+            result = self._safe_request(f"{self.base_url}/youzi/all", {'date': date})
+            if result is None:
+                return None
+            data = result.get('data') or []
+            for record in data:
+                # 保证每条记录带日期，按日期入库和汇总
+                if not (record.get('rq') or record.get('日期')):
+                    record['rq'] = date
+            return data
+        
+        start = time.time()
+        # 并发请求，速率由共享的令牌桶限制
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(dates))) as executor:
+            fetched = list(executor.map(fetch, dates))
+        
+        results = {date: data for date, data in zip(dates, fetched) if data is not None}
+        failed = len(dates) - len(results)
+        print(f"[智瞰龙虎] 请求 {len(dates)} 天，成功 {len(results)} 天"
+              f"{f'，失败 {failed} 天' if failed else ''}，"
+              f"共 {sum(len(data) for data in results.values())} 条记录，耗时 {time.time() - start:.1f} 秒")
+        return results
+    
+    def sync_dates(self, dates):
+        """
+        把指定日期中本地数据库缺失的龙虎榜数据从接口同步入库（需要提供database）
+        
+        每次请求都写入请求日志（含请求时间）。只有在该日期之后请求过的日期视为已完整入库、不再请求；
+        当天请求的数据可能尚未发布完整，之后会重新获取一次（未记录请求日志的日期同样重新获取）。
+        
+        Args:
+            dates: 日期列表，格式为 YYYY-MM-DD
+        
+        Returns:
+            dict: 本次请求成功的日期 {日期: 记录数}
+        """
+        if not dates:
+            return {}
+        
+        first, last = min(dates), max(dates)
+        logged = self.database.get_fetched_dates(first, last)
+        # 请求时间晚于该日期当天，说明龙虎榜已发布完整
+        complete = {d for d, log in logged.items() if (log['fetched_at'] or '')[:10] > d}
+        missing = [d for d in dates if d not in complete]
+        print(f"[智瞰龙虎] 共 {len(dates)} 个交易日，本地已有 {len(dates) - len(missing)} 天，需请求 {len(missing)} 天")
+        
+        fetched = self.fetch_dates(missing)
+        new_records = [record for data in fetched.values() for record in data]
+        if new_records:
+            self.database.save_longhubang_data(new_records)
+        # 当天的请求同样记录，次日起按请求时间判断需要重新获取
+        self.database.log_fetched_dates({d: len(data) for d, data in fetched.items()})
+        
+        return {d: len(data) for d, data in fetched.items()}
+    
     def get_recent_days_data(self, days=5):
         """
         获取最近N个交易日的龙虎榜数据
@@ -135,13 +216,13 @@ class LonghubangDataFetcher:
         Returns:
             list: 龙虎榜数据列表
         """
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days * 2)  # 乘以2以确保包含足够的交易日
+        # 多取一个交易日：当天数据尚未发布时仍能凑足N个有数据的交易日
+        dates = trading_calendar.recent_trading_dates(days + 1)
+        data_list = self.get_longhubang_data_range(dates[0], dates[-1])
         
-        return self.get_longhubang_data_range(
-            start_date.strftime('%Y-%m-%d'),
-            end_date.strftime('%Y-%m-%d')
-        )
+        data_dates = sorted({record.get('rq') or record.get('日期') for record in data_list} - {None, ''})
+        keep = set(data_dates[-days:])
+        return [record for record in data_list if (record.get('rq') or record.get('日期')) in keep]
     
     def parse_to_dataframe(self, data_list):
         """
@@ -235,13 +316,15 @@ class LonghubangDataFetcher:
         
         return summary
     
-    def format_data_for_ai(self, data_list, summary=None):
+    def format_data_for_ai(self, data_list, summary=None, max_tokens=None):
         """
         将龙虎榜数据格式化为适合AI分析的文本格式
         
         Args:
             data_list: 龙虎榜数据列表
             summary: 统计摘要（可选）
+            max_tokens: 整体token预算，默认读取 config.PROMPT_TOKEN_BUDGETS['longhubang']；
+                统计部分之外的剩余预算用于详细交易记录
             
         Returns:
             str: 格式化的文本
@@ -288,17 +371,18 @@ class LonghubangDataFetcher:
             for idx, (concept, count) in enumerate(list(summary['hot_concepts'].items())[:20], 1):
                 text_parts.append(f"{idx}. {concept}: {count} 次")
         
-        # 详细交易记录（前50条）
+        # 详细交易记录（按净流入排序，最多50条，受剩余token预算限制；预算用尽时仍保留前10条）
+        if max_tokens is None:
+            max_tokens = get_token_budget('longhubang')
         text_parts.append("\n【详细交易记录 TOP50】")
-        for idx, row in df.head(50).iterrows():
-            text_parts.append(
-                f"{row.get('游资名称', 'N/A')} | "
-                f"{row.get('股票名称', 'N/A')}({row.get('股票代码', 'N/A')}) | "
-                f"买入:{row.get('买入金额', 0):,.0f} "
-                f"卖出:{row.get('卖出金额', 0):,.0f} "
-                f"净流入:{row.get('净流入金额', 0):,.0f} | "
-                f"日期:{row.get('日期', 'N/A')}"
-            )
+        remaining = max_tokens - estimate_tokens("\n".join(text_parts))
+        text_parts.append(compact_table(
+            df,
+            columns=['游资名称', '股票名称', '股票代码', '买入金额', '卖出金额', '净流入金额', '日期'],
+            max_tokens=max(remaining, 0),
+            max_rows=50,
+            min_rows=10
+        ))
         
         return "\n".join(text_parts)
 
@@ -4,6 +4,9 @@
 """
 
 import sqlite3
+import sqlite_pool
+import blob_store
+import report_search
 from datetime import datetime
 import json
 import pandas as pd
@@ -13,6 +16,19 @@ import logging
 class LonghubangDatabase:
     """龙虎榜数据库管理类"""
     
+    # 每日评分汇总的列（与 LonghubangScoring.aggregate_records 的结果一致）
+    SCORE_PARTIAL_COLUMNS = [
+        'code', 'name', 'seat_count', 'buyers', 'top_buyers', 'famous_buyers',
+        'top_seats', 'inst_seats', 'youzi_seats', 'inst_records', 'hot_concepts',
+        'total_buy', 'total_sell', 'total_net'
+    ]
+    
+    # 分析报告列表的摘要列（不含报告正文）
+    REPORT_SUMMARY_COLUMNS = ['id', 'analysis_date', 'data_date_range', 'recommended_stocks', 'summary', 'created_at']
+    
+    # 分析报告全文检索索引（摘要 + 报告正文）
+    REPORT_INDEX = report_search.ReportIndex('longhubang_analysis', ['summary', 'analysis_content'], ['analysis_content'])
+    
     def __init__(self, db_path='longhubang.db'):
         """
         初始化数据库
@@ -29,7 +45,19 @@ class LonghubangDatabase:
     
     def get_connection(self):
         """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        return sqlite_pool.connect(self.db_path)
+    
+    def get_bulk_connection(self):
+        """
+        获取批量写入用的独立数据库连接（降低同步级别、临时数据放内存、加大页缓存）
+        
+        不使用缓存连接，这些设置随连接关闭失效，不影响之后的普通查询
+        """
+        conn = sqlite_pool.connect_dedicated(self.db_path)
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA cache_size = -65536')  # 64MB
+        return conn
     
     def init_database(self):
         """初始化数据库表"""
@@ -102,7 +130,86 @@ class LonghubangDatabase:
         )
         ''')
         
+        # 每日评分汇总表（每只股票每天一行，各列可跨日相加，用于滚动N日评分排名）
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_score_partials (
+            date TEXT NOT NULL,
+            stock_code TEXT NOT NULL,
+            stock_name TEXT,
+            seat_count INTEGER,
+            buyers INTEGER,
+            top_buyers INTEGER,
+            famous_buyers INTEGER,
+            top_seats INTEGER,
+            inst_seats INTEGER,
+            youzi_seats INTEGER,
+            inst_records INTEGER,
+            hot_concepts INTEGER,
+            total_buy REAL,
+            total_sell REAL,
+            total_net REAL,
+            PRIMARY KEY(date, stock_code)
+        )
+        ''')
+        
+        # 数据获取日志（记录已向接口请求过的日期，无数据的非交易日不再重复请求）
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_fetch_log (
+            date TEXT PRIMARY KEY,
+            record_count INTEGER,
+            fetched_at TEXT
+        )
+        ''')
+        
+        # 每日汇总表（入库时按日期增量刷新，排行和统计按日期范围累加，不再扫描原始记录）
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_daily_youzi (
+            date TEXT NOT NULL,
+            youzi_name TEXT,
+            trade_count INTEGER,
+            total_buy REAL,
+            total_sell REAL,
+            total_net REAL,
+            PRIMARY KEY(date, youzi_name)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_daily_stock (
+            date TEXT NOT NULL,
+            stock_code TEXT NOT NULL,
+            stock_name TEXT,
+            trade_count INTEGER,
+            total_buy REAL,
+            total_sell REAL,
+            total_net REAL,
+            PRIMARY KEY(date, stock_code)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_daily_concept (
+            date TEXT NOT NULL,
+            concept TEXT NOT NULL,
+            stock_count INTEGER,
+            record_count INTEGER,
+            total_net REAL,
+            PRIMARY KEY(date, concept)
+        )
+        ''')
+        
         conn.commit()
+        
+        # 旧库首次升级时从原始记录生成每日汇总
+        cursor.execute('SELECT 1 FROM longhubang_daily_stock LIMIT 1')
+        if cursor.fetchone() is None:
+            cursor.execute('SELECT 1 FROM longhubang_records LIMIT 1')
+            if cursor.fetchone() is not None:
+                with conn:
+                    self._refresh_daily_aggregates(conn)
+                self.logger.info("[智瞰龙虎] 已从原始记录生成每日汇总表")
+        
+        # 分析报告正文压缩存储
+        blob_store.ensure_schema(conn, 'longhubang_analysis', ['analysis_content'])
+        self.REPORT_INDEX.ensure(conn)
         conn.close()
         
         self.logger.info("[智瞰龙虎] 数据库初始化完成")
@@ -117,43 +224,184 @@ class LonghubangDatabase:
         Returns:
             int: 成功保存的记录数
         """
-        if not data_list:
-            return 0
+        return self.bulk_ingest_records(data_list)['saved']
+    
+    @staticmethod
+    def _record_to_row(record):
+        """
+        将一条龙虎榜记录转换为 longhubang_records 的行（字段顺序同 INSERT 语句）
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        Raises:
+            ValueError: 缺少日期或股票代码、金额无法转换时
+        """
+        date = record.get('rq') or record.get('日期')
+        stock_code = record.get('gpdm') or record.get('股票代码')
+        if not date or not stock_code:
+            raise ValueError("缺少日期或股票代码")
+        try:
+            amounts = (
+                float(record.get('mrje') or record.get('买入金额') or 0),
+                float(record.get('mcje') or record.get('卖出金额') or 0),
+                float(record.get('jlrje') or record.get('净流入金额') or 0),
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"金额无法转换: {e}")
+        return (
+            date,
+            stock_code,
+            record.get('gpmc') or record.get('股票名称'),
+            record.get('yzmc') or record.get('游资名称'),
+            record.get('yyb') or record.get('营业部'),
+            record.get('sblx') or record.get('榜单类型'),
+            *amounts,
+            record.get('gl') or record.get('概念')
+        )
+    
+    def bulk_ingest_records(self, data_list, batch_size=5000):
+        """
+        批量写入龙虎榜记录：先把记录转换为行元组，再按批 executemany，全部批次在一个事务内提交
+        
+        Args:
+            data_list: 龙虎榜数据列表
+            batch_size: 每批写入的行数
         
-        saved_count = 0
+        Returns:
+            dict: saved（写入行数）、rejected（被拒绝的记录数）、errors（前几条拒绝原因）
+        """
+        stats = {'saved': 0, 'rejected': 0, 'errors': []}
+        if not data_list:
+            return stats
         
+        rows = []
         for record in data_list:
             try:
-                cursor.execute('''
-                INSERT OR REPLACE INTO longhubang_records 
-                (date, stock_code, stock_name, youzi_name, yingye_bu, list_type, 
-                 buy_amount, sell_amount, net_inflow, concepts)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record.get('rq') or record.get('日期'),
-                    record.get('gpdm') or record.get('股票代码'),
-                    record.get('gpmc') or record.get('股票名称'),
-                    record.get('yzmc') or record.get('游资名称'),
-                    record.get('yyb') or record.get('营业部'),
-                    record.get('sblx') or record.get('榜单类型'),
-                    float(record.get('mrje') or record.get('买入金额') or 0),
-                    float(record.get('mcje') or record.get('卖出金额') or 0),
-                    float(record.get('jlrje') or record.get('净流入金额') or 0),
-                    record.get('gl') or record.get('概念')
-                ))
-                saved_count += 1
-            except Exception as e:
-                self.logger.exception(f"保存记录失败: {e}", exc_info=True)
-                continue
+                rows.append(self._record_to_row(record))
+            except ValueError as e:
+                stats['rejected'] += 1
+                if len(stats['errors']) < 5:
+                    stats['errors'].append(f"{record.get('gpdm') or record.get('股票代码')}: {e}")
+        
+        sql = '''
+        INSERT OR REPLACE INTO longhubang_records 
+        (date, stock_code, stock_name, youzi_name, yingye_bu, list_type, 
+         buy_amount, sell_amount, net_inflow, concepts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
         
-        conn.commit()
-        conn.close()
+        conn = self.get_bulk_connection()
+        try:
+            with conn:
+                # sqlite3 不会在 SAVEPOINT 前自动开启事务，需显式 BEGIN，否则每次 RELEASE 都会单独提交
+                conn.execute('BEGIN')
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    conn.execute('SAVEPOINT ingest_batch')
+                    try:
+                        conn.executemany(sql, batch)
+                        conn.execute('RELEASE ingest_batch')
+                        stats['saved'] += len(batch)
+                    except sqlite3.Error:
+                        # 整批失败时撤销本批，再逐行写入找出被拒绝的行
+                        conn.execute('ROLLBACK TO ingest_batch')
+                        conn.execute('RELEASE ingest_batch')
+                        for row in batch:
+                            try:
+                                conn.execute(sql, row)
+                                stats['saved'] += 1
+                            except sqlite3.Error as e:
+                                stats['rejected'] += 1
+                                if len(stats['errors']) < 5:
+                                    stats['errors'].append(f"{row[1]}: {e}")
+                
+                # 与原始记录在同一事务中刷新涉及日期的每日汇总
+                if stats['saved']:
+                    self._refresh_daily_aggregates(conn, sorted({row[0] for row in rows}))
+        finally:
+            conn.close()
         
-        self.logger.info(f"[智瞰龙虎] 成功保存 {saved_count} 条龙虎榜记录")
-        return saved_count
+        rejected = f"，拒绝 {stats['rejected']} 条" if stats['rejected'] else ""
+        self.logger.info(f"[智瞰龙虎] 成功保存 {stats['saved']} 条龙虎榜记录{rejected}")
+        if stats['errors']:
+            self.logger.warning(f"[智瞰龙虎] 被拒绝的记录示例: {'; '.join(stats['errors'])}")
+        return stats
+    
+    def _refresh_daily_aggregates(self, conn, dates=None):
+        """
+        按日期重算每日汇总表（调用方负责事务）
+        
+        Args:
+            conn: 数据库连接
+            dates: 需要刷新的日期列表，None 表示全部重建
+        """
+        if dates is None:
+            batches = [None]
+        else:
+            dates = list(dates)
+            batches = [dates[i:i + 500] for i in range(0, len(dates), 500)]
+        
+        for batch in batches:
+            if batch is None:
+                where, params = '', []
+            else:
+                where, params = f"WHERE date IN ({', '.join('?' * len(batch))})", batch
+            
+            for table in ('longhubang_daily_youzi', 'longhubang_daily_stock', 'longhubang_daily_concept'):
+                conn.execute(f'DELETE FROM {table} {where}', params)
+            
+            conn.execute(f'''
+            INSERT INTO longhubang_daily_youzi
+            (date, youzi_name, trade_count, total_buy, total_sell, total_net)
+            SELECT date, youzi_name, COUNT(*), SUM(buy_amount), SUM(sell_amount), SUM(net_inflow)
+            FROM longhubang_records {where}
+            GROUP BY date, youzi_name
+            ''', params)
+            
+            conn.execute(f'''
+            INSERT INTO longhubang_daily_stock
+            (date, stock_code, stock_name, trade_count, total_buy, total_sell, total_net)
+            SELECT date, stock_code, MAX(stock_name), COUNT(*), SUM(buy_amount), SUM(sell_amount), SUM(net_inflow)
+            FROM longhubang_records {where}
+            GROUP BY date, stock_code
+            ''', params)
+            
+            # 概念字段为逗号分隔的字符串，拆分后按 (日期, 概念) 汇总
+            concept_stats = {}
+            cursor = conn.execute(f'SELECT date, stock_code, concepts, net_inflow FROM longhubang_records {where}', params)
+            for date, stock_code, concepts, net_inflow in cursor:
+                if not concepts:
+                    continue
+                for concept in {c.strip() for c in concepts.split(',') if c.strip()}:
+                    item = concept_stats.setdefault((date, concept), [set(), 0, 0.0])
+                    item[0].add(stock_code)
+                    item[1] += 1
+                    item[2] += net_inflow or 0
+            conn.executemany('''
+            INSERT INTO longhubang_daily_concept (date, concept, stock_count, record_count, total_net)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [(date, concept, len(codes), count, net) for (date, concept), (codes, count, net) in concept_stats.items()])
+    
+    def rebuild_daily_aggregates(self):
+        """从原始记录全量重建每日汇总表"""
+        conn = self.get_bulk_connection()
+        try:
+            with conn:
+                self._refresh_daily_aggregates(conn)
+        finally:
+            conn.close()
+        self.logger.info("[智瞰龙虎] 每日汇总表已重建")
+    
+    @staticmethod
+    def _date_filter(start_date=None, end_date=None, column='date'):
+        """日期范围条件"""
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append(f"{column} >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append(f"{column} <= ?")
+            params.append(end_date)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
     
     def get_longhubang_data(self, start_date=None, end_date=None, stock_code=None):
         """
@@ -191,31 +439,188 @@ class LonghubangDatabase:
         
         return df
     
-    def get_top_youzi(self, start_date=None, end_date=None, limit=20):
+    def get_record_dates(self, start_date=None, end_date=None):
         """
-        获取活跃游资排名
+        获取有龙虎榜记录的日期
         
         Args:
             start_date: 开始日期
             end_date: 结束日期
-            limit: 返回数量
-            
+        
         Returns:
-            pd.DataFrame: 游资排名
+            list: 日期列表（升序）
         """
         conn = self.get_connection()
+        cursor = conn.cursor()
         
-        query = '''
-        SELECT 
-            youzi_name,
-            COUNT(*) as trade_count,
-            SUM(buy_amount) as total_buy,
-            SUM(sell_amount) as total_sell,
-            SUM(net_inflow) as total_net_inflow
+        query = "SELECT DISTINCT date FROM longhubang_records WHERE date IS NOT NULL"
+        params = []
+        
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        
+        query += " ORDER BY date"
+        
+        cursor.execute(query, params)
+        dates = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        
+        return dates
+    
+    def get_records_by_dates(self, dates):
+        """
+        按日期获取龙虎榜原始记录（字段名与StockAPI返回一致，可直接用于统计和评分）
+        
+        Args:
+            dates: 日期列表
+        
+        Returns:
+            list: 龙虎榜数据列表（按日期升序、入库顺序排列）
+        """
+        if not dates:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ','.join('?' * len(dates))
+        cursor.execute(f'''
+        SELECT date, stock_code, stock_name, youzi_name, yingye_bu, list_type,
+               buy_amount, sell_amount, net_inflow, concepts
         FROM longhubang_records
-        WHERE 1=1
+        WHERE date IN ({placeholders})
+        ORDER BY date, id
+        ''', list(dates))
+        
+        keys = ['rq', 'gpdm', 'gpmc', 'yzmc', 'yyb', 'sblx', 'mrje', 'mcje', 'jlrje', 'gl']
+        records = [dict(zip(keys, row)) for row in cursor.fetchall()]
+        conn.close()
+        
+        return records
+    
+    def get_fetched_dates(self, start_date=None, end_date=None):
+        """
+        获取已向接口请求过的日期
+        
+        Returns:
+            dict: {日期: {'record_count': 记录数, 'fetched_at': 最近一次请求时间}}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = "SELECT date, record_count, fetched_at FROM longhubang_fetch_log WHERE 1=1"
+        params = []
+        
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        
+        cursor.execute(query, params)
+        fetched = {
+            date: {'record_count': record_count, 'fetched_at': fetched_at}
+            for date, record_count, fetched_at in cursor.fetchall()
+        }
+        conn.close()
+        
+        return fetched
+    
+    def log_fetched_dates(self, date_counts):
+        """
+        记录已向接口请求过的日期
+        
+        Args:
+            date_counts: {日期: 记录数}
+        """
+        if not date_counts:
+            return
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        fetched_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.executemany('''
+        INSERT OR REPLACE INTO longhubang_fetch_log (date, record_count, fetched_at)
+        VALUES (?, ?, ?)
+        ''', [(date, count, fetched_at) for date, count in date_counts.items()])
+        
+        conn.commit()
+        conn.close()
+    
+    def save_score_partials(self, date, partials):
+        """
+        保存某一天的评分汇总（覆盖该日已有数据）
+        
+        Args:
+            date: 日期
+            partials: LonghubangScoring.aggregate_records 的结果
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM longhubang_score_partials WHERE date = ?', (date,))
+        if partials is not None and not partials.empty:
+            columns = [c for c in self.SCORE_PARTIAL_COLUMNS if c not in ('code', 'name')]
+            # 转为Python原生类型后写入（numpy整数无法直接绑定）
+            values = partials[self.SCORE_PARTIAL_COLUMNS].astype(object)
+            rows = [(date, *row) for row in values.itertuples(index=False, name=None)]
+            cursor.executemany(f'''
+            INSERT OR REPLACE INTO longhubang_score_partials
+            (date, stock_code, stock_name, {', '.join(columns)})
+            VALUES ({', '.join('?' * (len(columns) + 3))})
+            ''', rows)
+        
+        conn.commit()
+        conn.close()
+    
+    def get_score_partials(self, dates):
+        """
+        获取指定日期的评分汇总
+        
+        Args:
+            dates: 日期列表
+        
+        Returns:
+            pd.DataFrame: 列同 LonghubangScoring.aggregate_records 的结果，另含 date 列，按日期升序排列
+        """
+        if not dates:
+            return pd.DataFrame(columns=['date'] + self.SCORE_PARTIAL_COLUMNS)
+        
+        conn = self.get_connection()
+        
+        columns = [c for c in self.SCORE_PARTIAL_COLUMNS if c not in ('code', 'name')]
+        placeholders = ','.join('?' * len(dates))
+        query = f'''
+        SELECT date, stock_code AS code, stock_name AS name, {', '.join(columns)}
+        FROM longhubang_score_partials
+        WHERE date IN ({placeholders})
+        ORDER BY date, rowid
         '''
         
+        df = pd.read_sql_query(query, conn, params=list(dates))
+        conn.close()
+        
+        return df
+    
+    def get_scored_dates(self, start_date=None, end_date=None):
+        """
+        获取已生成评分汇总的日期
+        
+        Returns:
+            set: 日期集合
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = "SELECT DISTINCT date FROM longhubang_score_partials WHERE 1=1"
         params = []
         
         if start_date:
@@ -226,7 +631,36 @@ class LonghubangDatabase:
             query += " AND date <= ?"
             params.append(end_date)
         
-        query += '''
+        cursor.execute(query, params)
+        dates = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        
+        return dates
+    
+    def get_top_youzi(self, start_date=None, end_date=None, limit=20):
+        """
+        获取活跃游资排名
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量
+            
+        Returns:
+            pd.DataFrame: 游资排名
+        """
+        conn = self.get_connection()
+        
+        where, params = self._date_filter(start_date, end_date)
+        query = f'''
+        SELECT 
+            youzi_name,
+            SUM(trade_count) as trade_count,
+            SUM(total_buy) as total_buy,
+            SUM(total_sell) as total_sell,
+            SUM(total_net) as total_net_inflow
+        FROM longhubang_daily_youzi
+        {where}
         GROUP BY youzi_name
         ORDER BY total_net_inflow DESC
         LIMIT ?
@@ -252,32 +686,69 @@ class LonghubangDatabase:
         """
         conn = self.get_connection()
         
-        query = '''
+        where, params = self._date_filter(start_date, end_date)
+        query = f'''
         SELECT 
             stock_code,
-            stock_name,
-            COUNT(DISTINCT youzi_name) as youzi_count,
-            SUM(buy_amount) as total_buy,
-            SUM(sell_amount) as total_sell,
-            SUM(net_inflow) as total_net_inflow,
-            GROUP_CONCAT(DISTINCT concepts) as all_concepts
-        FROM longhubang_records
-        WHERE 1=1
+            MAX(stock_name) as stock_name,
+            SUM(total_buy) as total_buy,
+            SUM(total_sell) as total_sell,
+            SUM(total_net) as total_net_inflow
+        FROM longhubang_daily_stock
+        {where}
+        GROUP BY stock_code
+        ORDER BY total_net_inflow DESC
+        LIMIT ?
         '''
+        df = pd.read_sql_query(query, conn, params=params + [limit])
+        
+        # 游资数（去重）和概念只需为上榜的前N只股票从原始记录中补充
+        if not df.empty:
+            codes = df['stock_code'].tolist()
+            code_filter = f"stock_code IN ({', '.join('?' * len(codes))})"
+            where = f"{where} AND {code_filter}" if where else f"WHERE {code_filter}"
+            details = pd.read_sql_query(f'''
+            SELECT 
+                stock_code,
+                COUNT(DISTINCT youzi_name) as youzi_count,
+                GROUP_CONCAT(DISTINCT concepts) as all_concepts
+            FROM longhubang_records
+            {where}
+            GROUP BY stock_code
+            ''', conn, params=params + codes)
+            df = df.merge(details, on='stock_code', how='left')
+        else:
+            df = df.assign(youzi_count=pd.Series(dtype='int64'), all_concepts=pd.Series(dtype='object'))
+        conn.close()
         
-        params = []
+        return df[['stock_code', 'stock_name', 'youzi_count', 'total_buy', 'total_sell',
+                   'total_net_inflow', 'all_concepts']]
+    
+    def get_top_concepts(self, start_date=None, end_date=None, limit=20):
+        """
+        获取热门概念排名
         
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量
         
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
+        Returns:
+            pd.DataFrame: 概念排名（上榜股票次数、席位记录数、总净流入）
+        """
+        conn = self.get_connection()
         
-        query += '''
-        GROUP BY stock_code, stock_name
-        ORDER BY total_net_inflow DESC
+        where, params = self._date_filter(start_date, end_date)
+        query = f'''
+        SELECT 
+            concept,
+            SUM(stock_count) as stock_count,
+            SUM(record_count) as record_count,
+            SUM(total_net) as total_net_inflow
+        FROM longhubang_daily_concept
+        {where}
+        GROUP BY concept
+        ORDER BY stock_count DESC, total_net_inflow DESC
         LIMIT ?
         '''
         params.append(limit)
@@ -308,20 +779,23 @@ class LonghubangDatabase:
         # 如果传入的是字典，转换为JSON字符串
         if isinstance(analysis_content, dict):
             analysis_content = json.dumps(analysis_content, ensure_ascii=False, indent=2)
+        content_inline, content_blob = blob_store.store(cursor, analysis_content)
         
         cursor.execute('''
         INSERT INTO longhubang_analysis 
-        (analysis_date, data_date_range, analysis_content, recommended_stocks, summary)
-        VALUES (?, ?, ?, ?, ?)
+        (analysis_date, data_date_range, analysis_content, analysis_content_blob, recommended_stocks, summary)
+        VALUES (?, ?, ?, ?, ?, ?)
         ''', (
             datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             data_date_range,
-            analysis_content,
+            content_inline,
+            content_blob,
             json.dumps(recommended_stocks, ensure_ascii=False),
             summary
         ))
         
         report_id = cursor.lastrowid
+        self.REPORT_INDEX.add(cursor, report_id, [summary, analysis_content])
         
         conn.commit()
         conn.close()
@@ -337,12 +811,13 @@ class LonghubangDatabase:
             limit: 返回数量
             
         Returns:
-            pd.DataFrame: 报告列表
+            pd.DataFrame: 报告列表（摘要字段，正文通过 get_analysis_report 获取）
         """
         conn = self.get_connection()
         
-        query = '''
-        SELECT * FROM longhubang_analysis
+        query = f'''
+        SELECT {', '.join(self.REPORT_SUMMARY_COLUMNS)}
+        FROM longhubang_analysis
         ORDER BY created_at DESC
         LIMIT ?
         '''
@@ -352,6 +827,36 @@ class LonghubangDatabase:
         
         return df
     
+    def search_analysis_reports(self, query, limit=20, since=None, until=None):
+        """
+        全文检索龙虎榜分析报告（摘要和报告正文）
+        
+        Args:
+            query: 检索词，多个词用空格分隔
+            limit: 返回条数
+            since: 起始日期（含），格式 YYYY-MM-DD
+            until: 截止日期（含），格式 YYYY-MM-DD
+        
+        Returns:
+            list: 按相关度排序的摘要记录，额外包含 rank 和 snippet
+        """
+        conditions = []
+        params = []
+        if since:
+            conditions.append('substr(t.created_at, 1, 10) >= ?')
+            params.append(since)
+        if until:
+            conditions.append('substr(t.created_at, 1, 10) <= ?')
+            params.append(until)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        hits = self.REPORT_INDEX.search(cursor, query, self.REPORT_SUMMARY_COLUMNS, limit, ' AND '.join(conditions), params)
+        conn.close()
+        
+        return hits
+    
     def get_analysis_report(self, report_id):
         """
         获取单个分析报告详情
@@ -372,10 +877,10 @@ class LonghubangDatabase:
         row = cursor.fetchone()
         # 在关闭连接之前获取列名，避免关闭后访问游标属性报错
         columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        report = blob_store.inflate(cursor, [dict(zip(columns, row))], ['analysis_content'])[0] if row else None
         conn.close()
         
         if row:
-            report = dict(zip(columns, row))
             
             # 解析JSON字段
             if report.get('recommended_stocks'):
@@ -417,7 +922,9 @@ class LonghubangDatabase:
             # 先删除相关的股票追踪记录
             cursor.execute('DELETE FROM stock_tracking WHERE analysis_id = ?', (report_id,))
             
-            # 删除分析报告
+            # 删除分析报告及其正文
+            self.REPORT_INDEX.remove(cursor, 'id = ?', (report_id,))
+            blob_store.delete_refs(cursor, 'longhubang_analysis', ['analysis_content'], 'id = ?', (report_id,))
             cursor.execute('DELETE FROM longhubang_analysis WHERE id = ?', (report_id,))
             
             deleted_count = cursor.rowcount
@@ -479,16 +986,16 @@ class LonghubangDatabase:
         
         stats = {}
         
-        # 总记录数
-        cursor.execute('SELECT COUNT(*) FROM longhubang_records')
+        # 总记录数（由每日汇总累加）
+        cursor.execute('SELECT COALESCE(SUM(trade_count), 0) FROM longhubang_daily_stock')
         stats['total_records'] = cursor.fetchone()[0]
         
         # 涉及股票数
-        cursor.execute('SELECT COUNT(DISTINCT stock_code) FROM longhubang_records')
+        cursor.execute('SELECT COUNT(DISTINCT stock_code) FROM longhubang_daily_stock')
         stats['total_stocks'] = cursor.fetchone()[0]
         
         # 涉及游资数
-        cursor.execute('SELECT COUNT(DISTINCT youzi_name) FROM longhubang_records')
+        cursor.execute('SELECT COUNT(DISTINCT youzi_name) FROM longhubang_daily_youzi')
         stats['total_youzi'] = cursor.fetchone()[0]
         
         # 分析报告数
@@ -496,7 +1003,7 @@ class LonghubangDatabase:
         stats['total_reports'] = cursor.fetchone()[0]
         
         # 日期范围
-        cursor.execute('SELECT MIN(date), MAX(date) FROM longhubang_records')
+        cursor.execute('SELECT MIN(date), MAX(date) FROM longhubang_daily_stock')
         date_range = cursor.fetchone()
         stats['date_range'] = {
             'start': date_range[0],
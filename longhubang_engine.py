@@ -3,12 +3,17 @@
 整合数据获取、AI分析、结果生成的核心引擎
 """
 
+import config
 from longhubang_data import LonghubangDataFetcher
 from longhubang_db import LonghubangDatabase
 from longhubang_agents import LonghubangAgents
 from longhubang_scoring import LonghubangScoring
-from typing import Dict, Any, List
+from trading_calendar import trading_calendar
+from deepseek_client import stream_to
+from typing import Callable, Dict, Any, List, Optional
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+import pandas as pd
 import time
 import logging
 
@@ -24,8 +29,8 @@ class LonghubangEngine:
             model: AI模型名称
             db_path: 数据库路径
         """
-        self.data_fetcher = LonghubangDataFetcher()
         self.database = LonghubangDatabase(db_path)
+        self.data_fetcher = LonghubangDataFetcher(database=self.database)
         self.agents = LonghubangAgents(model=model)
         self.scoring = LonghubangScoring()
         # 初始化日志
@@ -34,13 +39,25 @@ class LonghubangEngine:
             logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s %(name)s: %(message)s')
         self.logger.info("[智瞰龙虎] 分析引擎初始化完成")
     
-    def run_comprehensive_analysis(self, date=None, days=1) -> Dict[str, Any]:
+    @staticmethod
+    def _stream_scope(stream_callback, agent_key: str):
+        """为单个分析师开启流式输出（未提供回调时不做任何处理）"""
+        if stream_callback is None:
+            return nullcontext()
+        return stream_to(lambda text: stream_callback(agent_key, text))
+    
+    def run_comprehensive_analysis(self, date=None, days=1,
+                                   stream_callback: Optional[Callable[[str, str], None]] = None,
+                                   incremental: Optional[bool] = None) -> Dict[str, Any]:
         """
         运行完整的龙虎榜分析流程
         
         Args:
             date: 指定日期，格式 YYYY-MM-DD，默认为昨日
             days: 分析最近几天的数据，默认1天
+            stream_callback: 流式输出回调，参数为 (分析师key, 截至当前的报告文本)
+            incremental: 增量模式（只获取本地数据库缺失的日期，分析最近 days 个有数据的交易日，
+                评分排名由每日评分汇总合并），默认读取 config.LONGHUBANG_INCREMENTAL
             
         Returns:
             完整的分析结果
@@ -63,7 +80,14 @@ class LonghubangEngine:
             self.logger.info("[阶段1] 获取龙虎榜数据...")
             self.logger.info("-" * 60)
             
-            if date:
+            if incremental is None:
+                incremental = config.LONGHUBANG_INCREMENTAL
+            
+            sync_info = None
+            if incremental:
+                sync_info = self.sync_longhubang_data(date=date, days=days)
+                data_list = self.database.get_records_by_dates(sync_info['window_dates'])
+            elif date:
                 data_list = [self.data_fetcher.get_longhubang_data(date)]
                 data_list = data_list[0].get('data', []) if data_list[0] else []
             else:
@@ -79,8 +103,19 @@ class LonghubangEngine:
             # 阶段2: 保存数据到数据库
             self.logger.info("[阶段2] 保存数据到数据库...")
             self.logger.info("-" * 60)
-            saved_count = self.database.save_longhubang_data(data_list)
-            self.logger.info(f"保存 {saved_count} 条记录")
+            if incremental:
+                self.logger.info(
+                    f"增量模式：本次请求 {len(sync_info['fetched_dates'])} 天，"
+                    f"使用本地数据 {len(sync_info['cached_dates'])} 天"
+                )
+            else:
+                if date:
+                    saved_count = self.database.save_longhubang_data(data_list)
+                    self.logger.info(f"保存 {saved_count} 条记录")
+                else:
+                    # 按日期范围获取时已同步入库
+                    self.logger.info("数据已在获取时同步入库")
+                self.refresh_score_partials(self._get_dates(data_list))
             
             # 阶段3: 数据分析和统计
             self.logger.info("[阶段3] 数据分析和统计...")
@@ -94,12 +129,17 @@ class LonghubangEngine:
                 "total_youzi": summary.get('total_youzi', 0),
                 "summary": summary
             }
+            if sync_info:
+                results["data_info"]["incremental"] = sync_info
             self.logger.info("数据统计完成")
             
             # 阶段3.5: AI智能评分排名
             self.logger.info("[阶段3.5] AI智能评分排名...")
             self.logger.info("-" * 60)
-            scoring_df = self.scoring.score_all_stocks(data_list)
+            if incremental:
+                scoring_df = self.get_rolling_ranking(sync_info['window_dates'])
+            else:
+                scoring_df = self.scoring.score_all_stocks(data_list)
             # 转换为可序列化格式以避免UI/存储类型问题
             scoring_ranking_data: List[Dict[str, Any]] = []
             try:
@@ -121,28 +161,33 @@ class LonghubangEngine:
             
             # 1. 游资行为分析师
             self.logger.info("1/5 游资行为分析师...")
-            youzi_result = self.agents.youzi_behavior_analyst(formatted_data, summary)
+            with self._stream_scope(stream_callback, "youzi"):
+                youzi_result = self.agents.youzi_behavior_analyst(formatted_data, summary)
             agents_results["youzi"] = youzi_result
             
             # 2. 个股潜力分析师
             self.logger.info("2/5 个股潜力分析师...")
-            stock_result = self.agents.stock_potential_analyst(formatted_data, summary)
+            with self._stream_scope(stream_callback, "stock"):
+                stock_result = self.agents.stock_potential_analyst(formatted_data, summary)
             agents_results["stock"] = stock_result
             
             # 3. 题材追踪分析师
             self.logger.info("3/5 题材追踪分析师...")
-            theme_result = self.agents.theme_tracker_analyst(formatted_data, summary)
+            with self._stream_scope(stream_callback, "theme"):
+                theme_result = self.agents.theme_tracker_analyst(formatted_data, summary)
             agents_results["theme"] = theme_result
             
             # 4. 风险控制专家
             self.logger.info("4/5 风险控制专家...")
-            risk_result = self.agents.risk_control_specialist(formatted_data, summary)
+            with self._stream_scope(stream_callback, "risk"):
+                risk_result = self.agents.risk_control_specialist(formatted_data, summary)
             agents_results["risk"] = risk_result
             
             # 5. 首席策略师综合
             self.logger.info("5/5 首席策略师综合分析...")
             all_analyses = [youzi_result, stock_result, theme_result, risk_result]
-            chief_result = self.agents.chief_strategist(all_analyses)
+            with self._stream_scope(stream_callback, "chief"):
+                chief_result = self.agents.chief_strategist(all_analyses)
             agents_results["chief"] = chief_result
             
             results["agents_analysis"] = agents_results
@@ -206,6 +251,72 @@ class LonghubangEngine:
 
         return results
     
+    def sync_longhubang_data(self, date=None, days=1) -> Dict[str, List[str]]:
+        """
+        增量同步龙虎榜数据：只向接口请求本地数据库缺失的日期，并补齐每日评分汇总
+        
+        候选日期为指定日期，或按交易日历取最近 days+1 个交易日（当天数据尚未发布时仍能凑足 days 天）。
+        已有记录的日期、以及已确认无数据的历史日期不再请求，见 LonghubangDataFetcher.sync_dates。
+        
+        Args:
+            date: 指定日期，格式 YYYY-MM-DD
+            days: 最近几个交易日
+        
+        Returns:
+            dict: window_dates（参与分析的日期，最多 days 个有数据的日期）、
+                  fetched_dates（本次请求接口的日期）、cached_dates（直接使用本地数据的日期）
+        """
+        candidates = [date] if date else trading_calendar.recent_trading_dates(max(1, days) + 1)
+        first, last = candidates[0], candidates[-1]
+        
+        fetched_now = self.data_fetcher.sync_dates(candidates)
+        
+        # 补齐评分汇总：本次新获取的日期，以及全量模式入库但尚未汇总的日期
+        record_dates = set(self.database.get_record_dates(first, last)) & set(candidates)
+        scored_dates = self.database.get_scored_dates(first, last)
+        self.refresh_score_partials(sorted(
+            d for d in record_dates if fetched_now.get(d) or d not in scored_dates
+        ))
+        
+        window_dates = sorted(record_dates)[-max(1, days):] if not date else sorted(record_dates)
+        return {
+            'window_dates': window_dates,
+            'fetched_dates': sorted(fetched_now),
+            'cached_dates': [d for d in window_dates if d not in fetched_now],
+        }
+    
+    def refresh_score_partials(self, dates: List[str]):
+        """
+        由数据库中的原始记录重新生成指定日期的每日评分汇总
+        
+        Args:
+            dates: 日期列表
+        """
+        for date in dates:
+            records = self.database.get_records_by_dates([date])
+            partials = self.scoring.aggregate_records(self.scoring.normalize_records(records))
+            self.database.save_score_partials(date, partials)
+        if dates:
+            self.logger.info(f"[智瞰龙虎] 已更新 {len(dates)} 天的评分汇总")
+    
+    def get_rolling_ranking(self, dates: List[str]) -> pd.DataFrame:
+        """
+        由每日评分汇总合并出多日评分排名（不访问接口，不重新读取原始记录）
+        
+        Args:
+            dates: 参与排名的日期列表
+        
+        Returns:
+            评分排名DataFrame（格式同 LonghubangScoring.score_all_stocks）
+        """
+        partials = self.database.get_score_partials(dates)
+        return self.scoring.rank_aggregates(self.scoring.combine_aggregates(partials))
+    
+    @staticmethod
+    def _get_dates(data_list: List[Dict]) -> List[str]:
+        """数据中出现的日期（升序）"""
+        return sorted({record.get('rq') or record.get('日期') for record in data_list} - {None, ''})
+    
     def _extract_recommended_stocks(self, chief_analysis: str, stock_analysis: str, summary: Dict) -> List[Dict]:
         """
         从AI分析中提取推荐股票
@@ -316,6 +427,21 @@ class LonghubangEngine:
         """
         return self.database.get_analysis_reports(limit)
     
+    def search_reports(self, query, limit=20, since=None, until=None):
+        """
+        全文检索历史报告
+        
+        Args:
+            query: 检索词，多个词用空格分隔
+            limit: 返回数量
+            since: 起始日期（含），格式 YYYY-MM-DD
+            until: 截止日期（含），格式 YYYY-MM-DD
+        
+        Returns:
+            按相关度排序的报告摘要列表（含命中片段 snippet）
+        """
+        return self.database.search_analysis_reports(query, limit, since, until)
+    
     def get_report_detail(self, report_id):
         """
         获取报告详情
@@ -364,6 +490,20 @@ class LonghubangEngine:
             股票排名
         """
         return self.database.get_top_stocks(start_date, end_date, limit)
+    
+    def get_top_concepts(self, start_date=None, end_date=None, limit=20):
+        """
+        获取热门概念排名
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量
+        
+        Returns:
+            概念排名
+        """
+        return self.database.get_top_concepts(start_date, end_date, limit)
 
 
 # 测试函数
@@ -3,14 +3,86 @@
 对龙虎榜上榜股票进行综合评分排名
 """
 
-import pandas as pd
+import re
+from functools import lru_cache
 from typing import Dict, List
-from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+def _to_amount(value) -> float:
+    """金额转换为浮点数（空值或无法转换时为0，原始NaN保留，与逐条评分的规则一致）"""
+    try:
+        return float(value) if value else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _to_amounts(values: List) -> np.ndarray:
+    """批量转换金额"""
+    return np.array([_to_amount(v) for v in values], dtype=float)
+
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keywords: tuple) -> str:
+    """关键词列表 → 子串匹配正则（任一关键词出现即匹配）"""
+    return '|'.join(re.escape(k) for k in keywords)
+
+
+def _unique_contains(codes: np.ndarray, uniques, pattern: str) -> np.ndarray:
+    """
+    对 pd.factorize 的结果做关键词匹配：只匹配去重后的文本，再按编码映射回每一行
+    
+    席位、营业部、概念名称大量重复，匹配次数从行数降为不同取值的个数
+    """
+    matched = pd.Series(uniques, dtype=object).str.contains(pattern, regex=True).to_numpy(dtype=bool)
+    # 末尾追加 False 供缺失值（编码为-1）取用
+    return np.append(matched, False)[codes]
+
+
+def _sequential_group_sum(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    分组求和，组内按记录顺序逐条累加
+    
+    np.add.at 不做缓冲、按下标顺序执行，浮点结果与逐条 total += value 完全相同（含NaN传播）
+    """
+    totals = np.zeros(n_groups, dtype=float)
+    np.add.at(totals, group, values)
+    return totals
+
+
+def _py_min(a, b):
+    """逐元素模拟 Python 内置 min(a, b)：仅当 b < a 时取 b（NaN参与时与内置函数结果一致）"""
+    return np.where(b < a, b, a)
+
+
+def _py_max(a, b):
+    """逐元素模拟 Python 内置 max(a, b)：仅当 b > a 时取 b"""
+    return np.where(b > a, b, a)
+
+
+def _concept_scores(hot_counts: np.ndarray) -> np.ndarray:
+    """热门概念得分：每个热门概念累加0.3分，最高3分（查表复现逐次累加的浮点结果）"""
+    if len(hot_counts) == 0:
+        return np.zeros(0)
+    table = [0]
+    for _ in range(int(hot_counts.max())):
+        table.append(table[-1] + 0.3)
+    table = np.array([min(v, 3.0) for v in table], dtype=float)
+    return table[hot_counts]
 
 
 class LonghubangScoring:
     """龙虎榜股票智能评分系统"""
     
+    # aggregate_records 结果的列（除 code/name 外均可跨日相加）
+    AGGREGATE_COLUMNS = [
+        'code', 'name', 'seat_count', 'buyers', 'top_buyers', 'famous_buyers',
+        'top_seats', 'inst_seats', 'youzi_seats', 'inst_records', 'hot_concepts',
+        'total_buy', 'total_sell', 'total_net'
+    ]
+    
     def __init__(self):
         """初始化评分系统"""
         # 顶级游资名单（根据市场知名度和历史战绩）
@@ -34,6 +106,13 @@ class LonghubangScoring:
             'QFII', 'RQFII', '券商', '信托'
         ]
         
+        # 热门概念关键词
+        self.hot_concept_keywords = [
+            '人工智能', 'AI', 'ChatGPT', '算力', '新能源', '芯片', '半导体',
+            '军工', '医药', '消费', '5G', '新材料', '量子', '光伏',
+            '储能', '锂电池', '汽车', '游戏', '传媒', '元宇宙'
+        ]
+        
         print("[智瞰龙虎] 评分系统初始化完成")
     
     def calculate_stock_score(self, stock_data: List[Dict]) -> float:
@@ -302,15 +381,9 @@ class LonghubangScoring:
             if concepts:
                 all_concepts.extend([c.strip() for c in str(concepts).split(',')])
         
-        hot_keywords = [
-            '人工智能', 'AI', 'ChatGPT', '算力', '新能源', '芯片', '半导体',
-            '军工', '医药', '消费', '5G', '新材料', '量子', '光伏',
-            '储能', '锂电池', '汽车', '游戏', '传媒', '元宇宙'
-        ]
-        
         concept_score = 0
         for concept in all_concepts:
-            if any(keyword in concept for keyword in hot_keywords):
+            if any(keyword in concept for keyword in self.hot_concept_keywords):
                 concept_score += 0.3
         
         score += min(concept_score, 3.0)
@@ -348,122 +421,223 @@ class LonghubangScoring:
         
         return min(score, max_score)
     
-    def score_all_stocks(self, data_list: List[Dict]) -> pd.DataFrame:
+    def normalize_records(self, data_list: List[Dict]) -> pd.DataFrame:
         """
-        对所有上榜股票进行评分排名
+        将龙虎榜记录一次性规整为类型化的DataFrame（兼容中文键和拼音键）
+        
+        取值规则与逐条评分一致：中文键为空时取拼音键；金额为空或无法转换时记为0，原始NaN保留。
         
         Args:
             data_list: 龙虎榜数据列表
             
         Returns:
-            评分排名DataFrame
+            DataFrame: 列为 code/name/seat/yyb/concepts（文本）和 buy/sell/net（float64），
+                       股票代码为空的记录被剔除
         """
-        if not data_list:
-            return pd.DataFrame()
+        records = [r for r in data_list if r.get('股票代码') or r.get('gpdm')]
+        
+        def text(key, pinyin_key):
+            return [str(r.get(key, '') or r.get(pinyin_key, '') or '') for r in records]
+        
+        return pd.DataFrame({
+            'code': pd.Series([r.get('股票代码') or r.get('gpdm') for r in records], dtype=object),
+            'name': pd.Series([r.get('股票名称') or r.get('gpmc') for r in records], dtype=object),
+            'seat': pd.Series(text('游资名称', 'yzmc'), dtype=object),
+            'yyb': pd.Series(text('营业部', 'yyb'), dtype=object),
+            'concepts': pd.Series(text('概念', 'gl'), dtype=object),
+            'buy': _to_amounts([r.get('买入金额', 0) or r.get('mrje', 0) for r in records]),
+            'sell': _to_amounts([r.get('卖出金额', 0) or r.get('mcje', 0) for r in records]),
+            'net': _to_amounts([r.get('净流入金额', 0) or r.get('jlrje', 0) for r in records]),
+        })
+    
+    def aggregate_records(self, records: pd.DataFrame) -> pd.DataFrame:
+        """
+        按股票汇总评分所需的计数和金额（各项均可跨日累加）
         
-        # 按股票代码分组
-        stocks_dict = {}
-        for record in data_list:
-            code = record.get('股票代码') or record.get('gpdm')
-            name = record.get('股票名称') or record.get('gpmc')
-            
-            if not code:
-                continue
-            
-            if code not in stocks_dict:
-                stocks_dict[code] = {
-                    'code': code,
-                    'name': name,
-                    'records': []
-                }
-            
-            stocks_dict[code]['records'].append(record)
+        Args:
+            records: normalize_records 的结果
         
-        # 计算每只股票的评分
-        results = []
-        for code, stock_info in stocks_dict.items():
-            records = stock_info['records']
-            
-            # 计算各维度评分
-            capital_quality = self._calculate_capital_quality(records)
-            net_inflow = self._calculate_net_inflow_score(records)
-            sell_pressure = self._calculate_sell_pressure_score(records)
-            institution = self._calculate_institution_score(records)
-            bonus = self._calculate_bonus_score(records)
-            
-            total_score = capital_quality + net_inflow + sell_pressure + institution + bonus
-            
-            # 计算实际数据（安全转换）
-            total_buy = 0.0
-            total_sell = 0.0
-            total_net = 0.0
-            for r in records:
-                try:
-                    buy = float(r.get('买入金额', 0) or r.get('mrje', 0) or 0)
-                    total_buy += buy
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    sell = float(r.get('卖出金额', 0) or r.get('mcje', 0) or 0)
-                    total_sell += sell
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    net = float(r.get('净流入金额', 0) or r.get('jlrje', 0) or 0)
-                    total_net += net
-                except (ValueError, TypeError):
-                    pass
-            
-            # 统计买入席位数（安全比较）
-            buy_seats = 0
-            for r in records:
-                try:
-                    buy = float(r.get('买入金额', 0) or r.get('mrje', 0) or 0)
-                    if buy > 0:
-                        buy_seats += 1
-                except (ValueError, TypeError):
-                    pass
-            
-            # 统计机构数量
-            institution_count = sum(1 for r in records 
-                                  if any(kw in (r.get('游资名称', '') or r.get('yzmc', '')) or 
-                                        kw in (r.get('营业部', '') or r.get('yyb', ''))
-                                        for kw in self.institution_keywords))
+        Returns:
+            DataFrame: 每只股票一行（按首次出现顺序），列为 code/name、
+                       seat_count（记录数）、buyers（买入金额>0的席位数）、top_buyers/famous_buyers（其中顶级/知名游资数）、
+                       top_seats/inst_seats/youzi_seats（买入金额非负数的顶级游资/机构/其他席位数，
+                       与 _count_top_youzi、_calculate_institution_score 的口径一致，买入金额为NaN时也计入）、
+                       inst_records（机构记录数）、hot_concepts（热门概念个数）、total_buy/total_sell/total_net（金额合计）
+        """
+        if records.empty:
+            return pd.DataFrame(columns=self.AGGREGATE_COLUMNS)
+        
+        group, codes = pd.factorize(records['code'], sort=False, use_na_sentinel=False)
+        n_groups = len(codes)
+        
+        seat_codes, seat_names = pd.factorize(records['seat'])
+        yyb_codes, yyb_names = pd.factorize(records['yyb'])
+        
+        def matches(keywords):
+            pattern = _keyword_pattern(tuple(keywords))
+            return (_unique_contains(seat_codes, seat_names, pattern)
+                    | _unique_contains(yyb_codes, yyb_names, pattern))
+        
+        buy = records['buy'].to_numpy()
+        is_buyer = buy > 0
+        is_seat = ~(buy <= 0)
+        is_top = matches(self.top_youzi)
+        is_famous = matches(self.famous_youzi) & ~is_top
+        is_inst = matches(self.institution_keywords)
+        
+        def count(mask):
+            return np.bincount(group, weights=mask.astype(np.int64), minlength=n_groups).astype(np.int64)
+        
+        # 热门概念：同一只股票的各条记录概念文本相同，先按不同的概念文本逗号拆分，
+        # 拆分出的概念名称再去重后匹配关键词，计数按编码映射回每条记录
+        text_codes, texts = pd.factorize(records['concepts'])
+        split_texts = [text.split(',') for text in texts]
+        owners = np.repeat(np.arange(len(texts)), [len(parts) for parts in split_texts])
+        concept_codes, concept_names = pd.factorize(
+            np.array([part.strip() for parts in split_texts for part in parts], dtype=object))
+        hot = _unique_contains(concept_codes, concept_names, _keyword_pattern(tuple(self.hot_concept_keywords)))
+        hot_per_text = np.bincount(owners[hot], minlength=len(texts))
+        hot_per_record = np.append(hot_per_text, 0)[text_codes]
+        
+        # factorize 按首次出现顺序编码，累计最大值增加的位置即各股票的首条记录
+        first_rows = np.flatnonzero(np.diff(np.maximum.accumulate(group), prepend=-1) > 0)
+        return pd.DataFrame({
+            'code': list(codes),
+            'name': records['name'].to_numpy()[first_rows],
+            'seat_count': np.bincount(group, minlength=n_groups),
+            'buyers': count(is_buyer),
+            'top_buyers': count(is_buyer & is_top),
+            'famous_buyers': count(is_buyer & is_famous),
+            'top_seats': count(is_seat & is_top),
+            'inst_seats': count(is_seat & is_inst),
+            'youzi_seats': count(is_seat & ~is_inst),
+            'inst_records': count(is_inst),
+            'hot_concepts': np.bincount(group, weights=hot_per_record, minlength=n_groups).astype(np.int64),
+            'total_buy': _sequential_group_sum(group, records['buy'].to_numpy(), n_groups),
+            'total_sell': _sequential_group_sum(group, records['sell'].to_numpy(), n_groups),
+            'total_net': _sequential_group_sum(group, records['net'].to_numpy(), n_groups),
+        }, columns=self.AGGREGATE_COLUMNS)
+    
+    def combine_aggregates(self, partials: pd.DataFrame) -> pd.DataFrame:
+        """
+        合并多日的汇总结果（用于滚动N日评分排名）
+        
+        Args:
+            partials: 多个 aggregate_records 结果按日期升序拼接而成的DataFrame
+        
+        Returns:
+            DataFrame: 每只股票一行（按首次出现顺序），计数和金额逐日相加，股票名称取最早一条
+        """
+        if partials is None or partials.empty:
+            return pd.DataFrame(columns=self.AGGREGATE_COLUMNS)
+        
+        grouped = partials.groupby('code', sort=False)
+        combined = grouped[self.AGGREGATE_COLUMNS[2:]].sum()
+        combined.insert(0, 'name', grouped['name'].first())
+        return combined.reset_index()[self.AGGREGATE_COLUMNS]
+    
+    def score_aggregates(self, agg: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        由 aggregate_records 的汇总结果向量化计算五个维度的评分（与逐条评分的 _calculate_* 结果一致）
+        
+        Returns:
+            dict: capital_quality/net_inflow/sell_pressure/institution/bonus/total，每项为每只股票一个值
+        """
+        buyers = agg['buyers'].to_numpy()
+        top = agg['top_buyers'].to_numpy()
+        famous = agg['famous_buyers'].to_numpy()
+        inst = agg['inst_seats'].to_numpy()
+        youzi = agg['youzi_seats'].to_numpy()
+        seats = agg['seat_count'].to_numpy()
+        total_buy = agg['total_buy'].to_numpy(dtype=float)
+        total_sell = agg['total_sell'].to_numpy(dtype=float)
+        total_net = agg['total_net'].to_numpy(dtype=float)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1. 买入资金含金量 (0-30分)
+            capital = top * 10.0 + famous * 5.0 + (buyers - top - famous) * 1.5
+            capital = np.where(buyers > 0, _py_min(capital, 30.0), 0.0)
             
-            # 获取概念
-            concepts_list = []
-            for r in records:
-                concepts = r.get('概念', '') or r.get('gl', '')
-                if concepts:
-                    concepts_list.extend([c.strip() for c in str(concepts).split(',')])
+            # 2. 净买入额 (0-25分)
+            wan = total_net / 10000
+            net_score = np.select(
+                [wan < 1000, wan < 5000, wan < 10000],
+                [(wan / 1000) * 10,
+                 10 + ((wan - 1000) / 4000) * 8,
+                 18 + ((wan - 5000) / 5000) * 4],
+                22 + _py_min((wan - 10000) / 10000, 1.0) * 3
+            )
+            net_score = np.where(total_net <= 0, 0.0, _py_min(net_score, 25.0))
             
-            top_concepts = Counter(concepts_list).most_common(3)
-            concept_str = ','.join([c[0] for c in top_concepts]) if top_concepts else ''
+            # 3. 卖出压力 (0-20分)
+            ratio = np.where(total_buy > 0, total_sell / total_buy, 1.0)
+            sell_score = np.select(
+                [ratio < 0.1, ratio < 0.3, ratio < 0.5, ratio < 0.8],
+                [20.0,
+                 20.0 - (ratio - 0.1) / 0.2 * 5,
+                 15.0 - (ratio - 0.3) / 0.2 * 5,
+                 10.0 - (ratio - 0.5) / 0.3 * 5],
+                5.0 - _py_min(ratio - 0.8, 0.2) / 0.2 * 5
+            )
+            sell_score = np.where(total_buy == 0, 0.0, _py_max(0.0, _py_min(sell_score, 20.0)))
             
-            # 判断机构参与
-            has_institution = institution_count > 0
+            # 4. 机构共振 (0-15分)
+            institution = np.select(
+                [(inst > 0) & (youzi > 0), inst > 0, youzi > 0],
+                [15.0, np.minimum(8 + inst * 2, 12), np.minimum(5 + youzi, 10)],
+                0.0
+            ).astype(float)
             
-            results.append({
-                '排名': 0,  # 稍后填充
-                '排名_display': '',  # 用于显示奖牌
-                '股票名称': stock_info['name'],
-                '股票代码': code,
-                '综合评分': round(total_score, 1),
-                '资金含金量': round(capital_quality, 0),
-                '净买入额': round(net_inflow, 0),
-                '卖出压力': round(sell_pressure, 0),
-                '机构共振': round(institution, 0),
-                '加分项': round(bonus, 0),
-                '顶级游资': self._count_top_youzi(records),
-                '买方数': buy_seats,
-                '机构参与': '✅' if has_institution else '❌',
-                '净流入': round(total_net, 2)
-            })
-        
-        # 转换为DataFrame并排序
-        df = pd.DataFrame(results)
-        if df.empty:
-            return df
+            # 5. 其他加分项 (0-10分)
+            seat_score = np.select([seats == 1, seats == 2, seats == 3, seats <= 5],
+                                   [3.0, 2.5, 2.0, 1.5], 1.0)
+            concept_score = _concept_scores(agg['hot_concepts'].to_numpy())
+            repeat_score = np.select([seats >= 3, seats == 2], [2.0, 1.0], 0.0)
+            buy_sell_ratio = total_buy / (total_sell + 1)
+            ratio_score = np.where(
+                total_buy > 0,
+                np.select([buy_sell_ratio >= 10, buy_sell_ratio >= 5, buy_sell_ratio >= 3], [2.0, 1.5, 1.0], 0.0),
+                0.0
+            )
+            bonus = _py_min(0.0 + seat_score + concept_score + repeat_score + ratio_score, 10.0)
+        
+        total = capital + net_score + sell_score + institution + bonus
+        return {
+            'capital_quality': capital,
+            'net_inflow': net_score,
+            'sell_pressure': sell_score,
+            'institution': institution,
+            'bonus': bonus,
+            'total': total,
+        }
+    
+    def rank_aggregates(self, agg: pd.DataFrame) -> pd.DataFrame:
+        """
+        由汇总结果生成评分排名表（列格式同 score_all_stocks）
+        
+        Args:
+            agg: aggregate_records 的结果（或多日汇总相加后的结果）
+        """
+        if agg.empty:
+            return pd.DataFrame()
+        
+        scores = self.score_aggregates(agg)
+        df = pd.DataFrame({
+            '排名': 0,  # 稍后填充
+            '排名_display': '',  # 用于显示奖牌
+            '股票名称': list(agg['name']),
+            '股票代码': list(agg['code']),
+            '综合评分': [round(float(v), 1) for v in scores['total']],
+            '资金含金量': [round(float(v), 0) for v in scores['capital_quality']],
+            '净买入额': [round(float(v), 0) for v in scores['net_inflow']],
+            '卖出压力': [round(float(v), 0) for v in scores['sell_pressure']],
+            '机构共振': [round(float(v), 0) for v in scores['institution']],
+            '加分项': [round(float(v), 0) for v in scores['bonus']],
+            '顶级游资': [int(v) for v in agg['top_seats']],
+            '买方数': [int(v) for v in agg['buyers']],
+            '机构参与': ['✅' if v > 0 else '❌' for v in agg['inst_records']],
+            '净流入': [round(float(v), 2) for v in agg['total_net']]
+        })
         
         df = df.sort_values('综合评分', ascending=False).reset_index(drop=True)
         df['排名'] = range(1, len(df) + 1)
@@ -479,6 +653,23 @@ class LonghubangScoring:
         
         return df
     
+    def score_all_stocks(self, data_list: List[Dict]) -> pd.DataFrame:
+        """
+        对所有上榜股票进行评分排名
+        
+        记录先规整为DataFrame，再按股票分组向量化计算各维度评分，结果与逐只调用 _calculate_* 一致。
+        
+        Args:
+            data_list: 龙虎榜数据列表
+        
+        Returns:
+            评分排名DataFrame
+        """
+        if not data_list:
+            return pd.DataFrame()
+        
+        return self.rank_aggregates(self.aggregate_records(self.normalize_records(data_list)))
+    
     def _count_top_youzi(self, records: List[Dict]) -> int:
         """统计顶级游资数量"""
         count = 0
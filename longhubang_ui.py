@@ -13,6 +13,17 @@ import base64
 
 from longhubang_engine import LonghubangEngine
 from longhubang_pdf import LonghubangPDFGenerator
+from report_search import SEARCH_RANGES, range_start
+
+
+# 各分析师的展示信息（按分析顺序）
+AGENT_INFO = {
+    'youzi': {'title': '🎯 游资行为分析师', 'icon': '🎯'},
+    'stock': {'title': '📈 个股潜力分析师', 'icon': '📈'},
+    'theme': {'title': '🔥 题材追踪分析师', 'icon': '🔥'},
+    'risk': {'title': '⚠️ 风险控制专家', 'icon': '⚠️'},
+    'chief': {'title': '👔 首席策略师综合研判', 'icon': '👔'}
+}
 
 
 def display_longhubang():
@@ -199,8 +210,10 @@ def run_longhubang_analysis(model="deepseek-chat", date=None, days=1):
         status_text.text("📊 正在获取龙虎榜数据...")
         progress_bar.progress(15)
         
-        # 运行分析
-        result = engine.run_comprehensive_analysis(date=date, days=days)
+        # 运行分析（各分析师报告生成过程中实时展示）
+        stream_area, on_stream = create_agents_stream_view()
+        result = engine.run_comprehensive_analysis(date=date, days=days, stream_callback=on_stream)
+        stream_area.empty()
         
         progress_bar.progress(90)
         
@@ -581,6 +594,30 @@ def display_recommended_stocks(result):
                 st.markdown(f"**持有周期:** {stock.get('hold_period', '-')}")
 
 
+def create_agents_stream_view():
+    """
+    创建AI分析师报告的实时预览区域
+    
+    Returns:
+        (预览区域, 流式回调)：回调参数为 (分析师key, 截至当前的报告文本)
+    """
+    stream_area = st.empty()
+    placeholders = {}
+    with stream_area.container():
+        st.subheader("🤖 AI分析师团队报告（生成中）")
+        for agent_key, info in AGENT_INFO.items():
+            with st.expander(f"{info['icon']} {info['title']}", expanded=True):
+                placeholders[agent_key] = st.empty()
+                placeholders[agent_key].caption("⏳ 等待分析...")
+    
+    def on_stream(agent_key, text):
+        placeholder = placeholders.get(agent_key)
+        if placeholder is not None:
+            placeholder.markdown(text + " ▌")
+    
+    return stream_area, on_stream
+
+
 def display_agents_reports(result):
     """显示AI分析师报告"""
     
@@ -593,15 +630,7 @@ def display_agents_reports(result):
         return
     
     # 各分析师报告
-    agent_info = {
-        'youzi': {'title': '🎯 游资行为分析师', 'icon': '🎯'},
-        'stock': {'title': '📈 个股潜力分析师', 'icon': '📈'},
-        'theme': {'title': '🔥 题材追踪分析师', 'icon': '🔥'},
-        'risk': {'title': '⚠️ 风险控制专家', 'icon': '⚠️'},
-        'chief': {'title': '👔 首席策略师综合研判', 'icon': '👔'}
-    }
-    
-    for agent_key, info in agent_info.items():
+    for agent_key, info in AGENT_INFO.items():
         agent_data = agents_analysis.get(agent_key, {})
         if agent_data:
             with st.expander(f"{info['icon']} {info['title']}", expanded=(agent_key == 'chief')):
@@ -912,13 +941,30 @@ def display_history_tab():
     
     try:
         engine = LonghubangEngine()
-        reports_df = engine.get_historical_reports(limit=50)
-        
-        if reports_df.empty:
-            st.info("暂无历史报告")
-            return
         
-        st.info(f"💾 共有 {len(reports_df)} 条历史报告")
+        # 全文检索
+        col_query, col_range = st.columns([3, 1])
+        with col_query:
+            search_query = st.text_input("🔍 全文检索报告内容", placeholder="如：半导体 机构，多个词用空格分隔",
+                                         key="longhubang_history_search")
+        with col_range:
+            search_range = st.selectbox("时间范围", list(SEARCH_RANGES.keys()), key="longhubang_history_range")
+        
+        if search_query.strip():
+            hits = engine.search_reports(search_query, limit=50, since=range_start(SEARCH_RANGES[search_range]))
+            if not hits:
+                st.info("🔍 未找到匹配的报告")
+                return
+            reports_df = pd.DataFrame(hits)
+            st.info(f"🔍 命中 {len(reports_df)} 条历史报告（按相关度排序）")
+        else:
+            reports_df = engine.get_historical_reports(limit=50)
+            
+            if reports_df.empty:
+                st.info("暂无历史报告")
+                return
+            
+            st.info(f"💾 共有 {len(reports_df)} 条历史报告")
         
         # 显示报告列表
         st.markdown("### 📋 报告列表")
@@ -945,6 +991,8 @@ def display_history_tab():
                 # 显示摘要
                 st.markdown("#### 📝 报告摘要")
                 st.info(summary)
+                if row.get('snippet'):
+                    st.caption(row['snippet'])
                 
                 st.markdown("---")
                 
@@ -1261,6 +1309,26 @@ def display_statistics_tab():
                 width='stretch'
             )
         
+        st.markdown("---")
+        
+        # 热门概念排名
+        st.markdown("### 🔥 历史热门概念排名 (近30天)")
+        
+        top_concepts_df = engine.get_top_concepts(start_date, end_date, limit=20)
+        
+        if not top_concepts_df.empty:
+            st.dataframe(
+                top_concepts_df,
+                column_config={
+                    "concept": st.column_config.TextColumn("概念"),
+                    "stock_count": st.column_config.NumberColumn("上榜股票次数", format="%d"),
+                    "record_count": st.column_config.NumberColumn("席位记录数", format="%d"),
+                    "total_net_inflow": st.column_config.NumberColumn("总净流入(元)", format="%.2f")
+                },
+                hide_index=True,
+                width='stretch'
+            )
+    
     except Exception as e:
         st.error(f"❌ 加载统计数据失败: {str(e)}")
 
@@ -1364,7 +1432,7 @@ def run_longhubang_batch_analysis():
     
     if start_analysis:
         # 导入统一分析函数（遵循统一规范）
-        from app import analyze_single_stock_for_batch
+        from app import analyze_single_stock_for_batch, prepare_batch_stock_data
         import concurrent.futures
         import time
         
@@ -1378,6 +1446,10 @@ def run_longhubang_batch_analysis():
         results = []
         start_time = time.time()
         
+        # 预先获取所有股票数据，技术指标一次性批量计算
+        status_text.text(f"正在获取 {len(stock_codes)} 只股票的行情数据...")
+        prepared = prepare_batch_stock_data(stock_codes, "1y")
+        
         if analysis_mode == "sequential":
             # 顺序分析
             for i, code in enumerate(stock_codes):
@@ -1397,7 +1469,8 @@ def run_longhubang_batch_analysis():
                             'sentiment': False,
                             'news': False
                         },
-                        selected_model='deepseek-chat'
+                        selected_model='deepseek-chat',
+                        prepared_data=prepared.get(code)
                     )
                     
                     results.append({
@@ -1428,7 +1501,8 @@ def run_longhubang_batch_analysis():
                             'sentiment': False,
                             'news': False
                         },
-                        selected_model='deepseek-chat'
+                        selected_model='deepseek-chat',
+                        prepared_data=prepared.get(code)
                     )
                     return {"code": code, "result": result}
                 except Exception as e:
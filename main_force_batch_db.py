@@ -4,7 +4,9 @@
 主力选股批量分析历史记录数据库模块
 """
 
-import sqlite3
+import sqlite_pool
+import blob_store
+import report_search
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
@@ -13,6 +15,12 @@ import pandas as pd
 class MainForceBatchDatabase:
     """主力选股批量分析历史数据库管理类"""
     
+    # 列表摘要字段
+    SUMMARY_COLUMNS = ['id', 'analysis_date', 'batch_count', 'analysis_mode',
+                       'success_count', 'failed_count', 'total_time', 'created_at']
+    # 全文检索索引（各股票的分析结果）
+    REPORT_INDEX = report_search.ReportIndex('batch_analysis_history', ['results_json'], ['results_json'])
+    
     def __init__(self, db_path: str = "main_force_batch.db"):
         """初始化数据库连接"""
         self.db_path = db_path
@@ -20,7 +28,7 @@ class MainForceBatchDatabase:
     
     def _init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 批量分析历史记录表
@@ -45,6 +53,10 @@ class MainForceBatchDatabase:
         ''')
         
         conn.commit()
+        
+        # 分析结果JSON压缩存储
+        blob_store.ensure_schema(conn, 'batch_analysis_history', ['results_json'])
+        self.REPORT_INDEX.ensure(conn)
         conn.close()
     
     def _clean_results_for_json(self, results: List[Dict]) -> List[Dict]:
@@ -124,7 +136,7 @@ class MainForceBatchDatabase:
         Returns:
             记录ID
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -132,14 +144,16 @@ class MainForceBatchDatabase:
         # 清理结果数据，确保可以JSON序列化
         cleaned_results = self._clean_results_for_json(results)
         results_json = json.dumps(cleaned_results, ensure_ascii=False, default=str)
+        results_inline, results_blob = blob_store.store(cursor, results_json)
         
         cursor.execute('''
             INSERT INTO batch_analysis_history 
-            (analysis_date, batch_count, analysis_mode, success_count, failed_count, total_time, results_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (analysis_date, batch_count, analysis_mode, success_count, failed_count, total_time, results_json))
+            (analysis_date, batch_count, analysis_mode, success_count, failed_count, total_time, results_json, results_json_blob)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (analysis_date, batch_count, analysis_mode, success_count, failed_count, total_time, results_inline, results_blob))
         
         record_id = cursor.lastrowid
+        self.REPORT_INDEX.add(cursor, record_id, [results_json])
         conn.commit()
         conn.close()
         
@@ -155,24 +169,25 @@ class MainForceBatchDatabase:
         Returns:
             历史记录列表
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
             SELECT id, analysis_date, batch_count, analysis_mode, 
-                   success_count, failed_count, total_time, results_json, created_at
+                   success_count, failed_count, total_time, results_json, created_at, results_json_blob
             FROM batch_analysis_history
             ORDER BY created_at DESC
             LIMIT ?
         ''', (limit,))
         
         rows = cursor.fetchall()
+        blobs = blob_store.load(cursor, [row[9] for row in rows])
         conn.close()
         
         history = []
         for row in rows:
             try:
-                results = json.loads(row[7])
+                results = json.loads(blobs[row[9]] if row[9] is not None else row[7])
             except:
                 results = []
             
@@ -200,24 +215,25 @@ class MainForceBatchDatabase:
         Returns:
             记录详情
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
             SELECT id, analysis_date, batch_count, analysis_mode, 
-                   success_count, failed_count, total_time, results_json, created_at
+                   success_count, failed_count, total_time, results_json, created_at, results_json_blob
             FROM batch_analysis_history
             WHERE id = ?
         ''', (record_id,))
         
         row = cursor.fetchone()
+        results_json = blob_store.resolve(cursor, row[7], row[9]) if row else None
         conn.close()
         
         if not row:
             return None
         
         try:
-            results = json.loads(row[7])
+            results = json.loads(results_json)
         except:
             results = []
         
@@ -233,6 +249,36 @@ class MainForceBatchDatabase:
             'created_at': row[8]
         }
     
+    def search_history(self, query: str, limit: int = 20, since: str = None, until: str = None) -> List[Dict]:
+        """
+        全文检索批量分析历史（各股票的分析结果）
+        
+        Args:
+            query: 检索词，多个词用空格分隔
+            limit: 返回条数
+            since: 起始日期（含），格式 YYYY-MM-DD
+            until: 截止日期（含），格式 YYYY-MM-DD
+        
+        Returns:
+            list: 按相关度排序的摘要记录，额外包含 rank 和 snippet
+        """
+        conditions = []
+        params = []
+        if since:
+            conditions.append('substr(t.created_at, 1, 10) >= ?')
+            params.append(since)
+        if until:
+            conditions.append('substr(t.created_at, 1, 10) <= ?')
+            params.append(until)
+        
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        hits = self.REPORT_INDEX.search(cursor, query, self.SUMMARY_COLUMNS, limit, ' AND '.join(conditions), params)
+        conn.close()
+        
+        return hits
+    
     def delete_record(self, record_id: int) -> bool:
         """
         删除记录
@@ -243,9 +289,11 @@ class MainForceBatchDatabase:
         Returns:
             是否删除成功
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
+        self.REPORT_INDEX.remove(cursor, 'id = ?', (record_id,))
+        blob_store.delete_refs(cursor, 'batch_analysis_history', ['results_json'], 'id = ?', (record_id,))
         cursor.execute('DELETE FROM batch_analysis_history WHERE id = ?', (record_id,))
         
         affected_rows = cursor.rowcount
@@ -261,7 +309,7 @@ class MainForceBatchDatabase:
         Returns:
             统计数据
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 总记录数
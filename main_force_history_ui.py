@@ -8,6 +8,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from main_force_batch_db import batch_db
+from report_search import SEARCH_RANGES, range_start
 
 
 def display_batch_history():
@@ -45,15 +46,38 @@ def display_batch_history():
     except Exception as e:
         st.warning(f"⚠️ 无法获取统计信息: {str(e)}")
     
+    # 全文检索
+    col_query, col_range = st.columns([3, 1])
+    with col_query:
+        search_query = st.text_input("🔍 全文检索分析结果", placeholder="如：半导体 主力流入，多个词用空格分隔",
+                                     key="main_force_history_search")
+    with col_range:
+        search_range = st.selectbox("时间范围", list(SEARCH_RANGES.keys()), key="main_force_history_range")
+    
     # 获取历史记录
     try:
-        history_records = batch_db.get_all_history(limit=50)
-        
-        if not history_records:
-            st.info("📝 暂无批量分析历史记录")
-            return
-        
-        st.markdown(f"### 📋 最近 {len(history_records)} 条记录")
+        if search_query.strip():
+            hits = batch_db.search_history(search_query, limit=20, since=range_start(SEARCH_RANGES[search_range]))
+            history_records = []
+            for hit in hits:
+                record = batch_db.get_record_by_id(hit['id'])
+                if record:
+                    record['snippet'] = hit['snippet']
+                    history_records.append(record)
+            
+            if not history_records:
+                st.info("🔍 未找到匹配的记录")
+                return
+            
+            st.markdown(f"### 🔍 命中 {len(history_records)} 条记录（按相关度排序）")
+        else:
+            history_records = batch_db.get_all_history(limit=50)
+            
+            if not history_records:
+                st.info("📝 暂无批量分析历史记录")
+                return
+            
+            st.markdown(f"### 📋 最近 {len(history_records)} 条记录")
         
         # 显示每条记录
         for idx, record in enumerate(history_records):
@@ -65,6 +89,9 @@ def display_batch_history():
                 f"耗时{record['total_time']/60:.1f}分钟",
                 expanded=(idx == 0)  # 第一条默认展开
             ):
+                if record.get('snippet'):
+                    st.caption(record['snippet'])
+                
                 # 记录基本信息
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
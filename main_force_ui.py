@@ -589,7 +589,7 @@ def run_main_force_batch_analysis():
 
     if start_analysis:
         # 导入统一分析函数（遵循统一规范）
-        from app import analyze_single_stock_for_batch
+        from app import analyze_single_stock_for_batch, prepare_batch_stock_data
         import concurrent.futures
         import time
 
@@ -626,6 +626,10 @@ def run_main_force_batch_analysis():
         # 记录开始时间
         start_time = time.time()
 
+        # 预先获取所有股票数据，技术指标一次性批量计算
+        status_text.text(f"正在获取 {len(stock_codes)} 只股票的行情数据...")
+        prepared = prepare_batch_stock_data(stock_codes, period)
+
         if analysis_mode == "sequential":
             # 顺序分析
             for i, code in enumerate(stock_codes):
@@ -638,7 +642,8 @@ def run_main_force_batch_analysis():
                         symbol=code,
                         period=period,
                         enabled_analysts_config=enabled_analysts_config,
-                        selected_model=selected_model
+                        selected_model=selected_model,
+                        prepared_data=prepared.get(code)
                     )
 
                     results.append(result)
@@ -664,7 +669,8 @@ def run_main_force_batch_analysis():
                         symbol=code,
                         period=period,
                         enabled_analysts_config=enabled_analysts_config,
-                        selected_model=selected_model
+                        selected_model=selected_model,
+                        prepared_data=prepared.get(code)
                     )
                     print(f"  完成分析: {code}")
                     return result
@@ -4,13 +4,15 @@
 """
 
 import pandas as pd
-import numpy as np
 import akshare as ak
 from datetime import datetime, timedelta
 import warnings
 import sys
 import io
 from data_source_manager import data_source_manager
+from circuit_breaker import circuit_breakers
+from market_snapshot import market_snapshot
+from indicator_kernel import arbr
 
 warnings.filterwarnings('ignore')
 
@@ -164,23 +166,10 @@ class MarketSentimentDataFetcher:
             if 'date' in df.columns:
                 df['date'] = pd.to_datetime(df['date'])
             
-            # 计算各项差值
-            df['HO'] = df['high'] - df['open']    # 最高价-开盘价
-            df['OL'] = df['open'] - df['low']     # 开盘价-最低价
-            df['HCY'] = df['high'] - df['close'].shift(1)  # 最高价-前收
-            df['CYL'] = df['close'].shift(1) - df['low']   # 前收-最低价
-            
-            # 计算AR指标
-            df['AR'] = (df['HO'].rolling(window=self.arbr_period).sum() / 
-                       df['OL'].rolling(window=self.arbr_period).sum()) * 100
-            
-            # 计算BR指标
-            df['BR'] = (df['HCY'].rolling(window=self.arbr_period).sum() / 
-                       df['CYL'].rolling(window=self.arbr_period).sum()) * 100
-            
-            # 处理无穷大和空值
-            df['AR'] = df['AR'].replace([np.inf, -np.inf], np.nan)
-            df['BR'] = df['BR'].replace([np.inf, -np.inf], np.nan)
+            # 计算AR、BR指标（分母为0的无穷大已处理为空值）
+            arbr_values = arbr(df['open'], df['high'], df['low'], df['close'], self.arbr_period)
+            df['AR'] = arbr_values['ar']
+            df['BR'] = arbr_values['br']
             
             # 移除空值
             df = df.dropna(subset=['AR', 'BR'])
@@ -333,37 +322,37 @@ class MarketSentimentDataFetcher:
         try:
             # 优先使用akshare获取最近的换手率数据
             print(f"   [Akshare] 正在获取换手率数据...")
-            # 获取A股实时行情数据（不需要参数）
-            df = ak.stock_zh_a_spot_em()
-            if df is not None and not df.empty:
-                stock_data = df[df['代码'] == symbol]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    turnover_rate = row.get('换手率', 'N/A')
-                    
-                    # 解读换手率
-                    interpretation = ""
-                    if turnover_rate != 'N/A':
-                        try:
-                            turnover = float(turnover_rate)
-                            if turnover > 20:
-                                interpretation = "换手率极高（>20%），资金活跃度极高，可能存在炒作"
-                            elif turnover > 10:
-                                interpretation = "换手率较高（>10%），交易活跃"
-                            elif turnover > 5:
-                                interpretation = "换手率正常（5%-10%），交易适中"
-                            elif turnover > 2:
-                                interpretation = "换手率偏低（2%-5%），交易相对清淡"
-                            else:
-                                interpretation = "换手率很低（<2%），交易清淡"
-                        except:
-                            pass
-                    
-                    print(f"   [Akshare] ✅ 成功获取换手率: {turnover_rate}%")
-                    return {
-                        "current_turnover_rate": turnover_rate,
-                        "interpretation": interpretation
-                    }
+            # 从共享的全市场行情快照中查询
+            df = market_snapshot.get_snapshot()
+            if df is None or df.empty:
+                raise ValueError("全市场行情快照不可用")
+            row = market_snapshot.get_quote(symbol)
+            if row is not None:
+                turnover_rate = row.get('换手率', 'N/A')
+                
+                # 解读换手率
+                interpretation = ""
+                if turnover_rate != 'N/A':
+                    try:
+                        turnover = float(turnover_rate)
+                        if turnover > 20:
+                            interpretation = "换手率极高（>20%），资金活跃度极高，可能存在炒作"
+                        elif turnover > 10:
+                            interpretation = "换手率较高（>10%），交易活跃"
+                        elif turnover > 5:
+                            interpretation = "换手率正常（5%-10%），交易适中"
+                        elif turnover > 2:
+                            interpretation = "换手率偏低（2%-5%），交易相对清淡"
+                        else:
+                            interpretation = "换手率很低（<2%），交易清淡"
+                    except:
+                        pass
+                
+                print(f"   [Akshare] ✅ 成功获取换手率: {turnover_rate}%")
+                return {
+                    "current_turnover_rate": turnover_rate,
+                    "interpretation": interpretation
+                }
         except Exception as e:
             print(f"   [Akshare] ❌ 获取换手率失败: {e}")
             
@@ -374,7 +363,8 @@ class MarketSentimentDataFetcher:
                     ts_code = data_source_manager._convert_to_ts_code(symbol)
                     
                     # 获取最近一个交易日的数据
-                    df = data_source_manager.tushare_api.daily_basic(
+                    df = circuit_breakers.call(
+                        'tushare', 'daily_basic', data_source_manager.tushare_api.daily_basic,
                         ts_code=ts_code,
                         trade_date=datetime.now().strftime('%Y%m%d')
                     )
@@ -417,7 +407,7 @@ class MarketSentimentDataFetcher:
             # 优先使用akshare获取上证指数实时数据
             print(f"   [Akshare] 正在获取大盘指数数据...")
             # 使用正确的symbol参数
-            df = ak.stock_zh_index_spot_em(symbol="上证系列指数")
+            df = circuit_breakers.call('akshare', 'index_spot', ak.stock_zh_index_spot_em, symbol="上证系列指数")
             if df is not None and not df.empty:
                 # 查找上证指数（代码为000001）
                 sh_index = df[df['代码'] == '000001']
@@ -427,12 +417,12 @@ class MarketSentimentDataFetcher:
                     
                     # 获取涨跌家数
                     try:
-                        market_summary = ak.stock_zh_a_spot_em()
-                        if market_summary is not None and not market_summary.empty:
-                            up_count = len(market_summary[market_summary['涨跌幅'] > 0])
-                            down_count = len(market_summary[market_summary['涨跌幅'] < 0])
-                            total_count = len(market_summary)
-                            flat_count = total_count - up_count - down_count
+                        breadth = market_snapshot.get_market_breadth()
+                        if breadth:
+                            up_count = breadth['up_count']
+                            down_count = breadth['down_count']
+                            total_count = breadth['total_count']
+                            flat_count = breadth['flat_count']
                             
                             # 计算市场情绪指数
                             sentiment_score = (up_count - down_count) / total_count * 100
@@ -477,7 +467,8 @@ class MarketSentimentDataFetcher:
                     print(f"   [Tushare] 正在获取大盘指数数据（备用数据源）...")
                     
                     # 获取上证指数数据
-                    df = data_source_manager.tushare_api.index_daily(
+                    df = circuit_breakers.call(
+                        'tushare', 'index_daily', data_source_manager.tushare_api.index_daily,
                         ts_code='000001.SH',
                         start_date=datetime.now().strftime('%Y%m%d'),
                         end_date=datetime.now().strftime('%Y%m%d')
@@ -611,11 +602,10 @@ class MarketSentimentDataFetcher:
             
             # 获取涨跌家数
             try:
-                market_summary = ak.stock_zh_a_spot_em()
-                if market_summary is not None and not market_summary.empty:
-                    up_count = len(market_summary[market_summary['涨跌幅'] > 0])
-                    down_count = len(market_summary[market_summary['涨跌幅'] < 0])
-                    total = len(market_summary)
+                breadth = market_snapshot.get_market_breadth()
+                if breadth:
+                    up_count = breadth['up_count']
+                    total = breadth['total_count']
                     
                     up_ratio = up_count / total
                     # 根据涨跌家数比例调整分数（权重30%）
@@ -0,0 +1,178 @@
+"""
+全市场实时行情快照服务
+进程内共享 ak.stock_zh_a_spot_em() 的结果，按TTL刷新，并按股票代码建立索引
+下载经过 akshare/market_snapshot 熔断器；刷新失败后按重试间隔退避，期间使用未超过最长可用时间的旧快照
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+import config
+from circuit_breaker import circuit_breakers
+
+
+class MarketSnapshotService:
+    """全市场行情快照 - 每个TTL周期只下载一次全市场数据，供所有调用方复用"""
+
+    def __init__(self, ttl=None):
+        """
+        初始化快照服务
+
+        Args:
+            ttl: 快照有效期（秒），默认读取 config.MARKET_SNAPSHOT_TTL
+        """
+        self.ttl = ttl if ttl is not None else config.MARKET_SNAPSHOT_TTL
+        # (行情DataFrame, {代码: 行号})，整体替换，读取方一次取出保证两者匹配
+        self._snapshot = None
+        self._fetched_at = 0.0
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        """快照是否仍在有效期内"""
+        return self._snapshot is not None and (time.time() - self._fetched_at) < self.ttl
+
+    def _in_backoff(self):
+        """上次刷新失败后是否仍在重试间隔内"""
+        return (time.time() - self._failed_at) < config.MARKET_SNAPSHOT_RETRY_INTERVAL
+
+    def _usable_snapshot(self):
+        """刷新失败时可继续使用的旧快照，超过最长可用时间返回None"""
+        snapshot = self._snapshot
+        if snapshot is None or (time.time() - self._fetched_at) >= config.MARKET_SNAPSHOT_MAX_AGE:
+            return None
+        return snapshot
+
+    def _refresh(self):
+        """下载全市场行情并重建代码索引（调用方需持有锁）"""
+        import akshare as ak
+
+        print("[行情快照] 正在获取全市场实时行情...")
+        df = circuit_breakers.call('akshare', 'market_snapshot', ak.stock_zh_a_spot_em)
+        if df is None or df.empty:
+            raise ValueError("全市场行情为空")
+
+        df = df.reset_index(drop=True)
+        codes = df['代码'].astype(str).tolist()
+        self._snapshot = (df, {code: i for i, code in enumerate(codes)})
+        self._fetched_at = time.time()
+        print(f"[行情快照] ✅ 已缓存 {len(df)} 只股票行情")
+
+    def _get_entry(self, force_refresh=False):
+        """
+        获取快照及其代码索引（过期时自动刷新）
+
+        Returns:
+            tuple: (DataFrame, {代码: 行号})，失败且无可用旧快照时返回None
+        """
+        snapshot = self._snapshot
+        if not force_refresh and self._is_fresh():
+            return snapshot
+        # 刚刚刷新失败，重试间隔内不再重复下载
+        if not force_refresh and self._in_backoff():
+            return self._usable_snapshot()
+
+        with self._lock:
+            # 其他线程可能已在等待期间完成刷新或刚刚失败
+            if not force_refresh and self._is_fresh():
+                return self._snapshot
+            if not force_refresh and self._in_backoff():
+                return self._usable_snapshot()
+            try:
+                self._refresh()
+            except Exception as e:
+                self._failed_at = time.time()
+                print(f"[行情快照] ❌ 获取失败: {e}")
+                # 刷新失败时沿用未过久的旧快照，避免所有调用方同时失败
+                return self._usable_snapshot()
+            return self._snapshot
+
+    def get_snapshot(self, force_refresh=False):
+        """
+        获取全市场行情快照（过期时自动刷新）
+
+        Args:
+            force_refresh: 是否忽略TTL强制刷新
+
+        Returns:
+            DataFrame: 全市场行情（与 ak.stock_zh_a_spot_em 列一致），失败时返回None
+        """
+        snapshot = self._get_entry(force_refresh)
+        return snapshot[0] if snapshot else None
+
+    def get_quote(self, symbol, force_refresh=False):
+        """
+        按股票代码查询单只股票行情（O(1)）
+
+        Args:
+            symbol: 6位股票代码
+            force_refresh: 是否强制刷新快照
+
+        Returns:
+            Series: 该股票的行情行，不存在时返回None
+        """
+        snapshot = self._get_entry(force_refresh)
+        if snapshot is None:
+            return None
+        df, index = snapshot
+        pos = index.get(str(symbol))
+        if pos is None:
+            return None
+        return df.iloc[pos]
+
+    def get_quotes(self, symbols, force_refresh=False):
+        """
+        批量查询多只股票行情
+
+        Args:
+            symbols: 股票代码列表
+            force_refresh: 是否强制刷新快照
+
+        Returns:
+            dict: {symbol: Series}，只包含快照中存在的股票
+        """
+        snapshot = self._get_entry(force_refresh)
+        if snapshot is None:
+            return {}
+        df, index = snapshot
+        result = {}
+        for symbol in symbols:
+            pos = index.get(str(symbol))
+            if pos is not None:
+                result[symbol] = df.iloc[pos]
+        return result
+
+    def get_market_breadth(self):
+        """
+        统计全市场涨跌家数
+
+        Returns:
+            dict: up_count/down_count/flat_count/total_count/limit_up/limit_down，失败时返回None
+        """
+        df = self.get_snapshot()
+        if df is None or df.empty:
+            return None
+        change = pd.to_numeric(df['涨跌幅'], errors='coerce')
+        total_count = len(df)
+        up_count = int((change > 0).sum())
+        down_count = int((change < 0).sum())
+        return {
+            "total_count": total_count,
+            "up_count": up_count,
+            "down_count": down_count,
+            "flat_count": total_count - up_count - down_count,
+            "limit_up": int((change >= 9.5).sum()),
+            "limit_down": int((change <= -9.5).sum())
+        }
+
+    def invalidate(self):
+        """使当前快照失效，下次访问时重新下载"""
+        with self._lock:
+            self._fetched_at = 0.0
+            self._failed_at = 0.0
+
+
+# 全局行情快照实例
+market_snapshot = MarketSnapshotService()
@@ -1,4 +1,4 @@
-import sqlite3
+import sqlite_pool
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -9,15 +9,30 @@ class StockMonitorDatabase:
     
     def __init__(self, db_path: str = "stock_monitor.db"):
         self.db_path = db_path
+        # 监测股票变更监听器：callback(action, stock_id)，action 为 added/updated/removed
+        self._change_listeners = []
         # 确保数据库所在目录存在
         db_dir = os.path.dirname(self.db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
         self.init_database()
     
+    def add_change_listener(self, callback):
+        """注册监测股票变更监听器（新增、修改、删除后调用）"""
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+    
+    def _notify_change(self, action: str, stock_id: int):
+        """通知所有监听器，监听器异常不影响数据库操作"""
+        for callback in list(self._change_listeners):
+            try:
+                callback(action, stock_id)
+            except Exception as e:
+                print(f"监测股票变更通知失败: {e}")
+    
     def init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 创建监测股票表
@@ -75,7 +90,7 @@ class StockMonitorDatabase:
                            quant_enabled: bool = False,
                            quant_config: Dict = None) -> int:
         """添加监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         quant_config_json = json.dumps(quant_config) if quant_config else None
@@ -92,11 +107,12 @@ class StockMonitorDatabase:
         conn.commit()
         conn.close()
         
+        self._notify_change('added', stock_id)
         return stock_id
     
     def get_monitored_stocks(self) -> List[Dict]:
         """获取所有监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -107,40 +123,42 @@ class StockMonitorDatabase:
             ORDER BY created_at DESC
         ''')
         
-        stocks = []
-        for row in cursor.fetchall():
-            try:
-                quant_config = json.loads(row[12]) if row[12] else None
-                entry_range = json.loads(row[4]) if row[4] else None
-            except (json.JSONDecodeError, TypeError) as e:
-                print(f"警告: 股票 {row[1]} 的JSON解析失败: {e}")
-                entry_range = None
-                quant_config = None
-                
-            stocks.append({
-                'id': row[0],
-                'symbol': row[1],
-                'name': row[2],
-                'rating': row[3],
-                'entry_range': entry_range,
-                'take_profit': row[5],
-                'stop_loss': row[6],
-                'current_price': row[7],
-                'last_checked': row[8],
-                'check_interval': row[9],
-                'notification_enabled': bool(row[10]),
-                'quant_enabled': bool(row[11]),
-                'quant_config': quant_config,
-                'created_at': row[13],
-                'updated_at': row[14]
-            })
+        stocks = [self._parse_stock_row(row) for row in cursor.fetchall()]
         
         conn.close()
         return stocks
     
+    def _parse_stock_row(self, row) -> Dict:
+        """将 monitored_stocks 查询行（get_monitored_stocks 的列顺序）转换为字典"""
+        try:
+            quant_config = json.loads(row[12]) if row[12] else None
+            entry_range = json.loads(row[4]) if row[4] else None
+        except (json.JSONDecodeError, TypeError) as e:
+            print(f"警告: 股票 {row[1]} 的JSON解析失败: {e}")
+            entry_range = None
+            quant_config = None
+        
+        return {
+            'id': row[0],
+            'symbol': row[1],
+            'name': row[2],
+            'rating': row[3],
+            'entry_range': entry_range,
+            'take_profit': row[5],
+            'stop_loss': row[6],
+            'current_price': row[7],
+            'last_checked': row[8],
+            'check_interval': row[9],
+            'notification_enabled': bool(row[10]),
+            'quant_enabled': bool(row[11]),
+            'quant_config': quant_config,
+            'created_at': row[13],
+            'updated_at': row[14]
+        }
+    
     def update_stock_price(self, stock_id: int, price: float):
         """更新股票价格"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # 更新当前价格
@@ -161,7 +179,7 @@ class StockMonitorDatabase:
     
     def update_last_checked(self, stock_id: int):
         """仅更新最后检查时间（用于获取失败的情况）"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -175,7 +193,7 @@ class StockMonitorDatabase:
     
     def has_recent_notification(self, stock_id: int, notification_type: str, minutes: int = 60) -> bool:
         """检查是否在最近X分钟内已有相同类型的通知"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -191,7 +209,7 @@ class StockMonitorDatabase:
     
     def add_notification(self, stock_id: int, notification_type: str, message: str):
         """添加提醒记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -204,7 +222,7 @@ class StockMonitorDatabase:
     
     def get_pending_notifications(self) -> List[Dict]:
         """获取待发送的提醒"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -232,7 +250,7 @@ class StockMonitorDatabase:
     
     def get_all_recent_notifications(self, limit: int = 10) -> List[Dict]:
         """获取最近的所有通知（包括已发送和未发送的）"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -261,7 +279,7 @@ class StockMonitorDatabase:
     
     def mark_notification_sent(self, notification_id: int):
         """标记提醒已发送"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -273,7 +291,7 @@ class StockMonitorDatabase:
     
     def mark_all_notifications_sent(self):
         """标记所有通知为已读"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('UPDATE notifications SET sent = TRUE WHERE sent = FALSE')
@@ -285,7 +303,7 @@ class StockMonitorDatabase:
     
     def clear_all_notifications(self):
         """清空所有通知"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM notifications')
@@ -298,7 +316,7 @@ class StockMonitorDatabase:
     def remove_monitored_stock(self, stock_id: int):
         """移除监测股票"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # 删除相关记录
@@ -310,6 +328,8 @@ class StockMonitorDatabase:
             conn.commit()
             conn.close()
             
+            if affected_rows > 0:
+                self._notify_change('removed', stock_id)
             return affected_rows > 0
         except Exception as e:
             print(f"删除股票失败: {e}")
@@ -321,7 +341,7 @@ class StockMonitorDatabase:
                               quant_enabled: bool = None,
                               quant_config: Dict = None):
         """更新监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         if quant_enabled is not None and quant_config is not None:
@@ -346,11 +366,13 @@ class StockMonitorDatabase:
         conn.commit()
         conn.close()
         
+        if cursor.rowcount > 0:
+            self._notify_change('updated', stock_id)
         return cursor.rowcount > 0
     
     def toggle_notification(self, stock_id: int, enabled: bool):
         """切换通知状态"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -366,7 +388,7 @@ class StockMonitorDatabase:
     
     def get_stock_by_id(self, stock_id: int) -> Optional[Dict]:
         """根据ID获取股票信息"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -405,6 +427,35 @@ class StockMonitorDatabase:
             }
         return None
     
+    def get_stocks_by_ids(self, stock_ids: List[int]) -> List[Dict]:
+        """
+        按ID批量获取监测股票（一次查询）
+        
+        Args:
+            stock_ids: 股票ID列表
+        
+        Returns:
+            监测股票信息列表（字段同 get_monitored_stocks），不存在的ID被忽略
+        """
+        if not stock_ids:
+            return []
+        
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        placeholders = ','.join('?' * len(stock_ids))
+        cursor.execute(f'''
+            SELECT id, symbol, name, rating, entry_range, take_profit, stop_loss,
+                   current_price, last_checked, check_interval, notification_enabled,
+                   quant_enabled, quant_config, created_at, updated_at
+            FROM monitored_stocks
+            WHERE id IN ({placeholders})
+        ''', list(stock_ids))
+        
+        stocks = [self._parse_stock_row(row) for row in cursor.fetchall()]
+        conn.close()
+        return stocks
+    
     def get_monitor_by_code(self, symbol: str) -> Optional[Dict]:
         """
         根据股票代码获取监测信息
@@ -415,7 +466,7 @@ class StockMonitorDatabase:
         Returns:
             监测股票信息字典，不存在则返回None
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -0,0 +1,109 @@
+"""
+监测股票到期队列
+按下次检查时间维护一个最小堆，监测循环只在最早的股票到期时醒来，
+股票新增、修改、删除时直接更新队列，无需每轮全表扫描。
+"""
+
+import heapq
+import threading
+import time
+from typing import List, Optional
+
+
+class DueTimeQueue:
+    """以下次检查时间为键的优先队列（线程安全）"""
+
+    def __init__(self):
+        # 堆元素为 (到期时间戳, 股票ID)；重新调度时旧元素留在堆中，出堆时按 _due_at 判断是否过期
+        self._heap = []
+        self._due_at = {}
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._due_at)
+
+    def schedule(self, stock_id: int, due_at: float):
+        """
+        设置（或更新）股票的下次检查时间
+
+        Args:
+            stock_id: 监测股票ID
+            due_at: 到期时间戳（time.time() 口径）
+        """
+        with self._cond:
+            self._due_at[stock_id] = due_at
+            heapq.heappush(self._heap, (due_at, stock_id))
+            self._cond.notify_all()
+
+    def remove(self, stock_id: int):
+        """移除股票（堆中的旧元素在出堆时丢弃）"""
+        with self._cond:
+            if self._due_at.pop(stock_id, None) is not None:
+                self._cond.notify_all()
+
+    def clear(self):
+        """清空队列"""
+        with self._cond:
+            self._heap = []
+            self._due_at = {}
+            self._cond.notify_all()
+
+    def next_due(self) -> Optional[float]:
+        """最早的到期时间戳，队列为空时返回None"""
+        with self._cond:
+            return self._peek_locked()
+
+    def pop_due(self, now: float = None) -> List[int]:
+        """取出所有已到期的股票ID（按到期先后）"""
+        with self._cond:
+            return self._pop_due_locked(time.time() if now is None else now)
+
+    def wait_due(self, max_wait: float = None) -> List[int]:
+        """
+        阻塞到最早的股票到期、队列变化或超过 max_wait，然后取出已到期的股票ID
+
+        Args:
+            max_wait: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            list: 已到期的股票ID；因队列变化或超时提前返回时可能为空
+        """
+        with self._cond:
+            now = time.time()
+            due = self._pop_due_locked(now)
+            if due:
+                return due
+
+            next_due = self._peek_locked()
+            timeout = None if next_due is None else max(next_due - now, 0)
+            if max_wait is not None:
+                timeout = max_wait if timeout is None else min(timeout, max_wait)
+            self._cond.wait(timeout)
+            return self._pop_due_locked(time.time())
+
+    def wake(self):
+        """唤醒正在等待的线程（如停止服务时）"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _peek_locked(self) -> Optional[float]:
+        """丢弃堆顶的过期元素并返回最早到期时间（调用方需持有锁）"""
+        while self._heap:
+            due_at, stock_id = self._heap[0]
+            if self._due_at.get(stock_id) == due_at:
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due_locked(self, now: float) -> List[int]:
+        """取出所有到期元素（调用方需持有锁）"""
+        due = []
+        while True:
+            due_at = self._peek_locked()
+            if due_at is None or due_at > now:
+                break
+            _, stock_id = heapq.heappop(self._heap)
+            del self._due_at[stock_id]
+            due.append(stock_id)
+        return due
@@ -1,12 +1,15 @@
 import time
 import threading
 import schedule
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from typing import Dict, List
 import streamlit as st
 
+import config
 from monitor_db import monitor_db
 from stock_data import StockDataFetcher
+from market_snapshot import market_snapshot
+from monitor_due_queue import DueTimeQueue
 from miniqmt_interface import miniqmt, get_miniqmt_status
 from notification_service import notification_service
 
@@ -17,12 +20,17 @@ class StockMonitorService:
         self.fetcher = StockDataFetcher()
         self.running = False
         self.thread = None
+        # 按下次检查时间排序的到期队列，股票增删改时由数据库监听器同步更新
+        self.due_queue = DueTimeQueue()
+        self._last_resync = 0.0
+        monitor_db.add_change_listener(self._on_stock_changed)
     
     def start_monitoring(self):
         """启动监测服务"""
         if self.running:
             return
         
+        self._load_schedule()
         self.running = True
         self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
@@ -31,42 +39,148 @@ class StockMonitorService:
     def stop_monitoring(self):
         """停止监测服务"""
         self.running = False
+        self.due_queue.wake()
         if self.thread:
             self.thread.join(timeout=5)
         st.info("⏹️ 监测服务已停止")
     
     def _monitor_loop(self):
-        """监测循环"""
+        """监测循环：休眠到最早的股票到期时醒来，只处理到期的股票"""
         print("监测服务已启动")
         while self.running:
             try:
-                self._check_all_stocks()
-                # 根据最小监测间隔决定循环间隔，最少5分钟检查一次
-                time.sleep(300)  # 每5分钟检查一次
+                # 定期全量重建队列，兼容其他进程直接修改数据库的情况
+                if time.time() - self._last_resync >= config.MONITOR_RESYNC_INTERVAL:
+                    self._load_schedule()
+                
+                wait_limit = max(self._last_resync + config.MONITOR_RESYNC_INTERVAL - time.time(), 1)
+                due_ids = self.due_queue.wait_due(max_wait=wait_limit)
+                if due_ids and self.running:
+                    self._check_due_stocks(due_ids)
             except Exception as e:
                 print(f"监测服务错误: {e}")
                 time.sleep(60)  # 错误后等待1分钟再重试
     
-    def _check_all_stocks(self):
-        """检查所有监测股票"""
+    def _load_schedule(self):
+        """全量加载监测股票，按 last_checked + check_interval 计算各自的到期时间"""
         stocks = monitor_db.get_monitored_stocks()
-        current_time = datetime.now()
+        self.due_queue.clear()
+        for stock in stocks:
+            self.due_queue.schedule(stock['id'], self._next_due_at(stock))
+        self._last_resync = time.time()
+        print(f"监测队列已加载 {len(stocks)} 只股票")
+    
+    def _on_stock_changed(self, action: str, stock_id: int):
+        """监测股票新增/修改/删除时同步更新到期队列"""
+        if action == 'removed':
+            self.due_queue.remove(stock_id)
+            return
+        stock = monitor_db.get_stock_by_id(stock_id)
+        if stock:
+            self.due_queue.schedule(stock_id, self._next_due_at(stock))
+    
+    def _check_due_stocks(self, stock_ids: List[int]):
+        """刷新到期股票的价格并检查触发条件，完成后重新排入队列"""
+        stocks = monitor_db.get_stocks_by_ids(stock_ids)
+        if not stocks:
+            return
+        
+        try:
+            if config.MONITOR_BATCH_REFRESH:
+                updated_count = self._refresh_stocks_batch(stocks)
+            else:
+                updated_count = self._refresh_stocks_one_by_one(stocks)
+        finally:
+            # 无论成功与否都按各自的检查间隔重新排队，避免失败的股票被反复立即重试
+            now = time.time()
+            for stock in stocks:
+                self.due_queue.schedule(stock['id'], now + self._check_interval_seconds(stock))
+        
+        if updated_count > 0:
+            print(f"✅ 本轮共更新了 {updated_count} 只股票")
+    
+    @staticmethod
+    def _check_interval_seconds(stock: Dict) -> float:
+        """股票的检查间隔（check_interval 以分钟为单位）"""
+        return (stock.get('check_interval') or 30) * 60
+    
+    def _next_due_at(self, stock: Dict) -> float:
+        """计算股票的下次检查时间戳，从未检查过的股票立即到期"""
+        last_checked = stock.get('last_checked')
+        if not last_checked:
+            return time.time()
+        try:
+            # last_checked 由SQLite的CURRENT_TIMESTAMP写入，为UTC时间
+            checked_at = datetime.fromisoformat(str(last_checked)).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            return time.time()
+        return checked_at + self._check_interval_seconds(stock)
+    
+    def _refresh_stocks_batch(self, stocks: List[Dict]) -> int:
+        """
+        批量刷新：一次获取全市场行情快照，为所有到期股票定价后统一检查触发条件
+        
+        快照中没有的股票（如美股/港股或快照获取失败）回退到逐只获取
+        
+        Returns:
+            int: 本轮更新的股票数量
+        """
+        a_share_symbols = [stock['symbol'] for stock in stocks
+                           if str(stock['symbol']).isdigit() and len(str(stock['symbol'])) == 6]
+        quotes = market_snapshot.get_quotes(a_share_symbols) if a_share_symbols else {}
+        print(f"📊 批量刷新 {len(stocks)} 只股票，行情快照命中 {len(quotes)} 只")
+        
+        priced = []
+        fallback = []
+        for stock in stocks:
+            quote = quotes.get(stock['symbol'])
+            current_price = self._price_from_quote(quote)
+            if current_price is None:
+                fallback.append(stock)
+                continue
+            try:
+                # 更新数据库（包括更新last_checked时间）
+                monitor_db.update_stock_price(stock['id'], current_price)
+                priced.append((stock, current_price))
+            except Exception as e:
+                print(f"❌ 更新股票 {stock['symbol']} 价格失败: {e}")
+        
+        # 所有股票定价完成后统一检查触发条件
+        for stock, current_price in priced:
+            try:
+                self._check_trigger_conditions(stock, current_price)
+            except Exception as e:
+                print(f"❌ 检查股票 {stock['symbol']} 触发条件失败: {e}")
         
+        updated_count = len(priced)
+        if fallback:
+            print(f"⚠️ {len(fallback)} 只股票不在行情快照中，逐只获取")
+            updated_count += self._refresh_stocks_one_by_one(fallback)
+        return updated_count
+    
+    @staticmethod
+    def _price_from_quote(quote):
+        """从行情快照行中提取最新价，无效时返回None"""
+        if quote is None:
+            return None
+        try:
+            price = float(quote.get('最新价'))
+        except (TypeError, ValueError):
+            return None
+        # 停牌等情况最新价为空或0
+        if price != price or price <= 0:
+            return None
+        return price
+    
+    def _refresh_stocks_one_by_one(self, stocks: List[Dict]) -> int:
+        """
+        逐只刷新股票价格（每只股票单独请求，请求之间限流）
+        
+        Returns:
+            int: 本轮更新的股票数量
+        """
         updated_count = 0
         for stock in stocks:
-            # 检查是否需要更新价格
-            last_checked = stock.get('last_checked')
-            check_interval = stock.get('check_interval', 30)
-            
-            if last_checked:
-                last_checked_dt = datetime.fromisoformat(last_checked)
-                next_check = last_checked_dt + timedelta(minutes=check_interval)
-                if current_time < next_check:
-                    # 显示距离下次检查的时间
-                    time_left = (next_check - current_time).total_seconds() / 60
-                    print(f"股票 {stock['symbol']} 距离下次检查还有 {time_left:.1f} 分钟")
-                    continue
-            
             try:
                 print(f"正在更新股票 {stock['symbol']} 的价格...")
                 self._update_stock_price(stock)
@@ -78,9 +192,7 @@ class StockMonitorService:
             except Exception as e:
                 print(f"❌ 更新股票 {stock['symbol']} 价格失败: {e}")
                 time.sleep(3)  # 失败后也等待3秒再继续
-        
-        if updated_count > 0:
-            print(f"✅ 本轮共更新了 {updated_count} 只股票")
+        return updated_count
     
     def _update_stock_price(self, stock: Dict):
         """更新股票价格并检查条件"""
@@ -218,32 +330,31 @@ class StockMonitorService:
     def get_stocks_needing_update(self) -> List[Dict]:
         """获取需要更新价格的股票"""
         stocks = monitor_db.get_monitored_stocks()
-        current_time = datetime.now()
-        need_update = []
-        
-        for stock in stocks:
-            last_checked = stock.get('last_checked')
-            check_interval = stock.get('check_interval', 30)
-            
-            if not last_checked:
-                need_update.append(stock)
-                continue
-            
-            last_checked_dt = datetime.fromisoformat(last_checked)
-            next_check = last_checked_dt + timedelta(minutes=check_interval)
-            if current_time >= next_check:
-                need_update.append(stock)
-        
-        return need_update
+        now = time.time()
+        return [stock for stock in stocks if self._next_due_at(stock) <= now]
     
     def manual_update_stock(self, stock_id: int):
         """手动更新股票价格"""
         stock = monitor_db.get_stock_by_id(stock_id)
         if stock:
             self._update_stock_price(stock)
+            self.due_queue.schedule(stock_id, time.time() + self._check_interval_seconds(stock))
             return True
         return False
     
+    def manual_update_stocks(self, stocks: List[Dict]) -> int:
+        """手动批量更新股票价格（批量模式下共用一次行情快照）"""
+        if not stocks:
+            return 0
+        if config.MONITOR_BATCH_REFRESH:
+            updated_count = self._refresh_stocks_batch(stocks)
+        else:
+            updated_count = self._refresh_stocks_one_by_one(stocks)
+        now = time.time()
+        for stock in stocks:
+            self.due_queue.schedule(stock['id'], now + self._check_interval_seconds(stock))
+        return updated_count
+    
     def get_scheduler(self):
         """获取调度器实例"""
         from monitor_scheduler import get_scheduler
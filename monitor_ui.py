@@ -25,8 +25,7 @@ def display_monitor_panel():
     with col3:
         if st.button("🔄 手动更新所有"):
             stocks = monitor_service.get_stocks_needing_update()
-            for stock in stocks:
-                monitor_service.manual_update_stock(stock['id'])
+            monitor_service.manual_update_stocks(stocks)
             st.success(f"✅ 已手动更新 {len(stocks)} 只股票")
     
     with col4:
@@ -5,6 +5,7 @@
 """
 
 import sqlite3
+import sqlite_pool
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import os
@@ -28,7 +29,7 @@ class PortfolioDB:
     
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
         return conn
     
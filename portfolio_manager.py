@@ -121,7 +121,7 @@ class PortfolioManager:
     # ==================== 单只股票分析 ====================
     
     def analyze_single_stock(self, stock_code: str, period="1y", 
-                            selected_agents: List[str] = None) -> Dict:
+                            selected_agents: List[str] = None, prepared_data=None) -> Dict:
         """
         分析单只股票（复用app.py中的分析逻辑）
         
@@ -129,6 +129,7 @@ class PortfolioManager:
             stock_code: 股票代码
             period: 数据周期
             selected_agents: 选中的分析师列表
+            prepared_data: 批量分析时预先准备的股票数据（见 app.prepare_batch_stock_data）
             
         Returns:
             分析结果字典
@@ -166,7 +167,8 @@ class PortfolioManager:
                 symbol=stock_code,
                 period=period,
                 enabled_analysts_config=enabled_analysts_config,
-                selected_model=self.model
+                selected_model=self.model,
+                prepared_data=prepared_data
             )
             
             # 检查结果
@@ -189,6 +191,15 @@ class PortfolioManager:
     
     # ==================== 批量分析 ====================
     
+    def _prepare_batch_data(self, stock_codes: List[str], period: str) -> Dict:
+        """批量准备股票数据（失败时返回空字典，分析时逐只获取）"""
+        try:
+            from app import prepare_batch_stock_data
+            return prepare_batch_stock_data(stock_codes, period)
+        except Exception as e:
+            print(f"[WARN] 批量准备股票数据失败，改为逐只获取: {str(e)}")
+            return {}
+    
     def batch_analyze_sequential(self, stock_codes: List[str], period="1y",
                                  selected_agents: List[str] = None,
                                  progress_callback=None) -> Dict:
@@ -212,6 +223,9 @@ class PortfolioManager:
         results = []
         failed = []
         
+        # 预先获取所有股票数据，技术指标一次性批量计算
+        prepared = self._prepare_batch_data(stock_codes, period)
+        
         for i, code in enumerate(stock_codes, 1):
             print(f"\n--- 分析进度: {i}/{len(stock_codes)} ---")
             
@@ -219,7 +233,7 @@ class PortfolioManager:
                 progress_callback(i, len(stock_codes), code, "analyzing")
             
             try:
-                result = self.analyze_single_stock(code, period, selected_agents)
+                result = self.analyze_single_stock(code, period, selected_agents, prepared.get(code))
                 
                 if result.get("success"):
                     results.append({
@@ -289,10 +303,14 @@ class PortfolioManager:
         failed = []
         completed = 0
         
+        # 预先获取所有股票数据，技术指标一次性批量计算
+        prepared = self._prepare_batch_data(stock_codes, period)
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # 提交所有任务
             future_to_code = {
-                executor.submit(self.analyze_single_stock, code, period, selected_agents): code
+                executor.submit(self.analyze_single_stock, code, period, selected_agents,
+                                prepared.get(code)): code
                 for code in stock_codes
             }
             
@@ -0,0 +1,277 @@
+"""
+提示词压缩模块
+估算提示词的token数，并把表格数据压缩到指定的token预算内：
+剔除空列、提取常量列、数值取整（大额换算为万/亿），超出预算时只保留部分行并附上全量统计摘要。
+代码、日期类列按原值输出，不做数值换算。
+"""
+
+import math
+import numbers
+import re
+from typing import Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+import config
+
+# DeepSeek官方估算：1个中文字符约0.6个token，1个英文字符约0.3个token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+CJK_TOKEN_RATIO = 0.6
+OTHER_TOKEN_RATIO = 0.3
+
+# 代码、日期类列（按列名识别），取值按原样输出，不参与数值换算和统计
+_IDENTIFIER_COLUMN = re.compile(r'代码|日期|时间|报告期|年份|季度|^(ts_)?code$|^symbol$|^rq$|^gpdm$|(date|time)$',
+                                re.IGNORECASE)
+
+# 数值文本列中表示缺失的占位符
+_MISSING_TEXT = {'', '-', '--', 'None', 'none', 'nan', 'NaN', 'N/A'}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 估算的token数（向上取整）
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return int(math.ceil(cjk * CJK_TOKEN_RATIO + (len(text) - cjk) * OTHER_TOKEN_RATIO))
+
+
+def get_token_budget(section: str) -> int:
+    """获取某类数据的token预算（见 config.PROMPT_TOKEN_BUDGETS）"""
+    return config.PROMPT_TOKEN_BUDGETS.get(section, config.PROMPT_TOKEN_BUDGETS['default'])
+
+
+def format_number(value, digits: int = 2) -> str:
+    """
+    数值压缩显示：大额换算为万/亿，其余保留指定小数位
+
+    Args:
+        value: 数值（非数值原样转为字符串）
+        digits: 小数位数
+
+    Returns:
+        str: 格式化后的文本
+    """
+    if value is None or isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, numbers.Number):
+        try:
+            if pd.isna(value):
+                return "-"
+        except (TypeError, ValueError):
+            pass
+        return str(value)
+    if pd.isna(value):
+        return "-"
+
+    abs_value = abs(value)
+    if abs_value >= 1e8:
+        return f"{value / 1e8:.{digits}f}亿"
+    if abs_value >= 1e4:
+        return f"{value / 1e4:.{digits}f}万"
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.{digits}f}"
+
+
+def is_identifier_column(column) -> bool:
+    """是否为代码、日期类列（按列名判断）"""
+    return bool(_IDENTIFIER_COLUMN.search(str(column)))
+
+
+def _coerce_numeric(series: pd.Series) -> pd.Series:
+    """
+    把以文本保存的数值列转换为数值类型
+
+    只有全部非空取值都能解析为数值（允许千分位逗号和缺失占位符）时才转换，否则原样返回
+    """
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    text = series.dropna().astype(str).str.strip()
+    text = text[~text.isin(_MISSING_TEXT)].str.replace(',', '', regex=False)
+    if text.empty or pd.to_numeric(text, errors='coerce').isna().any():
+        return series
+    return pd.to_numeric(series.astype(str).str.strip().str.replace(',', '', regex=False), errors='coerce')
+
+
+def _format_cell(value, digits: int, max_text_len: int, raw: bool = False) -> str:
+    """格式化单元格：数值取整，长文本截断；raw 为 True 时数值按原值输出（代码、日期）"""
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        if raw:
+            if pd.isna(value):
+                return "-"
+            return str(int(value)) if float(value).is_integer() else str(value)
+        return format_number(value, digits)
+    if value is None:
+        return "-"
+    try:
+        if pd.isna(value):
+            return "-"
+    except (TypeError, ValueError):
+        pass
+    text = str(value).replace("\n", " ").strip()
+    if len(text) > max_text_len:
+        text = text[:max_text_len] + "…"
+    return text or "-"
+
+
+def summarize_numeric(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                      digits: int = 2) -> List[str]:
+    """
+    数值列统计摘要（合计/均值/最小/最大），用于替代被省略的明细行
+
+    Returns:
+        list: 每个数值列一行摘要文本
+    """
+    lines = []
+    columns = columns if columns is not None else df.columns
+    for col in columns:
+        series = pd.to_numeric(df[col], errors='coerce').dropna()
+        if series.empty:
+            continue
+        lines.append(
+            f"  {col}: 合计{format_number(series.sum(), digits)} "
+            f"均值{format_number(series.mean(), digits)} "
+            f"最小{format_number(series.min(), digits)} "
+            f"最大{format_number(series.max(), digits)}"
+        )
+    return lines
+
+
+def compact_table(data, columns: Optional[Iterable[str]] = None, max_tokens: Optional[int] = None,
+                  max_rows: Optional[int] = None, digits: int = 2, max_text_len: int = 80,
+                  summary_columns: Optional[Sequence[str]] = None, min_rows: int = 0) -> str:
+    """
+    把表格数据压缩为紧凑文本
+
+    处理步骤：
+      1. 列裁剪：只保留指定列，剔除全空列，取值完全相同的列提取为一行“共同字段”
+      2. 数值取整：以文本保存的数值先转为数值，大额换算为万/亿，小数保留 digits 位；代码、日期列保持原值
+      3. 行裁剪：超出 max_rows 或 token预算时保留前若干行，并附上全部行的数值统计摘要
+
+    Args:
+        data: DataFrame 或字典列表（行顺序即保留的优先顺序）
+        columns: 保留的列（按此顺序），默认全部
+        max_tokens: token预算，默认不限制
+        max_rows: 最多显示的明细行数，默认不限制
+        digits: 小数位数
+        max_text_len: 文本单元格最大长度
+        summary_columns: 参与统计摘要的列，默认全部数值列（代码、日期列除外）
+        min_rows: 至少保留的明细行数，预算不足时这些行可超出 max_tokens
+
+    Returns:
+        str: 压缩后的文本
+    """
+    df = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data or []))
+    if df.empty:
+        return "暂无数据"
+
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    df = df.dropna(axis=1, how='all')
+    if df.empty or len(df.columns) == 0:
+        return "暂无数据"
+
+    raw_cols = {col for col in df.columns if is_identifier_column(col)}
+    for col in df.columns:
+        if col not in raw_cols:
+            df[col] = _coerce_numeric(df[col])
+
+    lines = []
+    total_rows = len(df)
+
+    # 常量列只输出一次
+    if total_rows > 1:
+        constant_cols = [col for col in df.columns
+                         if df[col].astype(str).nunique(dropna=False) == 1]
+        if constant_cols and len(constant_cols) < len(df.columns):
+            shared = [f"{col}={_format_cell(df[col].iloc[0], digits, max_text_len, col in raw_cols)}"
+                      for col in constant_cols]
+            lines.append(f"共同字段: {', '.join(shared)}")
+            df = df.drop(columns=constant_cols)
+
+    header = " | ".join(str(col) for col in df.columns)
+    raw_flags = [col in raw_cols for col in df.columns]
+    rows = [" | ".join(_format_cell(value, digits, max_text_len, raw)
+                       for value, raw in zip(record, raw_flags))
+            for record in df.itertuples(index=False, name=None)]
+
+    def fits(count, extra_lines):
+        if max_tokens is None:
+            return True
+        text = "\n".join(lines + [header] + rows[:count] + extra_lines)
+        return estimate_tokens(text) <= max_tokens
+
+    limit = min(max_rows, total_rows) if max_rows is not None else total_rows
+    tail_lines = []
+    if limit < total_rows or not fits(limit, []):
+        # 明细放不下：先为统计摘要预留空间，再尽量多保留靠前的行
+        numeric_cols = summary_columns if summary_columns is not None else [
+            col for col in df.columns
+            if col not in raw_cols and pd.api.types.is_numeric_dtype(df[col])
+        ]
+        summary = summarize_numeric(df, [col for col in numeric_cols if col in df.columns], digits)
+
+        def tail_for(count):
+            tail = [f"... 其余 {total_rows - count} 行已省略（共 {total_rows} 行）"]
+            if summary:
+                tail.append(f"全部 {total_rows} 行统计:")
+                tail.extend(summary)
+            return tail
+
+        # 二分查找预算内可保留的最多行数（不少于 min_rows）
+        floor = min(max(min_rows, 0), limit)
+        low, high = floor, limit
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid, tail_for(mid)):
+                low = mid
+            else:
+                high = mid - 1
+        limit = low
+        tail_lines = tail_for(limit)
+
+    lines.append(header)
+    lines.extend(rows[:limit])
+    lines.extend(tail_lines)
+
+    text = "\n".join(lines)
+    if max_tokens is None or (tail_lines and limit <= min_rows):
+        # 保底行数已超出预算时不再截断，避免只剩截断说明
+        return text
+    return fit_to_budget(text, max_tokens)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    按行截断文本使其不超过token预算
+
+    Args:
+        text: 文本
+        max_tokens: token预算
+
+    Returns:
+        str: 截断后的文本（发生截断时末尾附说明）
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    marker = "...（内容过长，已按长度限制截断）"
+    budget = max_tokens - estimate_tokens(marker)
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    kept.append(marker)
+    return "\n".join(kept)
@@ -130,16 +130,13 @@ class QStockNewsDataFetcher:
             # 方法2: 如果没有获取到，尝试获取新浪财经新闻
             if not news_items:
                 try:
-                    # stock_zh_a_spot_em() - 获取股票信息，包含代码和名称
-                    df_info = ak.stock_zh_a_spot_em()
-                    
-                    # 查找股票名称
+                    # 从共享的全市场行情快照中查找股票名称
+                    from market_snapshot import market_snapshot
                     stock_name = None
-                    if df_info is not None and not df_info.empty:
-                        match = df_info[df_info['代码'] == symbol]
-                        if not match.empty:
-                            stock_name = match.iloc[0]['名称']
-                            print(f"   找到股票名称: {stock_name}")
+                    row = market_snapshot.get_quote(symbol)
+                    if row is not None:
+                        stock_name = row['名称']
+                        print(f"   找到股票名称: {stock_name}")
                     
                     # 使用股票名称搜索新闻
                     if stock_name:
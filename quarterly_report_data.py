@@ -9,6 +9,7 @@ import io
 import warnings
 from datetime import datetime
 import akshare as ak
+from prompt_compactor import compact_table, get_token_budget
 
 warnings.filterwarnings('ignore')
 
@@ -283,13 +284,24 @@ class QuarterlyReportDataFetcher:
             print(f"   获取财务指标异常: {e}")
             return None
     
-    def format_quarterly_reports_for_ai(self, data):
+    def format_quarterly_reports_for_ai(self, data, max_tokens=None):
         """
         将季报数据格式化为适合AI阅读的文本
+        
+        Args:
+            data: get_quarterly_reports 返回的数据
+            max_tokens: 各报表明细的总token预算，默认读取 config.PROMPT_TOKEN_BUDGETS['quarterly']，
+                由已获取的报表平均分配
         """
         if not data or not data.get("data_success"):
             return "未能获取季报数据"
         
+        if max_tokens is None:
+            max_tokens = get_token_budget('quarterly')
+        sections = [key for key in ("income_statement", "balance_sheet", "cash_flow", "financial_indicators")
+                    if data.get(key)]
+        section_budget = max_tokens // max(len(sections), 1)
+        
         text_parts = []
         text_parts.append(f"""
 【季度财务报告数据 - akshare数据源】
@@ -312,17 +324,10 @@ class QuarterlyReportDataFetcher:
                          '利润总额', '净利润', '归属于母公司所有者的净利润', 
                          '基本每股收益', '稀释每股收益']
             
-            for idx, item in enumerate(income_data.get('data', []), 1):
-                text_parts.append(f"\n第 {idx} 期:")
-                for field in key_fields:
-                    if field in item:
-                        text_parts.append(f"  {field}: {item[field]}")
-                
-                # 显示其他重要字段（如果有）
-                other_fields = ['销售费用', '管理费用', '财务费用', '研发费用']
-                for field in other_fields:
-                    if field in item:
-                        text_parts.append(f"  {field}: {item[field]}")
+            other_fields = ['销售费用', '管理费用', '财务费用', '研发费用']
+            text_parts.append(compact_table(income_data.get('data', []),
+                                            columns=key_fields + other_fields,
+                                            max_tokens=section_budget))
         
         # 资产负债表数据
         if data.get("balance_sheet"):
@@ -339,11 +344,8 @@ class QuarterlyReportDataFetcher:
                          '负债合计', '流动负债合计', '非流动负债合计',
                          '所有者权益合计', '归属于母公司股东权益合计']
             
-            for idx, item in enumerate(balance_data.get('data', []), 1):
-                text_parts.append(f"\n第 {idx} 期:")
-                for field in key_fields:
-                    if field in item:
-                        text_parts.append(f"  {field}: {item[field]}")
+            text_parts.append(compact_table(balance_data.get('data', []), columns=key_fields,
+                                            max_tokens=section_budget))
         
         # 现金流量表数据
         if data.get("cash_flow"):
@@ -360,11 +362,8 @@ class QuarterlyReportDataFetcher:
                          '投资活动产生的现金流量净额', '筹资活动产生的现金流量净额',
                          '现金及现金等价物净增加额', '期末现金及现金等价物余额']
             
-            for idx, item in enumerate(cash_flow_data.get('data', []), 1):
-                text_parts.append(f"\n第 {idx} 期:")
-                for field in key_fields:
-                    if field in item:
-                        text_parts.append(f"  {field}: {item[field]}")
+            text_parts.append(compact_table(cash_flow_data.get('data', []), columns=key_fields,
+                                            max_tokens=section_budget))
         
         # 财务指标数据
         if data.get("financial_indicators"):
@@ -382,11 +381,8 @@ class QuarterlyReportDataFetcher:
                          '应收账款周转率', '存货周转率', '总资产周转率',
                          '每股收益', '每股净资产', '每股经营现金流']
             
-            for idx, item in enumerate(indicators_data.get('data', []), 1):
-                text_parts.append(f"\n第 {idx} 期:")
-                for field in key_fields:
-                    if field in item:
-                        text_parts.append(f"  {field}: {item[field]}")
+            text_parts.append(compact_table(indicators_data.get('data', []), columns=key_fields,
+                                            max_tokens=section_budget))
         
         return "\n".join(text_parts)
 
@@ -0,0 +1,270 @@
+"""
+分析报告全文检索
+基于SQLite FTS5，为各数据库的报告表建立 <表名>_fts 全文索引，写入报告时同步维护：
+- 中文按相邻两字切分后交给 unicode61 分词器，支持任意长度的中文词检索（单字按前缀匹配）
+- 索引为 contentless 表，不重复保存报告正文；摘要片段只对命中的前N条报告解压生成
+- 当前SQLite未编译FTS5时索引和检索自动停用，检索返回空列表
+"""
+
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import blob_store
+
+# 中日韩统一表意文字
+_CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+# 每批回填/读取的行数
+_BATCH = 200
+
+# 历史页面检索的时间范围选项（天数，None 表示不限）
+SEARCH_RANGES = {"全部时间": None, "近7天": 7, "近30天": 30, "近90天": 90, "近一年": 365}
+
+
+def _fts5_available() -> bool:
+    """检测SQLite是否支持FTS5"""
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE VIRTUAL TABLE probe USING fts5(body)')
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+
+def tokenize(text: str) -> str:
+    """中文连续片段切分为相邻两字（单字保留），其余文本原样交给FTS分词器"""
+    def bigrams(match):
+        run = match.group(0)
+        if len(run) == 1:
+            return f' {run} '
+        return ' ' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + ' '
+    return _CJK_RUN.sub(bigrams, text)
+
+
+def extract_text(value) -> str:
+    """
+    提取字段中的可检索文本
+
+    JSON字符串先解析再递归取出所有字符串值（不含键名），其他文本原样返回
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return value
+        if isinstance(parsed, str):
+            return parsed
+        value = parsed
+
+    parts = []
+
+    def walk(item):
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, dict):
+            for child in item.values():
+                walk(child)
+        elif isinstance(item, (list, tuple)):
+            for child in item:
+                walk(child)
+        elif item is not None:
+            parts.append(str(item))
+
+    walk(value)
+    return '\n'.join(parts)
+
+
+def build_query(query: str) -> str:
+    """
+    将用户输入转换为FTS5查询表达式
+
+    空格分隔的多个词取交集；每个词按与索引相同的方式切分后作为短语匹配
+    """
+    terms = []
+    for term in query.split():
+        tokens = tokenize(term).split()
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(tokens).replace('"', '""') + '"'
+        # 单个中文字只能按前缀匹配两字切分后的词
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _CJK_RUN.fullmatch(tokens[0]):
+            phrase += '*'
+        terms.append(phrase)
+    return ' AND '.join(terms)
+
+
+def range_start(days: Optional[int]) -> Optional[str]:
+    """时间范围的起始日期（YYYY-MM-DD），days 为 None 时返回 None"""
+    if days is None:
+        return None
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def make_snippet(text: str, query: str, width: int = 60) -> str:
+    """
+    截取命中词附近的文本片段，命中词用 ** 标出
+
+    Args:
+        text: 报告文本
+        query: 用户输入的检索词
+        width: 命中词前后保留的字符数
+    """
+    text = re.sub(r'\s+', ' ', text)
+    terms = [term for term in query.split() if term]
+    lowered = text.lower()
+    positions = [(lowered.find(term.lower()), term) for term in terms]
+    positions = [(pos, term) for pos, term in positions if pos >= 0]
+    if not positions:
+        return text[:width * 2] + ('...' if len(text) > width * 2 else '')
+
+    pos, _ = min(positions)
+    start = max(0, pos - width)
+    end = min(len(text), pos + width)
+    snippet = text[start:end]
+    for term in terms:
+        snippet = re.sub(re.escape(term), lambda m: f'**{m.group(0)}**', snippet, flags=re.IGNORECASE)
+    return ('...' if start > 0 else '') + snippet + ('...' if end < len(text) else '')
+
+
+class ReportIndex:
+    """单个报告表的全文索引（行ID即报告表的 id）"""
+
+    def __init__(self, table: str, columns: Sequence[str], blob_columns: Sequence[str] = ()):
+        """
+        Args:
+            table: 报告表名
+            columns: 参与检索的列
+            blob_columns: 其中压缩存储在 blob_store 的列
+        """
+        self.table = table
+        self.fts_table = f'{table}_fts'
+        self.columns = list(columns)
+        self.blob_columns = list(blob_columns)
+
+    def _document(self, values: Iterable) -> str:
+        """拼接各列的可检索文本"""
+        return '\n'.join(text for text in (extract_text(value) for value in values) if text)
+
+    def _load_documents(self, cursor: sqlite3.Cursor, where: str, params=()) -> Dict[int, str]:
+        """读取报告表中符合条件的行并拼接为检索文本 {id: 文本}"""
+        refs = [blob_store.blob_column(column) for column in self.blob_columns]
+        select = ['id'] + self.columns + refs
+        cursor.execute(f"SELECT {', '.join(select)} FROM {self.table} WHERE {where}", params)
+        rows = [dict(zip(select, row)) for row in cursor.fetchall()]
+        blob_store.inflate(cursor, rows, self.blob_columns)
+        return {row['id']: self._document(row[column] for column in self.columns) for row in rows}
+
+    def ensure(self, conn: sqlite3.Connection) -> bool:
+        """
+        创建全文索引表；首次创建时在同一事务中为已有报告建立索引
+
+        Returns:
+            bool: 索引是否可用
+        """
+        if not FTS5_AVAILABLE:
+            print(f"[全文检索] ⚠️ 当前SQLite不支持FTS5，{self.table} 检索已停用")
+            return False
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.fts_table,))
+        if cursor.fetchone():
+            return True
+
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute(f"CREATE VIRTUAL TABLE {self.fts_table} USING fts5(body, content='')")
+            last_id = 0
+            indexed = 0
+            while True:
+                documents = self._load_documents(cursor, f'id > ? ORDER BY id LIMIT {_BATCH}', (last_id,))
+                if not documents:
+                    break
+                cursor.executemany(
+                    f'INSERT INTO {self.fts_table} (rowid, body) VALUES (?, ?)',
+                    [(row_id, tokenize(text)) for row_id, text in documents.items()]
+                )
+                indexed += len(documents)
+                last_id = max(documents)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if indexed:
+            print(f"[全文检索] {self.table}: 已为 {indexed} 份报告建立索引")
+        return True
+
+    def add(self, cursor: sqlite3.Cursor, row_id: int, values: Sequence):
+        """
+        索引新写入的报告（与报告写入处于同一事务）
+
+        Args:
+            cursor: 数据库游标
+            row_id: 报告ID
+            values: 与 columns 一一对应的原始值（与写入报告表的值相同）
+        """
+        if not FTS5_AVAILABLE:
+            return
+        cursor.execute(
+            f'INSERT INTO {self.fts_table} (rowid, body) VALUES (?, ?)',
+            (row_id, tokenize(self._document(values)))
+        )
+
+    def remove(self, cursor: sqlite3.Cursor, where: str, params=()):
+        """从索引中删除符合条件的报告（在删除报告行之前调用）"""
+        if not FTS5_AVAILABLE:
+            return
+        documents = self._load_documents(cursor, where, params)
+        # contentless 表删除时需提供与写入时相同的文本
+        cursor.executemany(
+            f"INSERT INTO {self.fts_table} ({self.fts_table}, rowid, body) VALUES ('delete', ?, ?)",
+            [(row_id, tokenize(text)) for row_id, text in documents.items()]
+        )
+
+    def search(self, cursor: sqlite3.Cursor, query: str, columns: Sequence[str], limit: int = 20,
+               where: str = '', params=()) -> List[Dict]:
+        """
+        全文检索，按相关度（BM25）排序
+
+        Args:
+            cursor: 数据库游标
+            query: 检索词，多个词用空格分隔（同时包含）
+            columns: 返回的报告表摘要列
+            limit: 返回条数
+            where: 附加过滤条件（报告表别名为 t）
+            params: 附加过滤条件的参数
+
+        Returns:
+            list: 摘要字典列表，额外包含 rank（越小越相关）和 snippet（命中片段）
+        """
+        match = build_query(query or '')
+        if not FTS5_AVAILABLE or not match:
+            return []
+
+        select = ', '.join(f't.{column}' for column in columns)
+        cursor.execute(f'''
+            SELECT {select}, bm25({self.fts_table}) AS rank
+            FROM {self.fts_table} JOIN {self.table} t ON t.id = {self.fts_table}.rowid
+            WHERE {self.fts_table} MATCH ? {f'AND {where}' if where else ''}
+            ORDER BY rank
+            LIMIT ?
+        ''', [match, *params, limit])
+        hits = [dict(zip(list(columns) + ['rank'], row)) for row in cursor.fetchall()]
+        if not hits:
+            return hits
+
+        # 只为命中的报告解压正文生成片段
+        ids = [hit['id'] for hit in hits]
+        documents = self._load_documents(cursor, f"id IN ({', '.join('?' * len(ids))})", ids)
+        for hit in hits:
+            hit['snippet'] = make_snippet(documents.get(hit['id'], ''), query)
+        return hits
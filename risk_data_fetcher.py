@@ -13,6 +13,8 @@ import time
 import warnings
 import os
 
+from prompt_compactor import compact_table, get_token_budget
+
 # 屏蔽pywencai的Node.js警告信息（不影响功能）
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 os.environ['PYTHONWARNINGS'] = 'ignore::DeprecationWarning'
@@ -331,11 +333,24 @@ class RiskDataFetcher:
             print(f"   转换DataFrame时出错: {str(e)}")
             return None
     
-    def format_risk_data_for_ai(self, risk_data: Dict[str, Any]) -> str:
-        """格式化风险数据供AI分析使用 - 直接转换DataFrame为字符串"""
+    def format_risk_data_for_ai(self, risk_data: Dict[str, Any], max_tokens: int = None) -> str:
+        """
+        格式化风险数据供AI分析使用 - 各类数据压缩为紧凑表格
+        
+        Args:
+            risk_data: get_risk_data 返回的数据
+            max_tokens: 明细数据的总token预算，默认读取 config.PROMPT_TOKEN_BUDGETS['risk']，
+                由已获取的数据类型平均分配
+        """
         if not risk_data or not risk_data.get('data_success'):
             return "未获取到风险数据"
         
+        if max_tokens is None:
+            max_tokens = get_token_budget('risk')
+        available = [key for key in ('lifting_ban', 'shareholder_reduction', 'important_events')
+                     if (risk_data.get(key) or {}).get('has_data')]
+        section_budget = max_tokens // max(len(available), 1)
+        
         formatted_text = []
         
         try:
@@ -348,12 +363,10 @@ class RiskDataFetcher:
                 formatted_text.append(f"查询语句: {lifting_ban.get('query', '')}")
                 formatted_text.append("")
                 
-                # 直接将DataFrame转换为字符串（最多50行）
+                # 压缩为紧凑表格（最多50行，且不超过该类数据的token预算）
                 df = lifting_ban.get('data')
                 try:
-                    df_str = df.head(50).to_string(index=False, max_rows=50, max_cols=20)
-                    formatted_text.append(f"共 {len(df)} 条记录，显示前50条：")
-                    formatted_text.append(df_str)
+                    formatted_text.append(self._format_dataframe_for_ai(df, "限售解禁", section_budget))
                 except Exception as e:
                     formatted_text.append(f"数据转换失败: {str(e)}")
                 formatted_text.append("")
@@ -367,12 +380,10 @@ class RiskDataFetcher:
                 formatted_text.append(f"查询语句: {reduction.get('query', '')}")
                 formatted_text.append("")
                 
-                # 直接将DataFrame转换为字符串（最多50行）
+                # 压缩为紧凑表格（最多50行，且不超过该类数据的token预算）
                 df = reduction.get('data')
                 try:
-                    df_str = df.head(50).to_string(index=False, max_rows=50, max_cols=20)
-                    formatted_text.append(f"共 {len(df)} 条记录，显示前50条：")
-                    formatted_text.append(df_str)
+                    formatted_text.append(self._format_dataframe_for_ai(df, "大股东减持", section_budget))
                 except Exception as e:
                     formatted_text.append(f"数据转换失败: {str(e)}")
                 formatted_text.append("")
@@ -386,12 +397,10 @@ class RiskDataFetcher:
                 formatted_text.append(f"查询语句: {events.get('query', '')}")
                 formatted_text.append("")
                 
-                # 直接将DataFrame转换为字符串（最多50行）
+                # 压缩为紧凑表格（最多50行，且不超过该类数据的token预算）
                 df = events.get('data')
                 try:
-                    df_str = df.head(50).to_string(index=False, max_rows=50, max_cols=20)
-                    formatted_text.append(f"共 {len(df)} 条记录，显示前50条：")
-                    formatted_text.append(df_str)
+                    formatted_text.append(self._format_dataframe_for_ai(df, "重要事件", section_budget))
                 except Exception as e:
                     formatted_text.append(f"数据转换失败: {str(e)}")
                 formatted_text.append("")
@@ -404,47 +413,14 @@ class RiskDataFetcher:
             traceback.print_exc()
             return f"格式化风险数据时出错: {str(e)}"
     
-    def _format_dataframe_for_ai(self, df: pd.DataFrame, data_type: str) -> str:
-        """将DataFrame格式化为AI易读的文本格式"""
-        lines = []
-        
-        # 显示数据总数
-        lines.append(f"共 {len(df)} 条{data_type}记录")
-        lines.append("")
-        
-        # 显示列名
-        lines.append(f"数据字段：{', '.join(df.columns.tolist())}")
-        lines.append("")
-        
-        # 逐行显示数据（最多显示50条，避免数据过大）
-        max_rows = min(50, len(df))
-        
-        for idx, row in df.head(max_rows).iterrows():
-            lines.append(f"【记录 {idx + 1}】")
-            
-            # 显示每个字段的值
-            for col in df.columns:
-                value = row[col]
-                
-                # 处理不同类型的值
-                if pd.isna(value):
-                    value_str = "无数据"
-                elif isinstance(value, (int, float)):
-                    value_str = str(value)
-                else:
-                    value_str = str(value)
-                    # 限制过长的字符串
-                    if len(value_str) > 200:
-                        value_str = value_str[:200] + "..."
-                
-                lines.append(f"  {col}: {value_str}")
-            
-            lines.append("")
-        
-        if len(df) > max_rows:
-            lines.append(f"... 还有 {len(df) - max_rows} 条记录（已省略）")
-            lines.append("")
+    def _format_dataframe_for_ai(self, df: pd.DataFrame, data_type: str, max_tokens: int = None) -> str:
+        """
+        将DataFrame压缩为AI易读的紧凑表格
         
+        剔除空列、合并取值相同的列、数值取整，最多50行；超出token预算时只保留靠前的记录并附统计摘要
+        """
+        lines = [f"共 {len(df)} 条{data_type}记录"]
+        lines.append(compact_table(df, max_tokens=max_tokens, max_rows=50, max_text_len=200))
         return "\n".join(lines)
 
 
@@ -12,6 +12,8 @@ import logging
 import os
 from dotenv import load_dotenv
 from sector_strategy_db import SectorStrategyDatabase
+from market_snapshot import market_snapshot
+from prompt_compactor import fit_to_budget, get_token_budget
 
 # 加载环境变量
 load_dotenv()
@@ -233,24 +235,20 @@ class SectorStrategyDataFetcher:
             
             # 涨跌家数
             try:
-                df_stat = self._safe_request(ak.stock_zh_a_spot_em)
-                if df_stat is not None and not df_stat.empty:
-                    total_count = len(df_stat)
-                    up_count = len(df_stat[df_stat['涨跌幅'] > 0])
-                    down_count = len(df_stat[df_stat['涨跌幅'] < 0])
-                    flat_count = total_count - up_count - down_count
+                breadth = market_snapshot.get_market_breadth()
+                if breadth:
+                    total_count = breadth["total_count"]
+                    up_count = breadth["up_count"]
                     
                     overview["total_stocks"] = total_count
                     overview["up_count"] = up_count
-                    overview["down_count"] = down_count
-                    overview["flat_count"] = flat_count
+                    overview["down_count"] = breadth["down_count"]
+                    overview["flat_count"] = breadth["flat_count"]
                     overview["up_ratio"] = round(up_count / total_count * 100, 2) if total_count > 0 else 0
                     
                     # 涨停跌停
-                    limit_up = len(df_stat[df_stat['涨跌幅'] >= 9.5])
-                    limit_down = len(df_stat[df_stat['涨跌幅'] <= -9.5])
-                    overview["limit_up"] = limit_up
-                    overview["limit_down"] = limit_down
+                    overview["limit_up"] = breadth["limit_up"]
+                    overview["limit_down"] = breadth["limit_down"]
             except:
                 pass
             
@@ -429,9 +427,14 @@ class SectorStrategyDataFetcher:
             print(f"    获取财经新闻失败: {e}")
             return []
     
-    def format_data_for_ai(self, data):
+    def format_data_for_ai(self, data, max_tokens=None):
         """
         将数据格式化为适合AI分析的文本格式
+        
+        Args:
+            data: 市场数据
+            max_tokens: token预算，默认读取 config.PROMPT_TOKEN_BUDGETS['sector']；
+                超出时从末尾（新闻等次要内容）开始截断
         """
         if not data.get("success"):
             return "数据获取失败"
@@ -531,7 +534,9 @@ class SectorStrategyDataFetcher:
                 if news.get('content') and len(news['content']) > 100:
                     text_parts.append(f"   {news['content'][:100]}...")
         
-        return "\n".join(text_parts)
+        if max_tokens is None:
+            max_tokens = get_token_budget('sector')
+        return fit_to_budget("\n".join(text_parts), max_tokens)
     
     def _save_raw_data_to_db(self, data):
         """保存原始数据到数据库"""
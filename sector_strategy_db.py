@@ -3,7 +3,9 @@
 用于存储板块策略历史数据和分析报告
 """
 
-import sqlite3
+import sqlite_pool
+import blob_store
+import report_search
 from datetime import datetime
 import json
 import pandas as pd
@@ -13,6 +15,48 @@ import logging
 class SectorStrategyDatabase:
     """智策板块数据库管理类"""
     
+    # sector_raw_data 的数值列
+    SECTOR_VALUE_COLUMNS = ['price', 'change_pct', 'volume', 'turnover', 'market_cap', 'pe_ratio', 'pb_ratio']
+    
+    # 各数据类型写入 sector_raw_data 的列映射：目标列 -> 源列候选（取第一个存在的列），未列出的数值列固定为0
+    SECTOR_COLUMN_MAPS = {
+        'sector_data': {
+            'sector_code': ['sector_code'], 'sector_name': ['sector_name'],
+            'price': ['price'], 'change_pct': ['change_pct'], 'volume': ['volume'], 'turnover': ['turnover'],
+            'market_cap': ['market_cap'], 'pe_ratio': ['pe_ratio'], 'pb_ratio': ['pb_ratio'],
+        },
+        'sector': {
+            'sector_code': ['板块代码', 'sector_code'], 'sector_name': ['板块名称', 'sector_name'],
+            'price': ['最新价', 'price'], 'change_pct': ['涨跌幅', 'change_pct'], 'volume': ['成交量', 'volume'],
+            'turnover': ['成交额', 'turnover'], 'market_cap': ['总市值', 'market_cap'],
+            'pe_ratio': ['市盈率', 'pe_ratio'], 'pb_ratio': ['市净率', 'pb_ratio'],
+        },
+        'fund_flow': {
+            'sector_code': ['行业'], 'sector_name': ['行业'],
+            'price': ['主力净流入-净额'], 'change_pct': ['主力净流入-净占比'],
+            'volume': ['超大单净流入-净额'], 'turnover': ['超大单净流入-净占比'],
+            'market_cap': ['大单净流入-净额'], 'pe_ratio': ['大单净流入-净占比'],
+        },
+        'market_overview': {
+            'sector_code': ['名称'], 'sector_name': ['名称'],
+            'price': ['最新价'], 'change_pct': ['涨跌幅'], 'volume': ['成交量'], 'turnover': ['成交额'],
+        },
+        'north_fund': {
+            'sector_code': ['代码'], 'sector_name': ['名称'],
+            'price': ['收盘价'], 'change_pct': ['涨跌幅'], 'volume': ['持股数量'],
+            'turnover': ['持股市值'], 'market_cap': ['持股变化'],
+        },
+    }
+    
+    # 分析报告列表的摘要列（不含报告正文）
+    REPORT_SUMMARY_COLUMNS = [
+        'id', 'analysis_date', 'data_date_range', 'recommended_sectors', 'summary',
+        'confidence_score', 'risk_level', 'investment_horizon', 'market_outlook', 'created_at'
+    ]
+    
+    # 分析报告全文检索索引（摘要 + 报告正文）
+    REPORT_INDEX = report_search.ReportIndex('sector_analysis_reports', ['summary', 'analysis_content'], ['analysis_content'])
+    
     def __init__(self, db_path='sector_strategy.db'):
         """
         初始化数据库
@@ -29,7 +73,19 @@ class SectorStrategyDatabase:
     
     def get_connection(self):
         """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        return sqlite_pool.connect(self.db_path)
+    
+    def get_bulk_connection(self):
+        """
+        获取批量写入用的独立数据库连接（降低同步级别、临时数据放内存、加大页缓存）
+        
+        不使用缓存连接，这些设置随连接关闭失效，不影响之后的普通查询
+        """
+        conn = sqlite_pool.connect_dedicated(self.db_path)
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA cache_size = -65536')  # 64MB
+        return conn
     
     def init_database(self):
         """初始化数据库表"""
@@ -142,6 +198,10 @@ class SectorStrategyDatabase:
         ''')
         
         conn.commit()
+        
+        # 分析报告正文压缩存储
+        blob_store.ensure_schema(conn, 'sector_analysis_reports', ['analysis_content'])
+        self.REPORT_INDEX.ensure(conn)
         conn.close()
         
         self.logger.info("[智策板块] 数据库初始化完成")
@@ -159,10 +219,13 @@ class SectorStrategyDatabase:
         Returns:
             int: 数据版本号
         """
-        conn = self.get_connection()
+        conn = self.get_bulk_connection()
         cursor = conn.cursor()
         
         try:
+            # 版本号查询与数据写入在同一事务内，避免并发保存时分配到相同版本号
+            conn.execute('BEGIN IMMEDIATE')
+            
             # 获取或生成版本号
             if version is None:
                 cursor.execute('''
@@ -173,20 +236,23 @@ class SectorStrategyDatabase:
                 version = cursor.fetchone()[0]
             
             # 保存数据
+            rejected = 0
             if data_type == 'sector_data':
-                self._save_sector_data(cursor, data_date, data_df, version)
+                rejected = self._save_sector_data(cursor, data_date, data_df, version)
             elif data_type == 'news_data':
                 self._save_news_data(cursor, data_date, data_df, version)
+            saved = len(data_df) - rejected
             
             # 记录版本信息
             cursor.execute('''
             INSERT OR REPLACE INTO data_versions 
             (data_type, data_date, version, status, fetch_success, record_count)
             VALUES (?, ?, ?, 'active', 1, ?)
-            ''', (data_type, data_date, version, len(data_df)))
+            ''', (data_type, data_date, version, saved))
             
             conn.commit()
-            self.logger.info(f"[智策板块] 保存{data_type}数据成功 (日期: {data_date}, 版本: {version}, 记录数: {len(data_df)})")
+            self.logger.info(f"[智策板块] 保存{data_type}数据成功 (日期: {data_date}, 版本: {version}, 记录数: {saved}"
+                             f"{f', 拒绝: {rejected}' if rejected else ''})")
             return version
             
         except Exception as e:
@@ -203,37 +269,81 @@ class SectorStrategyDatabase:
         finally:
             conn.close()
     
+    def _build_sector_rows(self, data_date, data_df, column_map, data_type, version):
+        """
+        按列映射把DataFrame整体转换为 sector_raw_data 的行元组
+        
+        数值列统一转换为浮点数，空值记为0；有值但无法转换为数值的行被拒绝。
+        
+        Args:
+            data_date: 数据日期
+            data_df: 数据DataFrame
+            column_map: SECTOR_COLUMN_MAPS 中的列映射
+            data_type: 写入的数据类型
+            version: 数据版本号
+            
+        Returns:
+            tuple: (行元组列表, 被拒绝的行数)
+        """
+        def pick(candidates):
+            for col in candidates:
+                if col in data_df.columns:
+                    return data_df[col]
+            return None
+        
+        count = len(data_df)
+        texts = []
+        for col in ('sector_code', 'sector_name'):
+            source = pick(column_map.get(col, []))
+            texts.append([str(v) for v in source.tolist()] if source is not None else [''] * count)
+        
+        valid = pd.Series(True, index=data_df.index)
+        values = []
+        for col in self.SECTOR_VALUE_COLUMNS:
+            source = pick(column_map.get(col, []))
+            if source is None:
+                values.append([0.0] * count)
+                continue
+            numeric = pd.to_numeric(source, errors='coerce')
+            valid &= ~(source.notna() & numeric.isna())
+            values.append(numeric.fillna(0).astype(float).tolist())
+        
+        rows = [
+            (data_date, *row, data_type, version)
+            for row, ok in zip(zip(*texts, *values), valid.tolist()) if ok
+        ]
+        return rows, count - len(rows)
+    
+    def _insert_sector_rows(self, cursor, rows):
+        """批量写入 sector_raw_data"""
+        cursor.executemany('''
+        INSERT OR REPLACE INTO sector_raw_data 
+        (data_date, sector_code, sector_name, price, change_pct, volume, 
+         turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    
+    def _insert_news_rows(self, cursor, rows):
+        """批量写入 sector_news_data"""
+        cursor.executemany('''
+        INSERT OR REPLACE INTO sector_news_data 
+        (news_date, title, content, source, url, related_sectors, 
+         sentiment_score, importance_score, data_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    
     def _save_sector_data(self, cursor, data_date, data_df, version):
-        """保存板块数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_raw_data 
-            (data_date, sector_code, sector_name, price, change_pct, volume, 
-             turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'sector_data', ?)
-            ''', (
-                data_date,
-                row.get('sector_code', ''),
-                row.get('sector_name', ''),
-                row.get('price', 0),
-                row.get('change_pct', 0),
-                row.get('volume', 0),
-                row.get('turnover', 0),
-                row.get('market_cap', 0),
-                row.get('pe_ratio', 0),
-                row.get('pb_ratio', 0),
-                version
-            ))
+        """保存板块数据，返回被拒绝的行数"""
+        rows, rejected = self._build_sector_rows(
+            data_date, data_df, self.SECTOR_COLUMN_MAPS['sector_data'], 'sector_data', version
+        )
+        self._insert_sector_rows(cursor, rows)
+        return rejected
     
     def _save_news_data(self, cursor, data_date, data_df, version):
         """保存新闻数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_news_data 
-            (news_date, title, content, source, url, related_sectors, 
-             sentiment_score, importance_score, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        self._insert_news_rows(cursor, [
+            (
                 data_date,
                 row.get('title', ''),
                 row.get('content', ''),
@@ -243,7 +353,9 @@ class SectorStrategyDatabase:
                 row.get('sentiment_score', 0),
                 row.get('importance_score', 0),
                 version
-            ))
+            )
+            for row in data_df.to_dict('records')
+        ])
     
     def get_latest_data(self, data_type, data_date=None):
         """
@@ -336,16 +448,18 @@ class SectorStrategyDatabase:
         # 如果传入的是字典，转换为JSON字符串
         if isinstance(analysis_content, dict):
             analysis_content = json.dumps(analysis_content, ensure_ascii=False, indent=2)
+        content_inline, content_blob = blob_store.store(cursor, analysis_content)
         
         cursor.execute('''
         INSERT INTO sector_analysis_reports 
-        (analysis_date, data_date_range, analysis_content, recommended_sectors, 
+        (analysis_date, data_date_range, analysis_content, analysis_content_blob, recommended_sectors, 
          summary, confidence_score, risk_level, investment_horizon, market_outlook)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             data_date_range,
-            analysis_content,
+            content_inline,
+            content_blob,
             json.dumps(recommended_sectors, ensure_ascii=False),
             summary,
             confidence_score,
@@ -355,6 +469,7 @@ class SectorStrategyDatabase:
         ))
         
         report_id = cursor.lastrowid
+        self.REPORT_INDEX.add(cursor, report_id, [summary, analysis_content])
         
         conn.commit()
         conn.close()
@@ -370,12 +485,13 @@ class SectorStrategyDatabase:
             limit: 返回数量
             
         Returns:
-            pd.DataFrame: 报告列表
+            pd.DataFrame: 报告列表（摘要字段，正文通过 get_analysis_report 获取）
         """
         conn = self.get_connection()
         
-        query = '''
-        SELECT * FROM sector_analysis_reports
+        query = f'''
+        SELECT {', '.join(self.REPORT_SUMMARY_COLUMNS)}
+        FROM sector_analysis_reports
         ORDER BY created_at DESC
         LIMIT ?
         '''
@@ -385,6 +501,36 @@ class SectorStrategyDatabase:
         
         return df
     
+    def search_analysis_reports(self, query, limit=20, since=None, until=None):
+        """
+        全文检索板块分析报告（摘要和报告正文）
+        
+        Args:
+            query: 检索词，多个词用空格分隔
+            limit: 返回条数
+            since: 起始日期（含），格式 YYYY-MM-DD
+            until: 截止日期（含），格式 YYYY-MM-DD
+        
+        Returns:
+            list: 按相关度排序的摘要记录，额外包含 rank 和 snippet
+        """
+        conditions = []
+        params = []
+        if since:
+            conditions.append('substr(t.created_at, 1, 10) >= ?')
+            params.append(since)
+        if until:
+            conditions.append('substr(t.created_at, 1, 10) <= ?')
+            params.append(until)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        hits = self.REPORT_INDEX.search(cursor, query, self.REPORT_SUMMARY_COLUMNS, limit, ' AND '.join(conditions), params)
+        conn.close()
+        
+        return hits
+    
     def get_analysis_report(self, report_id):
         """
         获取单个分析报告详情
@@ -404,10 +550,10 @@ class SectorStrategyDatabase:
         
         row = cursor.fetchone()
         columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        report = blob_store.inflate(cursor, [dict(zip(columns, row))], ['analysis_content'])[0] if row else None
         conn.close()
         
         if row:
-            report = dict(zip(columns, row))
             
             # 解析JSON字段
             try:
@@ -439,7 +585,9 @@ class SectorStrategyDatabase:
             # 删除相关的追踪记录
             cursor.execute('DELETE FROM sector_tracking WHERE analysis_id = ?', (report_id,))
             
-            # 删除报告
+            # 删除报告及其正文
+            self.REPORT_INDEX.remove(cursor, 'id = ?', (report_id,))
+            blob_store.delete_refs(cursor, 'sector_analysis_reports', ['analysis_content'], 'id = ?', (report_id,))
             cursor.execute('DELETE FROM sector_analysis_reports WHERE id = ?', (report_id,))
             
             deleted_count = cursor.rowcount
@@ -505,7 +653,7 @@ class SectorStrategyDatabase:
             self.logger.warning(f"[智策板块] {data_type}数据为空，跳过保存")
             return
         
-        conn = self.get_connection()
+        conn = self.get_bulk_connection()
         cursor = conn.cursor()
         
         try:
@@ -513,26 +661,29 @@ class SectorStrategyDatabase:
             version = self._get_next_version(data_date, data_type)
             
             # 根据数据类型保存数据
+            rejected = 0
             if data_type in ['industry', 'concept']:
-                self._save_sector_data_raw(cursor, data_date, data_df, data_type, version)
+                rejected = self._save_sector_data_raw(cursor, data_date, data_df, data_type, version)
             elif data_type == 'fund_flow':
-                self._save_fund_flow_data(cursor, data_date, data_df, version)
+                rejected = self._save_fund_flow_data(cursor, data_date, data_df, version)
             elif data_type == 'market_overview':
-                self._save_market_overview_data(cursor, data_date, data_df, version)
+                rejected = self._save_market_overview_data(cursor, data_date, data_df, version)
             elif data_type == 'north_fund':
-                self._save_north_fund_data(cursor, data_date, data_df, version)
+                rejected = self._save_north_fund_data(cursor, data_date, data_df, version)
             elif data_type == 'news':
                 self._save_news_data_raw(cursor, data_date, data_df, version)
+            saved = len(data_df) - rejected
             
             # 记录版本信息
             cursor.execute('''
             INSERT OR REPLACE INTO data_versions 
             (data_date, data_type, version, fetch_success, record_count)
             VALUES (?, ?, ?, 1, ?)
-            ''', (data_date, data_type, version, len(data_df)))
+            ''', (data_date, data_type, version, saved))
             
             conn.commit()
-            self.logger.info(f"[智策板块] {data_type}数据保存成功 (日期: {data_date}, 版本: {version}, 记录数: {len(data_df)})")
+            self.logger.info(f"[智策板块] {data_type}数据保存成功 (日期: {data_date}, 版本: {version}, 记录数: {saved}"
+                             f"{f', 拒绝: {rejected}' if rejected else ''})")
             
         except Exception as e:
             conn.rollback()
@@ -542,100 +693,41 @@ class SectorStrategyDatabase:
             conn.close()
     
     def _save_sector_data_raw(self, cursor, data_date, data_df, data_type, version):
-        """保存板块原始数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_raw_data 
-            (data_date, sector_code, sector_name, price, change_pct, volume, 
-             turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data_date,
-                str(row.get('板块代码', row.get('sector_code', ''))),
-                str(row.get('板块名称', row.get('sector_name', ''))),
-                float(row.get('最新价', row.get('price', 0))) if pd.notna(row.get('最新价', row.get('price', 0))) else 0,
-                float(row.get('涨跌幅', row.get('change_pct', 0))) if pd.notna(row.get('涨跌幅', row.get('change_pct', 0))) else 0,
-                float(row.get('成交量', row.get('volume', 0))) if pd.notna(row.get('成交量', row.get('volume', 0))) else 0,
-                float(row.get('成交额', row.get('turnover', 0))) if pd.notna(row.get('成交额', row.get('turnover', 0))) else 0,
-                float(row.get('总市值', row.get('market_cap', 0))) if pd.notna(row.get('总市值', row.get('market_cap', 0))) else 0,
-                float(row.get('市盈率', row.get('pe_ratio', 0))) if pd.notna(row.get('市盈率', row.get('pe_ratio', 0))) else 0,
-                float(row.get('市净率', row.get('pb_ratio', 0))) if pd.notna(row.get('市净率', row.get('pb_ratio', 0))) else 0,
-                data_type,
-                version
-            ))
+        """保存板块原始数据，返回被拒绝的行数"""
+        rows, rejected = self._build_sector_rows(
+            data_date, data_df, self.SECTOR_COLUMN_MAPS['sector'], data_type, version
+        )
+        self._insert_sector_rows(cursor, rows)
+        return rejected
     
     def _save_fund_flow_data(self, cursor, data_date, data_df, version):
-        """保存资金流向数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_raw_data 
-            (data_date, sector_code, sector_name, price, change_pct, volume, 
-             turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'fund_flow', ?)
-            ''', (
-                data_date,
-                str(row.get('行业', '')),
-                str(row.get('行业', '')),
-                float(row.get('主力净流入-净额', 0)) if pd.notna(row.get('主力净流入-净额', 0)) else 0,
-                float(row.get('主力净流入-净占比', 0)) if pd.notna(row.get('主力净流入-净占比', 0)) else 0,
-                float(row.get('超大单净流入-净额', 0)) if pd.notna(row.get('超大单净流入-净额', 0)) else 0,
-                float(row.get('超大单净流入-净占比', 0)) if pd.notna(row.get('超大单净流入-净占比', 0)) else 0,
-                float(row.get('大单净流入-净额', 0)) if pd.notna(row.get('大单净流入-净额', 0)) else 0,
-                float(row.get('大单净流入-净占比', 0)) if pd.notna(row.get('大单净流入-净占比', 0)) else 0,
-                0,
-                version
-            ))
+        """保存资金流向数据，返回被拒绝的行数"""
+        rows, rejected = self._build_sector_rows(
+            data_date, data_df, self.SECTOR_COLUMN_MAPS['fund_flow'], 'fund_flow', version
+        )
+        self._insert_sector_rows(cursor, rows)
+        return rejected
     
     def _save_market_overview_data(self, cursor, data_date, data_df, version):
-        """保存市场概况数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_raw_data 
-            (data_date, sector_code, sector_name, price, change_pct, volume, 
-             turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'market_overview', ?)
-            ''', (
-                data_date,
-                str(row.get('名称', '')),
-                str(row.get('名称', '')),
-                float(row.get('最新价', 0)) if pd.notna(row.get('最新价', 0)) else 0,
-                float(row.get('涨跌幅', 0)) if pd.notna(row.get('涨跌幅', 0)) else 0,
-                float(row.get('成交量', 0)) if pd.notna(row.get('成交量', 0)) else 0,
-                float(row.get('成交额', 0)) if pd.notna(row.get('成交额', 0)) else 0,
-                0, 0, 0,
-                version
-            ))
+        """保存市场概况数据，返回被拒绝的行数"""
+        rows, rejected = self._build_sector_rows(
+            data_date, data_df, self.SECTOR_COLUMN_MAPS['market_overview'], 'market_overview', version
+        )
+        self._insert_sector_rows(cursor, rows)
+        return rejected
     
     def _save_north_fund_data(self, cursor, data_date, data_df, version):
-        """保存北向资金数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_raw_data 
-            (data_date, sector_code, sector_name, price, change_pct, volume, 
-             turnover, market_cap, pe_ratio, pb_ratio, data_type, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'north_fund', ?)
-            ''', (
-                data_date,
-                str(row.get('代码', '')),
-                str(row.get('名称', '')),
-                float(row.get('收盘价', 0)) if pd.notna(row.get('收盘价', 0)) else 0,
-                float(row.get('涨跌幅', 0)) if pd.notna(row.get('涨跌幅', 0)) else 0,
-                float(row.get('持股数量', 0)) if pd.notna(row.get('持股数量', 0)) else 0,
-                float(row.get('持股市值', 0)) if pd.notna(row.get('持股市值', 0)) else 0,
-                float(row.get('持股变化', 0)) if pd.notna(row.get('持股变化', 0)) else 0,
-                0, 0,
-                version
-            ))
+        """保存北向资金数据，返回被拒绝的行数"""
+        rows, rejected = self._build_sector_rows(
+            data_date, data_df, self.SECTOR_COLUMN_MAPS['north_fund'], 'north_fund', version
+        )
+        self._insert_sector_rows(cursor, rows)
+        return rejected
     
     def _save_news_data_raw(self, cursor, data_date, data_df, version):
         """保存新闻数据"""
-        for _, row in data_df.iterrows():
-            cursor.execute('''
-            INSERT OR REPLACE INTO sector_news_data 
-            (news_date, title, content, source, url, related_sectors, 
-             sentiment_score, importance_score, data_version)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        self._insert_news_rows(cursor, [
+            (
                 data_date,
                 str(row.get('新闻标题', row.get('title', ''))),
                 str(row.get('新闻内容', row.get('content', ''))),
@@ -645,7 +737,9 @@ class SectorStrategyDatabase:
                 0,  # 暂时为0
                 0,  # 暂时为0
                 version
-            ))
+            )
+            for row in data_df.to_dict('records')
+        ])
 
     def cleanup_old_data(self, data_type, keep_days=30):
         """
@@ -709,30 +803,30 @@ class SectorStrategyDatabase:
             self.logger.warning("[智策板块] 新闻列表为空，跳过保存")
             return 0
 
-        conn = self.get_connection()
+        conn = self.get_bulk_connection()
         cursor = conn.cursor()
         try:
             # 版本号按日期累加
             version = self._get_next_version(news_date, 'news')
-            inserted = 0
+            rows = []
+            rejected = 0
             for item in news_list:
-                cursor.execute('''
-                INSERT OR REPLACE INTO sector_news_data 
-                (news_date, title, content, source, url, related_sectors, 
-                 sentiment_score, importance_score, data_version)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    str(news_date),
-                    str(item.get('title', '')),
-                    str(item.get('content', '')),
-                    str(item.get('source', source)),
-                    str(item.get('url', '')),
-                    json.dumps(item.get('related_sectors', []), ensure_ascii=False),
-                    float(item.get('sentiment_score', 0) or 0),
-                    float(item.get('importance_score', 0) or 0),
-                    version
-                ))
-                inserted += 1
+                try:
+                    rows.append((
+                        str(news_date),
+                        str(item.get('title', '')),
+                        str(item.get('content', '')),
+                        str(item.get('source', source)),
+                        str(item.get('url', '')),
+                        json.dumps(item.get('related_sectors', []), ensure_ascii=False),
+                        float(item.get('sentiment_score', 0) or 0),
+                        float(item.get('importance_score', 0) or 0),
+                        version
+                    ))
+                except (TypeError, ValueError):
+                    rejected += 1
+            self._insert_news_rows(cursor, rows)
+            inserted = len(rows)
 
             # 记录版本信息
             cursor.execute('''
@@ -742,7 +836,8 @@ class SectorStrategyDatabase:
             ''', (str(news_date), 'news', version, inserted))
 
             conn.commit()
-            self.logger.info(f"[智策板块] 保存新闻数据成功 (日期: {news_date}, 版本: {version}, 记录数: {inserted})")
+            self.logger.info(f"[智策板块] 保存新闻数据成功 (日期: {news_date}, 版本: {version}, 记录数: {inserted}"
+                             f"{f', 拒绝: {rejected}' if rejected else ''})")
             return inserted
         except Exception as e:
             conn.rollback()
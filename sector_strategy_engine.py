@@ -5,8 +5,9 @@
 
 from sector_strategy_agents import SectorStrategyAgents
 from sector_strategy_db import SectorStrategyDatabase
-from deepseek_client import DeepSeekClient
-from typing import Dict, Any
+from deepseek_client import DeepSeekClient, stream_to
+from typing import Callable, Dict, Any, Optional
+from contextlib import nullcontext
 import time
 import json
 import pandas as pd
@@ -95,12 +96,22 @@ class SectorStrategyEngine:
             self.logger.error(f"[智策引擎] 获取{data_type}数据失败: {e}")
             return pd.DataFrame(), True, str(e)
     
-    def run_comprehensive_analysis(self, data: Dict) -> Dict[str, Any]:
+    @staticmethod
+    def _stream_scope(stream_callback, agent_key: str):
+        """为单个分析环节开启流式输出（未提供回调时不做任何处理）"""
+        if stream_callback is None:
+            return nullcontext()
+        return stream_to(lambda text: stream_callback(agent_key, text))
+    
+    def run_comprehensive_analysis(self, data: Dict,
+                                   stream_callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
         """
         运行综合分析流程
         
         Args:
             data: 包含市场数据的字典
+            stream_callback: 流式输出回调，参数为 (分析师key, 截至当前的报告文本)，
+                综合研判的key为 "comprehensive"
             
         Returns:
             完整的分析结果
@@ -126,37 +137,41 @@ class SectorStrategyEngine:
             
             # 宏观策略师
             print("1/4 宏观策略师...")
-            macro_result = self.agents.macro_strategist_agent(
-                market_data=data.get("market_overview", {}),
-                news_data=data.get("news", [])
-            )
+            with self._stream_scope(stream_callback, "macro"):
+                macro_result = self.agents.macro_strategist_agent(
+                    market_data=data.get("market_overview", {}),
+                    news_data=data.get("news", [])
+                )
             agents_results["macro"] = macro_result
             
             # 板块诊断师
             print("2/4 板块诊断师...")
-            sector_result = self.agents.sector_diagnostician_agent(
-                sectors_data=data.get("sectors", {}),
-                concepts_data=data.get("concepts", {}),
-                market_data=data.get("market_overview", {})
-            )
+            with self._stream_scope(stream_callback, "sector"):
+                sector_result = self.agents.sector_diagnostician_agent(
+                    sectors_data=data.get("sectors", {}),
+                    concepts_data=data.get("concepts", {}),
+                    market_data=data.get("market_overview", {})
+                )
             agents_results["sector"] = sector_result
             
             # 资金流向分析师
             print("3/4 资金流向分析师...")
-            fund_result = self.agents.fund_flow_analyst_agent(
-                fund_flow_data=data.get("sector_fund_flow", {}),
-                north_flow_data=data.get("north_flow", {}),
-                sectors_data=data.get("sectors", {})
-            )
+            with self._stream_scope(stream_callback, "fund"):
+                fund_result = self.agents.fund_flow_analyst_agent(
+                    fund_flow_data=data.get("sector_fund_flow", {}),
+                    north_flow_data=data.get("north_flow", {}),
+                    sectors_data=data.get("sectors", {})
+                )
             agents_results["fund"] = fund_result
             
             # 市场情绪解码员
             print("4/4 市场情绪解码员...")
-            sentiment_result = self.agents.market_sentiment_decoder_agent(
-                market_data=data.get("market_overview", {}),
-                sectors_data=data.get("sectors", {}),
-                concepts_data=data.get("concepts", {})
-            )
+            with self._stream_scope(stream_callback, "sentiment"):
+                sentiment_result = self.agents.market_sentiment_decoder_agent(
+                    market_data=data.get("market_overview", {}),
+                    sectors_data=data.get("sectors", {}),
+                    concepts_data=data.get("concepts", {})
+                )
             agents_results["sentiment"] = sentiment_result
             
             results["agents_analysis"] = agents_results
@@ -165,7 +180,8 @@ class SectorStrategyEngine:
             # 2. 综合研判
             print("\n[阶段2] 综合研判引擎工作中...")
             print("-" * 60)
-            comprehensive_report = self._conduct_comprehensive_discussion(agents_results)
+            with self._stream_scope(stream_callback, "comprehensive"):
+                comprehensive_report = self._conduct_comprehensive_discussion(agents_results)
             results["comprehensive_report"] = comprehensive_report
             print("✓ 综合研判完成")
             
@@ -556,6 +572,10 @@ class SectorStrategyEngine:
         """获取历史报告"""
         return self.database.get_analysis_reports(limit)
     
+    def search_reports(self, query, limit=20, since=None, until=None):
+        """全文检索历史报告（按相关度排序，含命中片段）"""
+        return self.database.search_analysis_reports(query, limit, since, until)
+    
     def get_report_detail(self, report_id):
         """获取报告详情"""
         return self.database.get_analysis_report(report_id)
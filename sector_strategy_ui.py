@@ -18,6 +18,7 @@ from sector_strategy_engine import SectorStrategyEngine
 from sector_strategy_pdf import SectorStrategyPDFGenerator
 from sector_strategy_db import SectorStrategyDatabase
 from sector_strategy_scheduler import sector_strategy_scheduler
+from report_search import SEARCH_RANGES, range_start
 
 
 def _parse_json_field(value, default):
@@ -169,8 +170,23 @@ def display_history_tab():
         # 初始化引擎以获取历史报告
         engine = SectorStrategyEngine()
         
-        # 获取历史报告
-        reports = engine.get_historical_reports(limit=20)
+        # 全文检索
+        col_query, col_range = st.columns([3, 1])
+        with col_query:
+            search_query = st.text_input("🔍 全文检索报告内容", placeholder="如：半导体 北向资金，多个词用空格分隔",
+                                         key="sector_history_search")
+        with col_range:
+            search_range = st.selectbox("时间范围", list(SEARCH_RANGES.keys()), key="sector_history_range")
+        
+        if search_query.strip():
+            hits = engine.search_reports(search_query, limit=20, since=range_start(SEARCH_RANGES[search_range]))
+            if not hits:
+                st.info("🔍 未找到匹配的报告")
+                return
+            reports = pd.DataFrame(hits)
+        else:
+            # 获取历史报告
+            reports = engine.get_historical_reports(limit=20)
         
         if reports.empty:
             st.info("📝 暂无历史报告")
@@ -196,6 +212,8 @@ def display_history_tab():
             with st.container():
                 st.markdown(f"**📊 报告 #{report_id}**")
                 st.caption(f"生成时间: {created_at} | 数据区间: {data_date_range}")
+                if 'snippet' in report:
+                    st.caption(report['snippet'])
 
                 col1, col2, col3 = st.columns([1, 1, 1])
                 with col1:
@@ -292,7 +310,10 @@ def run_sector_strategy_analysis(model="deepseek-chat"):
         progress_bar.progress(40)
         
         engine = SectorStrategyEngine(model=model)
-        result = engine.run_comprehensive_analysis(data)
+        # 各智能体报告和综合研判生成过程中实时展示
+        stream_area, on_stream = create_agents_stream_view()
+        result = engine.run_comprehensive_analysis(data, stream_callback=on_stream)
+        stream_area.empty()
         # 传递缓存元信息到结果以便页面提示
         if data.get("from_cache") or data.get("cache_warning"):
             result["cache_meta"] = {
@@ -631,6 +652,41 @@ def display_predictions(predictions):
             """, unsafe_allow_html=True)
 
 
+# 实时预览中各分析环节的标题（按分析顺序）
+STREAM_SECTIONS = {
+    "macro": "🌐 宏观策略师",
+    "sector": "📊 板块诊断师",
+    "fund": "💰 资金流向分析师",
+    "sentiment": "🎭 市场情绪解码员",
+    "comprehensive": "🎯 综合研判",
+}
+
+
+def create_agents_stream_view():
+    """
+    创建智能体报告的实时预览区域
+    
+    Returns:
+        (预览区域, 流式回调)：回调参数为 (分析环节key, 截至当前的报告文本)
+    """
+    stream_area = st.empty()
+    placeholders = {}
+    with stream_area.container():
+        st.subheader("🤖 AI智能体分析报告（生成中）")
+        tabs = st.tabs(list(STREAM_SECTIONS.values()))
+        for key, tab in zip(STREAM_SECTIONS.keys(), tabs):
+            with tab:
+                placeholders[key] = st.empty()
+                placeholders[key].caption("⏳ 等待分析...")
+    
+    def on_stream(key, text):
+        placeholder = placeholders.get(key)
+        if placeholder is not None:
+            placeholder.markdown(text + " ▌")
+    
+    return stream_area, on_stream
+
+
 def display_agents_reports(agents_analysis):
     """显示智能体分析报告"""
     
@@ -10,14 +10,22 @@ import akshare as ak
 import pandas as pd
 from typing import Dict, Optional
 from datetime import datetime, timedelta
+from circuit_breaker import circuit_breakers
+from data_source_manager import data_source_manager
+from bar_store import to_akshare_columns
+from incremental_indicators import IncrementalIndicatorEngine, build_indicator_result
+from indicator_kernel import monitor_indicators
 
 
 class SmartMonitorDataFetcher:
-    """A股数据获取器（支持多数据源降级）"""
+    """A股数据获取器（支持多数据源降级，按接口熔断）"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
+        # 增量技术指标状态（盯盘循环每次只处理新K线）
+        self.indicator_engine = IncrementalIndicatorEngine()
+        
         # 初始化Tushare（备用数据源）
         self.ts_pro = None
         tushare_token = os.getenv('TUSHARE_TOKEN', '')
@@ -33,167 +41,167 @@ class SmartMonitorDataFetcher:
         else:
             self.logger.info("未配置Tushare Token，仅使用AKShare数据源")
     
-    def get_realtime_quote(self, stock_code: str, retry: int = 1) -> Optional[Dict]:
+    def get_realtime_quote(self, stock_code: str) -> Optional[Dict]:
         """
-        获取实时行情（带重试和降级机制）
-        优先使用AKShare，失败时降级到Tushare
+        获取实时行情（带熔断和降级机制）
+        优先使用AKShare，失败或熔断时直接使用Tushare
         
         Args:
             stock_code: 股票代码（如：600519）
-            retry: 重试次数（默认1次，避免IP封禁）
             
         Returns:
             实时行情数据
         """
-        import time
-        
         # 方法1: 组合使用分钟行情 + 基本信息（最可靠）
-        for attempt in range(retry):
-            try:
-                # 1.1 获取股票基本信息（名称）
-                info_df = ak.stock_individual_info_em(symbol=stock_code)
-                stock_name = 'N/A'
-                if not info_df.empty:
-                    info_dict = dict(zip(info_df['item'], info_df['value']))
-                    stock_name = info_dict.get('股票简称', 'N/A')
-                
-                # 1.2 获取分钟级实时行情
-                min_df = ak.stock_zh_a_hist_min_em(symbol=stock_code, period='1', adjust='')
-                
-                if min_df.empty:
-                    self.logger.warning(f"AKShare未找到股票 {stock_code} 的分钟行情数据")
-                    if attempt < retry - 1:
-                        time.sleep(2)
-                        continue
-                    break
-                
-                # 1.3 获取历史数据（计算昨收）
-                hist_df = ak.stock_zh_a_hist(symbol=stock_code, period='daily', adjust='')
-                
-                # 提取最新分钟数据
-                latest = min_df.iloc[-1]
-                current_price = float(latest['收盘'])
-                
-                # 计算昨收和涨跌幅
-                if len(hist_df) >= 2:
-                    pre_close = float(hist_df.iloc[-2]['收盘'])
-                else:
-                    pre_close = current_price
-                
-                change_amount = current_price - pre_close
-                change_pct = (change_amount / pre_close * 100) if pre_close > 0 else 0
-                
-                # 从历史数据获取今天的统计数据
-                if len(hist_df) >= 1:
-                    today_data = hist_df.iloc[-1]
-                    daily_volume = float(today_data.get('成交量', 0))
-                    daily_amount = float(today_data.get('成交额', 0))
-                    daily_high = float(today_data.get('最高', 0))
-                    daily_low = float(today_data.get('最低', 0))
-                    daily_open = float(today_data.get('开盘', 0))
-                    turnover_rate = float(today_data.get('换手率', 0))
-                else:
-                    # 使用分钟数据
-                    daily_volume = min_df['成交量'].sum()
-                    daily_amount = min_df['成交额'].sum()
-                    daily_high = min_df['最高'].max()
-                    daily_low = min_df['最低'].min()
-                    daily_open = float(min_df.iloc[0]['开盘'])
-                    turnover_rate = 0.0
-                
-                self.logger.info(f"✅ AKShare成功获取 {stock_code} ({stock_name}) 实时行情")
-                
-                return {
-                    'code': stock_code,
-                    'name': stock_name,
-                    'current_price': current_price,
-                    'change_pct': change_pct,
-                    'change_amount': change_amount,
-                    'volume': daily_volume,  # 手
-                    'amount': daily_amount,  # 元
-                    'high': daily_high,
-                    'low': daily_low,
-                    'open': daily_open,
-                    'pre_close': pre_close,
-                    'turnover_rate': turnover_rate,
-                    'volume_ratio': 1.0,
-                    'update_time': str(latest['时间']),
-                    'data_source': 'akshare'
-                }
-                
-            except Exception as e:
-                if attempt < retry - 1:
-                    self.logger.warning(f"AKShare获取失败 {stock_code}，第{attempt+1}次重试... 错误: {type(e).__name__}: {str(e)[:50]}")
-                    time.sleep(2)  # 等待2秒后重试
-                else:
-                    self.logger.warning(f"AKShare获取失败 {stock_code}（已重试{retry}次），尝试降级")
+        def fetch_akshare():
+            # 1.1 获取股票基本信息（名称）
+            info_df = ak.stock_individual_info_em(symbol=stock_code)
+            stock_name = 'N/A'
+            if not info_df.empty:
+                info_dict = dict(zip(info_df['item'], info_df['value']))
+                stock_name = info_dict.get('股票简称', 'N/A')
+            
+            # 1.2 获取分钟级实时行情
+            min_df = ak.stock_zh_a_hist_min_em(symbol=stock_code, period='1', adjust='')
+            
+            if min_df.empty:
+                self.logger.warning(f"AKShare未找到股票 {stock_code} 的分钟行情数据")
+                return None
+            
+            # 1.3 获取历史数据（计算昨收）
+            hist_df = ak.stock_zh_a_hist(symbol=stock_code, period='daily', adjust='')
+            
+            # 提取最新分钟数据
+            latest = min_df.iloc[-1]
+            current_price = float(latest['收盘'])
+            
+            # 计算昨收和涨跌幅
+            if len(hist_df) >= 2:
+                pre_close = float(hist_df.iloc[-2]['收盘'])
+            else:
+                pre_close = current_price
+            
+            change_amount = current_price - pre_close
+            change_pct = (change_amount / pre_close * 100) if pre_close > 0 else 0
+            
+            # 从历史数据获取今天的统计数据
+            if len(hist_df) >= 1:
+                today_data = hist_df.iloc[-1]
+                daily_volume = float(today_data.get('成交量', 0))
+                daily_amount = float(today_data.get('成交额', 0))
+                daily_high = float(today_data.get('最高', 0))
+                daily_low = float(today_data.get('最低', 0))
+                daily_open = float(today_data.get('开盘', 0))
+                turnover_rate = float(today_data.get('换手率', 0))
+            else:
+                # 使用分钟数据
+                daily_volume = min_df['成交量'].sum()
+                daily_amount = min_df['成交额'].sum()
+                daily_high = min_df['最高'].max()
+                daily_low = min_df['最低'].min()
+                daily_open = float(min_df.iloc[0]['开盘'])
+                turnover_rate = 0.0
+            
+            self.logger.info(f"✅ AKShare成功获取 {stock_code} ({stock_name}) 实时行情")
+            
+            return {
+                'code': stock_code,
+                'name': stock_name,
+                'current_price': current_price,
+                'change_pct': change_pct,
+                'change_amount': change_amount,
+                'volume': daily_volume,  # 手
+                'amount': daily_amount,  # 元
+                'high': daily_high,
+                'low': daily_low,
+                'open': daily_open,
+                'pre_close': pre_close,
+                'turnover_rate': turnover_rate,
+                'volume_ratio': 1.0,
+                'update_time': str(latest['时间']),
+                'data_source': 'akshare'
+            }
         
-        # 降级到Tushare
-        if self.ts_pro:
-            self.logger.info(f"降级到Tushare获取 {stock_code}...")
-            return self._get_realtime_quote_from_tushare(stock_code)
-        else:
-            self.logger.error(f"AKShare失败且未配置Tushare，无法获取 {stock_code} 行情")
-            return None
+        # 方法2: 降级到Tushare
+        quote = circuit_breakers.route('monitor_quote', self._fetchers(
+            fetch_akshare, lambda: self._get_realtime_quote_from_tushare(stock_code)))
+        if quote is None:
+            self.logger.error(f"所有数据源均未获取到 {stock_code} 行情")
+        return quote
     
-    def get_technical_indicators(self, stock_code: str, period: str = 'daily', retry: int = 1) -> Optional[Dict]:
+    def get_technical_indicators(self, stock_code: str, period: str = 'daily') -> Optional[Dict]:
         """
-        计算技术指标（带降级机制）
-        优先使用AKShare，失败时降级到Tushare
+        计算技术指标（带熔断和降级机制）
+        日线通过 data_source_manager 获取K线；周线/月线优先使用AKShare，失败或熔断时直接使用Tushare
         
         Args:
             stock_code: 股票代码
             period: 周期（daily/weekly/monthly）
-            retry: 重试次数（默认2次）
             
         Returns:
             技术指标数据
         """
-        import time
+        end_date = datetime.now().strftime('%Y%m%d')
+        start_date = (datetime.now() - timedelta(days=300)).strftime('%Y%m%d')
         
-        # 方法1: 尝试使用AKShare
-        for attempt in range(retry):
-            try:
-                # 获取历史数据（最近200个交易日，用于计算指标）
-                end_date = datetime.now().strftime('%Y%m%d')
-                start_date = (datetime.now() - timedelta(days=300)).strftime('%Y%m%d')
-                
-                # 获取历史数据
-                df = ak.stock_zh_a_hist(
-                    symbol=stock_code,
-                    period=period,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust="qfq"  # 前复权
-                )
-                
-                if df.empty or len(df) < 60:
-                    if attempt < retry - 1:
-                        self.logger.warning(f"AKShare历史数据不足 {stock_code}，第{attempt+1}次重试...")
-                        time.sleep(1)
-                        continue
-                    else:
-                        self.logger.warning(f"AKShare历史数据不足 {stock_code}，尝试降级")
-                        break
-                
-                # 数据充足，计算技术指标
-                return self._calculate_all_indicators(df, stock_code)
-                
-            except Exception as e:
-                if attempt < retry - 1:
-                    self.logger.warning(f"AKShare获取历史数据失败 {stock_code}，第{attempt+1}次重试... 错误: {type(e).__name__}: {str(e)[:50]}")
-                    time.sleep(1)
-                else:
-                    self.logger.warning(f"AKShare获取历史数据失败 {stock_code}（已重试{retry}次），尝试降级到Tushare")
-                    break
+        # 日线走本地K线存储，只增量拉取；数据源选择和熔断由 data_source_manager 的 stock_hist 路由负责
+        if period == 'daily':
+            df = data_source_manager.get_stock_hist_data(
+                symbol=stock_code,
+                start_date=start_date,
+                end_date=end_date,
+                adjust='qfq'
+            )
+            if df is None or len(df) < 60:
+                self.logger.error(f"所有数据源均未获取到 {stock_code} 足够的历史数据")
+                return None
+            return self._update_indicators(to_akshare_columns(df), stock_code, (stock_code, period))
+        
+        # 方法1: 尝试使用AKShare（周线/月线）
+        def fetch_akshare():
+            df = ak.stock_zh_a_hist(
+                symbol=stock_code,
+                period=period,
+                start_date=start_date,
+                end_date=end_date,
+                adjust="qfq"  # 前复权
+            )
+            
+            if df.empty or len(df) < 60:
+                self.logger.warning(f"AKShare历史数据不足 {stock_code}，尝试降级")
+                return None
+            
+            # 数据充足，增量计算技术指标
+            return self._update_indicators(df, stock_code, (stock_code, period, 'akshare'))
         
         # 方法2: 降级到Tushare
-        if self.ts_pro:
-            self.logger.info(f"降级到Tushare获取 {stock_code} 历史数据...")
-            return self._get_technical_indicators_from_tushare(stock_code, period)
-        else:
-            self.logger.error(f"AKShare失败且未配置Tushare，无法获取 {stock_code} 技术指标")
-            return None
+        indicators = circuit_breakers.route('monitor_indicators', self._fetchers(
+            fetch_akshare, lambda: self._get_technical_indicators_from_tushare(stock_code, period)))
+        if indicators is None:
+            self.logger.error(f"所有数据源均未获取到 {stock_code} 技术指标")
+        return indicators
+    
+    def _update_indicators(self, df: pd.DataFrame, stock_code: str, key) -> Optional[Dict]:
+        """
+        增量更新技术指标（首次或历史K线变化时全量重建，并定期与批量计算校验）
+        
+        Args:
+            df: 按日期升序的历史数据DataFrame
+            stock_code: 股票代码
+            key: 指标状态键（股票代码、周期、数据源）
+            
+        Returns:
+            技术指标数据
+        """
+        try:
+            return self.indicator_engine.update(
+                key, df,
+                batch_fn=lambda data: self._calculate_all_indicators(data, stock_code)
+            )
+        except Exception as e:
+            self.logger.warning(f"增量计算技术指标失败 {stock_code}，改用全量计算: {e}")
+            self.indicator_engine.reset(key)
+            return self._calculate_all_indicators(df, stock_code)
     
     def _calculate_all_indicators(self, df: pd.DataFrame, stock_code: str) -> Optional[Dict]:
         """
@@ -211,78 +219,11 @@ class SmartMonitorDataFetcher:
                 self.logger.warning(f"股票 {stock_code} 历史数据不足")
                 return None
             
-            # 计算均线
-            df['ma5'] = df['收盘'].rolling(window=5).mean()
-            df['ma20'] = df['收盘'].rolling(window=20).mean()
-            df['ma60'] = df['收盘'].rolling(window=60).mean()
-            
-            # 计算MACD
-            df = self._calculate_macd(df)
-            
-            # 计算RSI
-            df = self._calculate_rsi(df, periods=[6, 12, 24])
-            
-            # 计算KDJ
-            df = self._calculate_kdj(df)
-            
-            # 计算布林带
-            df = self._calculate_bollinger(df)
+            # 全部指标一次向量化计算，只取最后一根K线的值
+            values = monitor_indicators(df['最高'], df['最低'], df['收盘'], df['成交量'])
+            latest = {name: series[-1] for name, series in values.items()}
             
-            # 计算量能均线
-            df['vol_ma5'] = df['成交量'].rolling(window=5).mean()
-            df['vol_ma10'] = df['成交量'].rolling(window=10).mean()
-            
-            # 取最后一行数据
-            latest = df.iloc[-1]
-            
-            # 判断趋势
-            current_price = float(latest['收盘'])
-            ma5 = float(latest['ma5'])
-            ma20 = float(latest['ma20'])
-            ma60 = float(latest['ma60'])
-            
-            if current_price > ma5 > ma20 > ma60:
-                trend = 'up'
-            elif current_price < ma5 < ma20 < ma60:
-                trend = 'down'
-            else:
-                trend = 'sideways'
-            
-            # 布林带位置
-            boll_upper = float(latest['boll_upper'])
-            boll_mid = float(latest['boll_mid'])
-            boll_lower = float(latest['boll_lower'])
-            
-            if current_price >= boll_upper:
-                boll_position = '上轨附近（超买）'
-            elif current_price <= boll_lower:
-                boll_position = '下轨附近（超卖）'
-            elif current_price > boll_mid:
-                boll_position = '中轨上方'
-            else:
-                boll_position = '中轨下方'
-            
-            return {
-                'ma5': ma5,
-                'ma20': ma20,
-                'ma60': ma60,
-                'trend': trend,
-                'macd_dif': float(latest['dif']),
-                'macd_dea': float(latest['dea']),
-                'macd': float(latest['macd']),
-                'rsi6': float(latest['rsi6']),
-                'rsi12': float(latest['rsi12']),
-                'rsi24': float(latest['rsi24']),
-                'kdj_k': float(latest['kdj_k']),
-                'kdj_d': float(latest['kdj_d']),
-                'kdj_j': float(latest['kdj_j']),
-                'boll_upper': boll_upper,
-                'boll_mid': boll_mid,
-                'boll_lower': boll_lower,
-                'boll_position': boll_position,
-                'vol_ma5': float(latest['vol_ma5']),
-                'volume_ratio': float(latest['成交量']) / float(latest['vol_ma5']) if latest['vol_ma5'] > 0 else 1.0
-            }
+            return build_indicator_result(float(df['收盘'].iloc[-1]), float(df['成交量'].iloc[-1]), latest)
             
         except Exception as e:
             self.logger.error(f"计算技术指标失败 {stock_code}: {e}")
@@ -290,7 +231,7 @@ class SmartMonitorDataFetcher:
     
     def _get_technical_indicators_from_tushare(self, stock_code: str, period: str = 'daily') -> Optional[Dict]:
         """
-        使用Tushare获取历史数据并计算技术指标
+        使用Tushare获取历史数据并计算技术指标（接口异常向上抛出，由熔断器统计）
         
         Args:
             stock_code: 股票代码（6位）
@@ -368,89 +309,90 @@ class SmartMonitorDataFetcher:
             self.logger.info(f"✅ Tushare成功获取 {stock_code} 历史数据，共{len(df)}条")
             
             # 使用统一的计算方法
-            return self._calculate_all_indicators(df, stock_code)
+            return self._update_indicators(df, stock_code, (stock_code, 'daily', 'tushare'))
             
         except Exception as e:
             self.logger.error(f"Tushare获取历史数据失败 {stock_code}: {type(e).__name__}: {str(e)}")
             import traceback
             self.logger.debug(traceback.format_exc())
-            return None
+            raise
     
-    def get_main_force_flow(self, stock_code: str, retry: int = 2) -> Optional[Dict]:
+    def get_main_force_flow(self, stock_code: str) -> Optional[Dict]:
         """
-        获取主力资金流向（带重试机制）
+        获取主力资金流向（带熔断和降级机制）
         
         Args:
             stock_code: 股票代码
-            retry: 重试次数（默认2次）
             
         Returns:
             主力资金数据
         """
-        import time
-        
-        for attempt in range(retry):
+        def fetch_akshare():
+            # 获取个股资金流（新版AKShare API参数调整）
             try:
-                # 获取个股资金流（新版AKShare API参数调整）
+                df = ak.stock_individual_fund_flow_rank(market="今日")
+            except TypeError:
+                # 如果market参数也不支持，尝试无参数调用
                 try:
-                    df = ak.stock_individual_fund_flow_rank(market="今日")
-                except TypeError:
-                    # 如果market参数也不支持，尝试无参数调用
-                    try:
-                        df = ak.stock_individual_fund_flow_rank()
-                    except TypeError as te:
-                        self.logger.warning(f"AKShare API参数不兼容: {te}")
-                        return None
-                
-                stock_data = df[df['代码'] == stock_code]
-                
-                if stock_data.empty:
-                    self.logger.warning(f"未找到股票 {stock_code} 的资金流向数据")
+                    df = ak.stock_individual_fund_flow_rank()
+                except TypeError as te:
+                    self.logger.warning(f"AKShare API参数不兼容: {te}")
                     return None
-                
-                row = stock_data.iloc[0]
-                
-                # 主力净额
-                main_net = float(row.get('主力净流入-净额', 0)) / 10000  # 转换为万元
-                main_net_pct = float(row.get('主力净流入-净占比', 0))
-                
-                # 判断主力动向
-                if main_net > 0 and main_net_pct > 5:
-                    trend = '大幅流入'
-                elif main_net > 0:
-                    trend = '小幅流入'
-                elif main_net < 0 and main_net_pct < -5:
-                    trend = '大幅流出'
-                elif main_net < 0:
-                    trend = '小幅流出'
-                else:
-                    trend = '观望'
-                
-                return {
-                    'main_net': main_net,  # 万元
-                    'main_net_pct': main_net_pct,  # 百分比
-                    'super_net': float(row.get('超大单净流入-净额', 0)) / 10000,
-                    'big_net': float(row.get('大单净流入-净额', 0)) / 10000,
-                    'mid_net': float(row.get('中单净流入-净额', 0)) / 10000,
-                    'small_net': float(row.get('小单净流入-净额', 0)) / 10000,
-                    'trend': trend,
-                    'data_source': 'akshare'
-                }
-                
-            except Exception as e:
-                if attempt < retry - 1:
-                    self.logger.warning(f"AKShare获取资金流向失败 {stock_code}，第{attempt+1}次重试... 错误: {type(e).__name__}")
-                    time.sleep(1)  # 等待1秒后重试
-                else:
-                    self.logger.warning(f"AKShare获取资金流向失败 {stock_code}（已重试{retry}次），尝试降级到Tushare")
-                    break
+            
+            stock_data = df[df['代码'] == stock_code]
+            
+            if stock_data.empty:
+                self.logger.warning(f"未找到股票 {stock_code} 的资金流向数据")
+                return None
+            
+            row = stock_data.iloc[0]
+            
+            # 主力净额
+            main_net = float(row.get('主力净流入-净额', 0)) / 10000  # 转换为万元
+            main_net_pct = float(row.get('主力净流入-净占比', 0))
+            
+            # 判断主力动向
+            if main_net > 0 and main_net_pct > 5:
+                trend = '大幅流入'
+            elif main_net > 0:
+                trend = '小幅流入'
+            elif main_net < 0 and main_net_pct < -5:
+                trend = '大幅流出'
+            elif main_net < 0:
+                trend = '小幅流出'
+            else:
+                trend = '观望'
+            
+            return {
+                'main_net': main_net,  # 万元
+                'main_net_pct': main_net_pct,  # 百分比
+                'super_net': float(row.get('超大单净流入-净额', 0)) / 10000,
+                'big_net': float(row.get('大单净流入-净额', 0)) / 10000,
+                'mid_net': float(row.get('中单净流入-净额', 0)) / 10000,
+                'small_net': float(row.get('小单净流入-净额', 0)) / 10000,
+                'trend': trend,
+                'data_source': 'akshare'
+            }
         
         # 降级到Tushare
+        return circuit_breakers.route('monitor_main_force', self._fetchers(
+            fetch_akshare, lambda: self._get_main_force_from_tushare(stock_code)))
+    
+    def _fetchers(self, fetch_akshare, fetch_tushare) -> Dict:
+        """
+        按优先级组装各数据源的获取函数（未配置Tushare时只使用AKShare）
+        
+        Args:
+            fetch_akshare: AKShare获取函数
+            fetch_tushare: Tushare获取函数
+        
+        Returns:
+            {数据源名称: 获取函数}
+        """
+        fetchers = {'akshare': fetch_akshare}
         if self.ts_pro:
-            return self._get_main_force_from_tushare(stock_code)
-        else:
-            self.logger.error(f"AKShare失败且未配置Tushare，无法获取 {stock_code} 资金流向")
-            return None
+            fetchers['tushare'] = fetch_tushare
+        return fetchers
     
     def get_comprehensive_data(self, stock_code: str) -> Dict:
         """
@@ -482,64 +424,12 @@ class SmartMonitorDataFetcher:
         
         return result
     
-    # ========== 技术指标计算方法 ==========
-    
-    def _calculate_macd(self, df: pd.DataFrame, 
-                       fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
-        """计算MACD指标"""
-        ema_fast = df['收盘'].ewm(span=fast, adjust=False).mean()
-        ema_slow = df['收盘'].ewm(span=slow, adjust=False).mean()
-        
-        df['dif'] = ema_fast - ema_slow
-        df['dea'] = df['dif'].ewm(span=signal, adjust=False).mean()
-        df['macd'] = (df['dif'] - df['dea']) * 2
-        
-        return df
-    
-    def _calculate_rsi(self, df: pd.DataFrame, periods: list = [6, 12, 24]) -> pd.DataFrame:
-        """计算RSI指标"""
-        for period in periods:
-            delta = df['收盘'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            
-            rs = gain / loss
-            df[f'rsi{period}'] = 100 - (100 / (1 + rs))
-        
-        return df
-    
-    def _calculate_kdj(self, df: pd.DataFrame, n: int = 9, 
-                      m1: int = 3, m2: int = 3) -> pd.DataFrame:
-        """计算KDJ指标"""
-        low_list = df['最低'].rolling(window=n).min()
-        high_list = df['最高'].rolling(window=n).max()
-        
-        rsv = (df['收盘'] - low_list) / (high_list - low_list) * 100
-        
-        df['kdj_k'] = rsv.ewm(com=m1-1, adjust=False).mean()
-        df['kdj_d'] = df['kdj_k'].ewm(com=m2-1, adjust=False).mean()
-        df['kdj_j'] = 3 * df['kdj_k'] - 2 * df['kdj_d']
-        
-        return df
-    
-    def _calculate_bollinger(self, df: pd.DataFrame, 
-                           period: int = 20, std_num: int = 2) -> pd.DataFrame:
-        """计算布林带"""
-        df['boll_mid'] = df['收盘'].rolling(window=period).mean()
-        std = df['收盘'].rolling(window=period).std()
-        
-        df['boll_upper'] = df['boll_mid'] + std_num * std
-        df['boll_lower'] = df['boll_mid'] - std_num * std
-        
-        return df
-
-
     # ========== Tushare备用数据源方法 ==========
     
     def _get_realtime_quote_from_tushare(self, stock_code: str) -> Optional[Dict]:
         """
         从Tushare获取实时行情（备用数据源）
-        使用免费接口，无需积分
+        使用免费接口，无需积分；两种接口都因异常失败时抛出最后一个异常，由熔断器统计
         
         Args:
             stock_code: 股票代码
@@ -547,6 +437,7 @@ class SmartMonitorDataFetcher:
         Returns:
             实时行情数据
         """
+        last_error = None
         try:
             # 转换股票代码格式（Tushare格式：600519.SH）
             if stock_code.startswith('6'):
@@ -606,6 +497,7 @@ class SmartMonitorDataFetcher:
                             'data_source': 'tushare'
                         }
             except Exception as e:
+                last_error = e
                 self.logger.warning(f"Tushare基础接口失败: {str(e)[:100]}")
             
             # 方法2: 降级使用更基础的stock_basic+pro_bar
@@ -641,14 +533,19 @@ class SmartMonitorDataFetcher:
                         'data_source': 'tushare'
                     }
             except Exception as e:
+                last_error = e
                 self.logger.warning(f"Tushare pro_bar接口失败: {str(e)[:100]}")
             
             # 所有方法都失败
             self.logger.error(f"Tushare所有接口都失败 {stock_code}，可能是积分不足或网络问题")
             self.logger.info("💡 提示：访问 https://tushare.pro/user/token 查看积分和权限")
+            if last_error is not None:
+                raise last_error
             return None
             
         except Exception as e:
+            if e is last_error:
+                raise
             error_msg = str(e)
             if "权限" in error_msg or "积分" in error_msg:
                 self.logger.error(f"Tushare权限不足 {stock_code}: 需要更多积分")
@@ -659,11 +556,11 @@ class SmartMonitorDataFetcher:
                 self.logger.info("   详情访问: https://tushare.pro/document/1?doc_id=13")
             else:
                 self.logger.error(f"Tushare获取失败 {stock_code}: {error_msg[:100]}")
-            return None
+            raise
     
     def _get_main_force_from_tushare(self, stock_code: str) -> Optional[Dict]:
         """
-        从Tushare获取主力资金流向（备用数据源）
+        从Tushare获取主力资金流向（备用数据源，接口异常向上抛出，由熔断器统计）
         注意：资金流向接口需要较高积分
         
         Args:
@@ -744,7 +641,7 @@ class SmartMonitorDataFetcher:
                 self.logger.info("   智能盯盘会继续运行，仅缺少资金流向数据")
             else:
                 self.logger.error(f"Tushare获取资金流向失败 {stock_code}: {error_msg[:100]}")
-            return None
+            raise
 
 
 if __name__ == '__main__':
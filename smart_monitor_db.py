@@ -4,6 +4,8 @@
 """
 
 import sqlite3
+import sqlite_pool
+import blob_store
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -13,6 +15,9 @@ import json
 class SmartMonitorDB:
     """智能盯盘数据库"""
     
+    # AI决策中压缩存储的大字段（推理过程、行情快照、账户快照）
+    DECISION_BLOB_COLUMNS = ['reasoning', 'market_data', 'account_info']
+    
     def __init__(self, db_file: str = 'smart_monitor.db'):
         """
         初始化数据库
@@ -26,7 +31,7 @@ class SmartMonitorDB:
     
     def _init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         # 1. 监控任务表
@@ -174,6 +179,8 @@ class SmartMonitorDB:
         ''')
         
         conn.commit()
+        
+        blob_store.ensure_schema(conn, 'ai_decisions', self.DECISION_BLOB_COLUMNS)
         conn.close()
         self.logger.info(f"数据库初始化完成: {self.db_file}")
     
@@ -181,7 +188,7 @@ class SmartMonitorDB:
     
     def add_monitor_task(self, task_data: Dict) -> int:
         """添加监控任务"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -220,7 +227,7 @@ class SmartMonitorDB:
     
     def get_monitor_tasks(self, enabled_only: bool = True) -> List[Dict]:
         """获取监控任务列表"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -236,7 +243,7 @@ class SmartMonitorDB:
     
     def update_monitor_task(self, task_id: int, updates: Dict):
         """更新监控任务"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         set_clause = ', '.join([f"{k} = ?" for k in updates.keys()])
@@ -253,7 +260,7 @@ class SmartMonitorDB:
     
     def update_monitor_task(self, stock_code: str, task_data: Dict):
         """更新监控任务"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         # 构建更新语句
@@ -312,7 +319,7 @@ class SmartMonitorDB:
     
     def delete_monitor_task(self, task_id: int):
         """删除监控任务"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM monitor_tasks WHERE id = ?', (task_id,))
@@ -324,16 +331,20 @@ class SmartMonitorDB:
     
     def save_ai_decision(self, decision_data: Dict) -> int:
         """保存AI决策"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
+        reasoning, reasoning_blob = blob_store.store(cursor, decision_data.get('reasoning'))
+        market_data, market_data_blob = blob_store.store(cursor, json.dumps(decision_data.get('market_data', {})))
+        account_info, account_info_blob = blob_store.store(cursor, json.dumps(decision_data.get('account_info', {})))
+        
         cursor.execute('''
             INSERT INTO ai_decisions
             (stock_code, stock_name, decision_time, trading_session,
-             action, confidence, reasoning, position_size_pct,
+             action, confidence, reasoning, reasoning_blob, position_size_pct,
              stop_loss_pct, take_profit_pct, risk_level,
-             key_price_levels, market_data, account_info)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             key_price_levels, market_data, market_data_blob, account_info, account_info_blob)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             decision_data.get('stock_code'),
             decision_data.get('stock_name'),
@@ -341,14 +352,17 @@ class SmartMonitorDB:
             decision_data.get('trading_session'),
             decision_data.get('action'),
             decision_data.get('confidence'),
-            decision_data.get('reasoning'),
+            reasoning,
+            reasoning_blob,
             decision_data.get('position_size_pct'),
             decision_data.get('stop_loss_pct'),
             decision_data.get('take_profit_pct'),
             decision_data.get('risk_level'),
             json.dumps(decision_data.get('key_price_levels', {})),
-            json.dumps(decision_data.get('market_data', {})),
-            json.dumps(decision_data.get('account_info', {}))
+            market_data,
+            market_data_blob,
+            account_info,
+            account_info_blob
         ))
         
         decision_id = cursor.lastrowid
@@ -359,7 +373,7 @@ class SmartMonitorDB:
     
     def get_ai_decisions(self, stock_code: str = None, limit: int = 100) -> List[Dict]:
         """获取AI决策历史"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -377,12 +391,11 @@ class SmartMonitorDB:
                 LIMIT ?
             ''', (limit,))
         
-        rows = cursor.fetchall()
+        rows = blob_store.inflate(cursor, [dict(row) for row in cursor.fetchall()], self.DECISION_BLOB_COLUMNS)
         conn.close()
         
         decisions = []
-        for row in rows:
-            d = dict(row)
+        for d in rows:
             # 解析JSON字段
             d['key_price_levels'] = json.loads(d['key_price_levels']) if d['key_price_levels'] else {}
             d['market_data'] = json.loads(d['market_data']) if d['market_data'] else {}
@@ -393,7 +406,7 @@ class SmartMonitorDB:
     
     def update_decision_execution(self, decision_id: int, executed: bool, result: str):
         """更新决策执行状态"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -409,7 +422,7 @@ class SmartMonitorDB:
     
     def save_trade_record(self, trade_data: Dict) -> int:
         """保存交易记录"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -442,7 +455,7 @@ class SmartMonitorDB:
     
     def get_trade_records(self, stock_code: str = None, limit: int = 100) -> List[Dict]:
         """获取交易记录"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -469,7 +482,7 @@ class SmartMonitorDB:
     
     def save_position(self, position_data: Dict):
         """保存/更新持仓信息"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         # 检查是否已存在
@@ -528,7 +541,7 @@ class SmartMonitorDB:
     
     def get_positions(self) -> List[Dict]:
         """获取所有持仓"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -541,7 +554,7 @@ class SmartMonitorDB:
     
     def close_position(self, stock_code: str):
         """关闭持仓记录"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -557,7 +570,7 @@ class SmartMonitorDB:
     
     def save_notification(self, notify_data: Dict) -> int:
         """保存通知记录"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -581,7 +594,7 @@ class SmartMonitorDB:
     
     def update_notification_status(self, notify_id: int, status: str, error_msg: str = None):
         """更新通知状态"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -597,7 +610,7 @@ class SmartMonitorDB:
     
     def log_system_event(self, level: str, module: str, message: str, details: str = None):
         """记录系统日志"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite_pool.connect(self.db_file)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -7,6 +7,7 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime, time
 import pytz
+from llm_client import get_llm_client
 
 
 class SmartMonitorDeepSeek:
@@ -21,11 +22,10 @@ class SmartMonitorDeepSeek:
         """
         self.api_key = api_key
         self.base_url = "https://api.deepseek.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
         self.logger = logging.getLogger(__name__)
+        self.llm = get_llm_client(api_key, self.base_url)
+        # 盯盘决策需及时返回，单次请求超时短于共享客户端的默认值，避免长时间占用监控线程
+        self.timeout = 60
 
     def is_trading_time(self) -> bool:
         """
@@ -152,24 +152,25 @@ class SmartMonitorDeepSeek:
         Returns:
             API响应
         """
-        import requests
-        
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
-        
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=60
+            # 使用进程内共享的LLM客户端（连接池复用 + 全局并发限制）
+            response = self.llm.complete(
+                messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=self.timeout
             )
-            response.raise_for_status()
-            return response.json()
+            # 保持与 /chat/completions 原始JSON一致的结构
+            return {
+                'choices': [{
+                    'message': {
+                        'role': 'assistant',
+                        'content': response.content,
+                        'reasoning_content': response.reasoning_content
+                    }
+                }]
+            }
         except Exception as e:
             self.logger.error(f"DeepSeek API调用失败: {e}")
             raise
@@ -13,6 +13,10 @@ from smart_monitor_deepseek import SmartMonitorDeepSeek
 from smart_monitor_data import SmartMonitorDataFetcher
 from smart_monitor_qmt import SmartMonitorQMT, SmartMonitorQMTSimulator
 from smart_monitor_db import SmartMonitorDB
+from smart_monitor_pool import MonitorWorkerPool
+from smart_monitor_prescreen import DecisionPrescreen
+from config import (SMART_MONITOR_MAX_WORKERS, SMART_MONITOR_LLM_CONCURRENCY,
+                    SMART_MONITOR_PRESCREEN_ENABLED)
 from notification_service import notification_service  # 复用主程序的通知服务
 from config_manager import config_manager  # 复用主程序的配置管理器
 
@@ -74,15 +78,21 @@ class SmartMonitorEngine:
                 self.qmt = SmartMonitorQMTSimulator()
                 self.qmt.connect("simulator")
         
-        # 监控线程控制
-        self.monitoring_threads = {}
-        self.stop_flags = {}
+        # 监控工作池：固定数量的工作线程按各股票的检查间隔执行分析
+        self.monitor_pool = MonitorWorkerPool(self._run_monitor_task,
+                                              max_workers=SMART_MONITOR_MAX_WORKERS)
+        # AI决策并发上限（所有监控任务和手动分析共享）
+        self.llm_slots = threading.BoundedSemaphore(max(1, SMART_MONITOR_LLM_CONCURRENCY))
+        # AI决策预筛：行情无实质变化时复用上次决策
+        self.prescreen = DecisionPrescreen() if SMART_MONITOR_PRESCREEN_ENABLED else None
+        self.prescreen_stats = {'reused': 0, 'analyzed': 0}
         
         self.logger.info("智能盯盘引擎初始化完成")
     
     def analyze_stock(self, stock_code: str, auto_trade: bool = False,
                      notify: bool = True, has_position: bool = False,
-                     position_cost: float = 0, position_quantity: int = 0) -> Dict:
+                     position_cost: float = 0, position_quantity: int = 0,
+                     use_prescreen: bool = False) -> Dict:
         """
         分析单只股票并做出决策
         
@@ -93,9 +103,10 @@ class SmartMonitorEngine:
             has_position: 是否已持仓（可选）
             position_cost: 持仓成本（可选）
             position_quantity: 持仓数量（可选）
+            use_prescreen: 是否启用决策预筛（行情无实质变化时复用上次决策，不调用AI、不交易、不通知）
             
         Returns:
-            分析结果
+            分析结果（复用上次决策时 reused 为 True）
         """
         try:
             self.logger.info(f"[{stock_code}] 开始分析...")
@@ -133,15 +144,24 @@ class SmartMonitorEngine:
                                    f"成本价: {position_cost:.2f}, "
                                    f"浮动盈亏: {position.get('profit_loss_pct', 0):+.2f}%")
             
-            # 5. 调用DeepSeek AI决策
-            ai_result = self.deepseek.analyze_stock_and_decide(
-                stock_code=stock_code,
-                market_data=market_data,
-                account_info=account_info,
-                has_position=has_position,
-                position_cost=position_cost,
-                position_quantity=position_quantity
-            )
+            position_state = DecisionPrescreen.position_state(has_position, position_cost, position_quantity)
+            
+            # 5. 决策预筛：与上次决策的输入相比无实质变化时直接复用
+            if use_prescreen and self.prescreen:
+                reused = self._try_reuse_decision(stock_code, market_data, session_info, position_state)
+                if reused:
+                    return reused
+            
+            # 6. 调用DeepSeek AI决策（受全局并发上限约束）
+            with self.llm_slots:
+                ai_result = self.deepseek.analyze_stock_and_decide(
+                    stock_code=stock_code,
+                    market_data=market_data,
+                    account_info=account_info,
+                    has_position=has_position,
+                    position_cost=position_cost,
+                    position_quantity=position_quantity
+                )
             
             if not ai_result['success']:
                 return {
@@ -155,8 +175,9 @@ class SmartMonitorEngine:
             self.logger.info(f"[{stock_code}] AI决策: {decision['action']} "
                            f"(信心度: {decision['confidence']}%)")
             self.logger.info(f"[{stock_code}] 决策理由: {decision['reasoning'][:100]}...")
+            self.prescreen_stats['analyzed'] += 1
             
-            # 6. 保存AI决策到数据库
+            # 7. 保存AI决策到数据库（附带持仓状态，供下次预筛比较）
             decision_id = self.db.save_ai_decision({
                 'stock_code': stock_code,
                 'stock_name': market_data.get('name'),
@@ -170,10 +191,10 @@ class SmartMonitorEngine:
                 'risk_level': decision.get('risk_level'),
                 'key_price_levels': decision.get('key_price_levels', {}),
                 'market_data': market_data,
-                'account_info': account_info
+                'account_info': dict(account_info or {}, position_state=position_state)
             })
             
-            # 7. 执行交易（如果开启自动交易）
+            # 8. 执行交易（如果开启自动交易）
             execution_result = None
             if auto_trade and session_info['can_trade']:
                 execution_result = self._execute_decision(
@@ -190,7 +211,7 @@ class SmartMonitorEngine:
                     result=str(execution_result)
                 )
             
-            # 8. 发送通知
+            # 9. 发送通知
             if notify:
                 self._send_notification(
                     stock_code=stock_code,
@@ -220,6 +241,46 @@ class SmartMonitorEngine:
                 'error': str(e)
             }
     
+    def _try_reuse_decision(self, stock_code: str, market_data: Dict,
+                            session_info: Dict, position_state: Dict) -> Optional[Dict]:
+        """
+        决策预筛：行情相对上次决策没有实质变化时复用上次决策
+        
+        Returns:
+            可复用时返回分析结果，否则返回None
+        """
+        last_decisions = self.db.get_ai_decisions(stock_code, limit=1)
+        last_decision = last_decisions[0] if last_decisions else None
+        
+        reuse, reason = self.prescreen.evaluate(
+            market_data, last_decision, session_info['session'], position_state
+        )
+        if not reuse:
+            self.logger.info(f"[{stock_code}] 预筛: {reason}，调用AI决策")
+            return None
+        
+        self.prescreen_stats['reused'] += 1
+        self.logger.info(f"[{stock_code}] 预筛: {reason}，复用上次决策 "
+                         f"#{last_decision['id']} ({last_decision['action']})")
+        self.db.log_system_event('INFO', 'prescreen', f"[{stock_code}] 复用AI决策 #{last_decision['id']}", reason)
+        
+        decision = {key: last_decision.get(key) for key in (
+            'action', 'confidence', 'reasoning', 'position_size_pct',
+            'stop_loss_pct', 'take_profit_pct', 'risk_level', 'key_price_levels'
+        )}
+        return {
+            'success': True,
+            'stock_code': stock_code,
+            'stock_name': market_data.get('name'),
+            'session_info': session_info,
+            'market_data': market_data,
+            'decision': decision,
+            'decision_id': last_decision['id'],
+            'execution_result': None,
+            'reused': True,
+            'prescreen_reason': reason
+        }
+    
     def _execute_decision(self, stock_code: str, decision: Dict,
                          market_data: Dict, has_position: bool) -> Dict:
         """
@@ -475,7 +536,7 @@ MACD: {market_data.get('macd', 0):.4f} | RSI(6): {market_data.get('rsi6', 0):.2f
                      has_position: bool = False, position_cost: float = 0,
                      position_quantity: int = 0):
         """
-        启动股票监控（在独立线程中运行）
+        启动股票监控（加入监控工作池，按检查间隔执行）
         
         Args:
             stock_code: 股票代码
@@ -486,77 +547,58 @@ MACD: {market_data.get('macd', 0):.4f} | RSI(6): {market_data.get('rsi6', 0):.2f
             position_cost: 持仓成本
             position_quantity: 持仓数量
         """
-        if stock_code in self.monitoring_threads:
+        if stock_code in self.monitor_pool:
             self.logger.warning(f"[{stock_code}] 监控已在运行中")
             return
         
-        # 创建停止标志
-        stop_flag = threading.Event()
-        self.stop_flags[stock_code] = stop_flag
-        
-        # 创建监控线程
-        thread = threading.Thread(
-            target=self._monitor_loop,
-            args=(stock_code, check_interval, auto_trade, notify, stop_flag,
-                 has_position, position_cost, position_quantity),
-            daemon=True
+        self.monitor_pool.add(
+            stock_code, check_interval,
+            auto_trade=auto_trade, notify=notify, has_position=has_position,
+            position_cost=position_cost, position_quantity=position_quantity
         )
         
-        self.monitoring_threads[stock_code] = thread
-        thread.start()
-        
         position_info = f"（持仓: {position_quantity}股 @ {position_cost:.2f}元）" if has_position else ""
         self.logger.info(f"[{stock_code}] 监控已启动，间隔: {check_interval}秒 {position_info}")
     
     def stop_monitor(self, stock_code: str):
         """停止股票监控"""
-        if stock_code not in self.monitoring_threads:
+        if not self.monitor_pool.remove(stock_code):
             self.logger.warning(f"[{stock_code}] 监控未运行")
             return
         
-        # 设置停止标志
-        self.stop_flags[stock_code].set()
-        
-        # 等待线程结束
-        self.monitoring_threads[stock_code].join(timeout=5)
-        
-        # 清理
-        del self.monitoring_threads[stock_code]
-        del self.stop_flags[stock_code]
-        
         self.logger.info(f"[{stock_code}] 监控已停止")
     
-    def _monitor_loop(self, stock_code: str, check_interval: int,
-                     auto_trade: bool, notify: bool, stop_flag: threading.Event,
-                     has_position: bool = False, position_cost: float = 0,
-                     position_quantity: int = 0):
-        """监控循环（在独立线程中运行）"""
-        self.logger.info(f"[{stock_code}] 监控线程已启动")
-        
-        while not stop_flag.is_set():
-            try:
-                # 执行分析
-                result = self.analyze_stock(
-                    stock_code=stock_code,
-                    auto_trade=auto_trade,
-                    notify=notify,
-                    has_position=has_position,
-                    position_cost=position_cost,
-                    position_quantity=position_quantity
-                )
-                
-                if result['success']:
-                    self.logger.info(f"[{stock_code}] 分析完成: {result['decision']['action']}")
-                else:
-                    self.logger.error(f"[{stock_code}] 分析失败: {result.get('error')}")
-                
-            except Exception as e:
-                self.logger.error(f"[{stock_code}] 监控循环异常: {e}")
+    def is_monitoring(self, stock_code: str) -> bool:
+        """股票是否在监控中"""
+        return stock_code in self.monitor_pool
+    
+    def get_monitor_status(self) -> Dict[str, Dict]:
+        """获取各监控任务的运行状态（是否正在分析、超时顺延次数等）"""
+        return self.monitor_pool.get_status()
+    
+    def _run_monitor_task(self, stock_code: str, auto_trade: bool, notify: bool,
+                          has_position: bool = False, position_cost: float = 0,
+                          position_quantity: int = 0):
+        """执行一次监控分析（由监控工作池的工作线程调用）"""
+        try:
+            result = self.analyze_stock(
+                stock_code=stock_code,
+                auto_trade=auto_trade,
+                notify=notify,
+                has_position=has_position,
+                position_cost=position_cost,
+                position_quantity=position_quantity,
+                use_prescreen=True
+            )
             
-            # 等待下一次检查
-            stop_flag.wait(check_interval)
+            if result['success']:
+                self.logger.info(f"[{stock_code}] 分析完成: {result['decision']['action']}"
+                                 f"{'（复用上次决策）' if result.get('reused') else ''}")
+            else:
+                self.logger.error(f"[{stock_code}] 分析失败: {result.get('error')}")
         
-        self.logger.info(f"[{stock_code}] 监控线程已退出")
+        except Exception as e:
+            self.logger.error(f"[{stock_code}] 监控任务异常: {e}")
 
 
 if __name__ == '__main__':
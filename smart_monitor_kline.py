@@ -329,12 +329,12 @@ class SmartMonitorKline:
             end_date = datetime.now().strftime('%Y%m%d')
             start_date = (datetime.now() - timedelta(days=days + 30)).strftime('%Y%m%d')  # 多取30天以确保足够数据
             
-            # 方法1: 尝试使用AKShare获取（只尝试1次，避免IP封禁）
+            # 方法1: 从本地K线存储读取（只增量拉取缺失部分，避免IP封禁）
             try:
-                import akshare as ak
-                df = ak.stock_zh_a_hist(
+                from data_source_manager import data_source_manager
+                from bar_store import to_akshare_columns
+                df = data_source_manager.get_stock_hist_data(
                     symbol=stock_code,
-                    period='daily',
                     start_date=start_date,
                     end_date=end_date,
                     adjust='qfq'
@@ -342,7 +342,7 @@ class SmartMonitorKline:
                 
                 if df is not None and not df.empty:
                     # 只保留最近days天的数据
-                    df = df.tail(days)
+                    df = to_akshare_columns(df).tail(days)
                     self.logger.info(f"✅ AKShare获取K线数据成功 {stock_code}，共{len(df)}条")
                     return df
                 else:
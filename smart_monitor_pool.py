@@ -0,0 +1,193 @@
+"""
+智能盯盘 - 监控工作池
+固定数量的工作线程按共享的到期队列执行各股票的分析任务：
+- 每只股票有独立的检查间隔
+- 同一只股票同一时间只会有一个分析在执行（分析期间停止后重新添加，新任务等上一次分析结束后再执行）
+- 工作线程全部占用时，到期任务在队列中等待（背压），不会无限堆积
+- 分析耗时超过检查间隔时，下一次检查从完成时刻起顺延一个间隔
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from monitor_due_queue import DueTimeQueue
+
+
+class MonitorWorkerPool:
+    """智能盯盘工作池"""
+
+    def __init__(self, run_task: Callable, max_workers: int = 4):
+        """
+        Args:
+            run_task: 任务执行函数，调用方式为 run_task(stock_code, **params)
+            max_workers: 工作线程数（同时执行的分析数上限）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.run_task = run_task
+        self.max_workers = max(1, max_workers)
+
+        self._tasks = {}
+        self._active = set()  # 有分析正在执行的股票（任务被移除或替换后仍保留到分析结束）
+        self._lock = threading.Lock()
+        self._queue = DueTimeQueue()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._executor = None
+        self._dispatcher = None
+        self._stop = None
+        self._running = False
+
+    def __contains__(self, stock_code: str) -> bool:
+        with self._lock:
+            return stock_code in self._tasks
+
+    def stock_codes(self) -> List[str]:
+        """当前在监控中的股票代码"""
+        with self._lock:
+            return list(self._tasks.keys())
+
+    def add(self, stock_code: str, interval: int, **params):
+        """
+        添加监控任务（立即执行第一次检查；该股票仍有分析在执行时，等其结束后再检查）
+
+        Args:
+            stock_code: 股票代码
+            interval: 检查间隔（秒）
+            **params: 传给 run_task 的参数
+        """
+        with self._lock:
+            previous = self._tasks.get(stock_code)
+            running = stock_code in self._active
+            self._tasks[stock_code] = {
+                'interval': max(1, interval),
+                'params': params,
+                'running': running,
+                'last_started': previous['last_started'] if running and previous else None,
+                'last_finished': None,
+                'overruns': 0,
+            }
+        self._ensure_started()
+        if not running:
+            self._queue.schedule(stock_code, time.time())
+
+    def remove(self, stock_code: str) -> bool:
+        """
+        移除监控任务（正在执行的分析会执行完毕，但不再排入下一次）
+
+        Returns:
+            bool: 任务是否存在
+        """
+        with self._lock:
+            task = self._tasks.pop(stock_code, None)
+        self._queue.remove(stock_code)
+        return task is not None
+
+    def get_status(self) -> Dict[str, Dict]:
+        """
+        获取各任务状态
+
+        Returns:
+            dict: {stock_code: {interval, running, last_started, last_finished, overruns}}
+        """
+        with self._lock:
+            return {
+                code: {key: value for key, value in task.items() if key != 'params'}
+                for code, task in self._tasks.items()
+            }
+
+    def shutdown(self):
+        """停止调度线程和工作线程（不等待正在执行的分析）"""
+        with self._lock:
+            self._running = False
+            if self._stop:
+                self._stop.set()
+        self._queue.wake()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _ensure_started(self):
+        """懒启动调度线程和线程池"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            # 每个调度线程有自己的停止标志，shutdown 后立即重启时旧调度线程仍会退出
+            self._stop = threading.Event()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="smart-monitor")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, args=(self._stop,),
+                                                name="smart-monitor-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self, stop: threading.Event):
+        """调度循环：等待任务到期并提交给工作线程"""
+        self.logger.info(f"监控工作池已启动，工作线程数: {self.max_workers}")
+        while not stop.is_set():
+            for stock_code in self._queue.wait_due(max_wait=5):
+                if stop.is_set():
+                    break
+                self._dispatch(stock_code, stop)
+        self.logger.info("监控工作池已停止")
+
+    def _dispatch(self, stock_code: str, stop: threading.Event):
+        """等待空闲工作线程后提交任务"""
+        # 背压：工作线程全部占用时在此等待，后续到期任务保持排队
+        while not self._slots.acquire(timeout=1):
+            if stop.is_set():
+                return
+
+        with self._lock:
+            task = self._tasks.get(stock_code)
+            # 该股票上一次分析仍在执行时不重复提交，分析结束后会重新排队
+            if task is None or stop.is_set() or stock_code in self._active:
+                self._slots.release()
+                return
+            self._active.add(stock_code)
+            task['running'] = True
+            task['last_started'] = time.time()
+            executor = self._executor
+
+        try:
+            executor.submit(self._run, stock_code, task)
+        except RuntimeError:
+            # 线程池已关闭
+            with self._lock:
+                self._active.discard(stock_code)
+                task['running'] = False
+            self._slots.release()
+
+    def _run(self, stock_code: str, task: Dict):
+        """在工作线程中执行任务，完成后按检查间隔重新排队"""
+        try:
+            self.run_task(stock_code, **task['params'])
+        except Exception as e:
+            self.logger.error(f"[{stock_code}] 监控任务异常: {e}")
+        finally:
+            self._slots.release()
+            finished = time.time()
+            with self._lock:
+                self._active.discard(stock_code)
+                task['running'] = False
+                task['last_finished'] = finished
+                current = self._tasks.get(stock_code)
+                if current is None:
+                    # 任务已被移除，不再排队
+                    next_due = None
+                elif current is not task:
+                    # 分析期间任务被重新添加：新任务的第一次检查在本次分析结束后执行
+                    current['running'] = False
+                    next_due = finished
+                else:
+                    next_due = task['last_started'] + task['interval']
+                    if finished > next_due:
+                        task['overruns'] += 1
+                        next_due = finished + task['interval']
+                        self.logger.warning(
+                            f"[{stock_code}] 分析耗时 {finished - task['last_started']:.0f} 秒，"
+                            f"超过检查间隔 {task['interval']} 秒，下一次检查顺延"
+                        )
+            if next_due is not None:
+                self._queue.schedule(stock_code, next_due)
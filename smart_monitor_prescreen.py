@@ -0,0 +1,187 @@
+"""
+智能盯盘 - AI决策预筛
+把本次行情与上一次AI决策时的输入做规则比较，没有实质变化时复用上次决策，
+避免盘面平静时每个检查周期都调用一次AI。
+以下任一情况视为有实质变化，需要重新调用AI：
+- 没有历史决策，或上次决策已超过最长复用时间（含跨日）
+- 交易时段或持仓状态变化
+- 价格、成交量、主力资金变动超过阈值
+- 价格穿越均线、布林带、上次决策给出的关键价位，或趋势、MACD、RSI区间改变
+- 持仓浮动盈亏触及上次决策的止损/止盈比例
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import config
+
+
+def _to_float(value) -> Optional[float]:
+    """转换为浮点数，无法转换时返回None"""
+    try:
+        if value is None:
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _side(price: Optional[float], level) -> Optional[int]:
+    """价格在某价位的哪一侧：1 上方，-1 下方，0 持平，缺数据时返回None"""
+    level = _to_float(level)
+    if price is None or level is None or level <= 0:
+        return None
+    return (price > level) - (price < level)
+
+
+def _rsi_zone(value) -> Optional[str]:
+    """RSI所处区间"""
+    value = _to_float(value)
+    if value is None:
+        return None
+    if value >= 70:
+        return '超买'
+    if value <= 30:
+        return '超卖'
+    return '中性'
+
+
+class DecisionPrescreen:
+    """AI决策预筛（纯规则判断，不访问网络和数据库）"""
+
+    def __init__(self, price_pct: float = None, volume_pct: float = None,
+                 flow_pct: float = None, max_age: int = None):
+        """
+        Args:
+            price_pct: 价格变动阈值（%），默认读取 config.SMART_MONITOR_PRESCREEN_PRICE_PCT
+            volume_pct: 成交量增幅阈值（%），默认读取 config.SMART_MONITOR_PRESCREEN_VOLUME_PCT
+            flow_pct: 主力净占比变动阈值（百分点），默认读取 config.SMART_MONITOR_PRESCREEN_FLOW_PCT
+            max_age: 决策最长复用时间（秒），默认读取 config.SMART_MONITOR_PRESCREEN_MAX_AGE
+        """
+        self.price_pct = config.SMART_MONITOR_PRESCREEN_PRICE_PCT if price_pct is None else price_pct
+        self.volume_pct = config.SMART_MONITOR_PRESCREEN_VOLUME_PCT if volume_pct is None else volume_pct
+        self.flow_pct = config.SMART_MONITOR_PRESCREEN_FLOW_PCT if flow_pct is None else flow_pct
+        self.max_age = config.SMART_MONITOR_PRESCREEN_MAX_AGE if max_age is None else max_age
+
+    @staticmethod
+    def position_state(has_position: bool, position_cost: float = 0,
+                       position_quantity: int = 0) -> Dict:
+        """持仓状态快照（随决策一起保存，供下次比较）"""
+        return {
+            'has_position': bool(has_position),
+            'position_cost': position_cost or 0,
+            'position_quantity': position_quantity or 0,
+        }
+
+    def evaluate(self, market_data: Dict, last_decision: Optional[Dict],
+                 session: str, position: Dict, now: datetime = None) -> Tuple[bool, str]:
+        """
+        判断是否可以复用上次决策
+
+        Args:
+            market_data: 本次 get_comprehensive_data 的结果
+            last_decision: 上次决策（SmartMonitorDB.get_ai_decisions 的一条记录），没有时为None
+            session: 当前交易时段名称
+            position: 当前持仓状态（position_state 的返回值）
+            now: 当前时间，默认 datetime.now()
+
+        Returns:
+            (是否复用, 原因说明)
+        """
+        if not last_decision:
+            return False, "无历史决策"
+
+        now = now or datetime.now()
+        try:
+            decided_at = datetime.strptime(last_decision['decision_time'], '%Y-%m-%d %H:%M:%S')
+        except (KeyError, TypeError, ValueError):
+            return False, "上次决策时间无效"
+        if decided_at.date() != now.date():
+            return False, "上次决策不是今天"
+        age = (now - decided_at).total_seconds()
+        if age > self.max_age:
+            return False, f"上次决策已过去 {age:.0f} 秒"
+
+        if last_decision.get('trading_session') != session:
+            return False, f"交易时段变化: {last_decision.get('trading_session')} → {session}"
+
+        last_position = (last_decision.get('account_info') or {}).get('position_state')
+        if last_position is None:
+            return False, "上次决策缺少持仓状态"
+        if (last_position.get('has_position') != position.get('has_position')
+                or last_position.get('position_quantity') != position.get('position_quantity')):
+            return False, "持仓状态变化"
+
+        last_data = last_decision.get('market_data') or {}
+        reason = self._market_change(market_data, last_data)
+        if reason:
+            return False, reason
+
+        reason = self._risk_levels_hit(market_data, last_decision, position)
+        if reason:
+            return False, reason
+
+        return True, f"行情无实质变化（距上次决策 {age:.0f} 秒）"
+
+    def _market_change(self, current: Dict, last: Dict) -> Optional[str]:
+        """行情相对上次决策输入的变化，无实质变化时返回None"""
+        price = _to_float(current.get('current_price'))
+        last_price = _to_float(last.get('current_price'))
+        if price is None or last_price is None or last_price <= 0:
+            return "缺少价格数据"
+
+        price_change = (price - last_price) / last_price * 100
+        if abs(price_change) >= self.price_pct:
+            return f"价格变动 {price_change:+.2f}%"
+
+        volume = _to_float(current.get('volume'))
+        last_volume = _to_float(last.get('volume'))
+        if volume is not None and last_volume:
+            volume_change = (volume - last_volume) / last_volume * 100
+            if abs(volume_change) >= self.volume_pct:
+                return f"成交量变动 {volume_change:+.1f}%"
+
+        for key, name in (('ma5', 'MA5'), ('ma20', 'MA20'), ('ma60', 'MA60'),
+                          ('boll_upper', '布林上轨'), ('boll_lower', '布林下轨')):
+            if _side(price, current.get(key)) != _side(last_price, last.get(key)):
+                return f"价格穿越{name}"
+
+        if current.get('trend') != last.get('trend'):
+            return f"趋势变化: {last.get('trend')} → {current.get('trend')}"
+
+        macd = _to_float(current.get('macd'))
+        last_macd = _to_float(last.get('macd'))
+        if macd is not None and last_macd is not None and (macd > 0) != (last_macd > 0):
+            return "MACD柱翻转"
+
+        if _rsi_zone(current.get('rsi6')) != _rsi_zone(last.get('rsi6')):
+            return f"RSI6进入{_rsi_zone(current.get('rsi6'))}区间"
+
+        flow = _to_float((current.get('main_force') or {}).get('main_net_pct'))
+        last_flow = _to_float((last.get('main_force') or {}).get('main_net_pct'))
+        if flow is not None and last_flow is not None and abs(flow - last_flow) >= self.flow_pct:
+            return f"主力净占比变动 {flow - last_flow:+.2f} 个百分点"
+
+        return None
+
+    def _risk_levels_hit(self, current: Dict, last_decision: Dict, position: Dict) -> Optional[str]:
+        """价格触及上次决策的关键价位或止损/止盈比例时返回原因"""
+        price = _to_float(current.get('current_price'))
+        last_price = _to_float((last_decision.get('market_data') or {}).get('current_price'))
+
+        levels = last_decision.get('key_price_levels') or {}
+        for key, name in (('support', '支撑位'), ('resistance', '阻力位'), ('stop_loss', '止损位')):
+            if _side(price, levels.get(key)) != _side(last_price, levels.get(key)):
+                return f"价格穿越上次决策的{name}"
+
+        cost = _to_float(position.get('position_cost'))
+        if position.get('has_position') and cost and cost > 0:
+            profit_pct = (price - cost) / cost * 100
+            stop_loss_pct = _to_float(last_decision.get('stop_loss_pct'))
+            take_profit_pct = _to_float(last_decision.get('take_profit_pct'))
+            if stop_loss_pct and profit_pct <= -stop_loss_pct:
+                return f"浮动盈亏 {profit_pct:+.2f}% 触及止损"
+            if take_profit_pct and profit_pct >= take_profit_pct:
+                return f"浮动盈亏 {profit_pct:+.2f}% 触及止盈"
+
+        return None
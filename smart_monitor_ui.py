@@ -429,7 +429,7 @@ def render_monitor_tasks():
                     # 获取实时行情
                     from smart_monitor_data import SmartMonitorDataFetcher
                     data_fetcher = SmartMonitorDataFetcher()
-                    quote = data_fetcher.get_realtime_quote(task['stock_code'], retry=1)
+                    quote = data_fetcher.get_realtime_quote(task['stock_code'])
                     if quote:
                         current_price = quote.get('current_price', 0)
                         if current_price > 0:
@@ -458,7 +458,7 @@ def render_monitor_tasks():
                     st.caption(f"📊 持仓: {position_quantity}股 @ {position_cost:.2f}元")
             
             with col3:
-                is_running = task['stock_code'] in engine.monitoring_threads
+                is_running = engine.is_monitoring(task['stock_code'])
                 if is_running:
                     st.success("▶️ 运行中")
                 else:
@@ -502,7 +502,7 @@ def render_monitor_tasks():
             with col5:
                 if st.button("🗑️ 删除", key=f"del_{task['id']}"):
                     # 如果正在运行，先停止
-                    if task['stock_code'] in engine.monitoring_threads:
+                    if engine.is_monitoring(task['stock_code']):
                         engine.stop_monitor(task['stock_code'])
                     
                     db.delete_monitor_task(task['id'])
@@ -0,0 +1,111 @@
+"""
+SQLite连接管理
+每个线程为每个数据库文件缓存一个空闲连接，调用方沿用 connect() ... close() 的写法：
+- close() 不真正关闭连接，而是回滚未提交的事务、重置 row_factory 后放回本线程的缓存
+- 同一线程嵌套使用同一数据库时（缓存连接正被占用），另开一个连接，关闭时多余的连接真正关闭
+- 调用方忘记 close() 时，连接随引用释放被回收，不会长期占用写锁
+- 新连接启用 WAL 日志、忙等待超时，并放大预编译语句缓存
+- connect_dedicated() 打开不进入缓存的独立连接，供需要修改连接级 PRAGMA 的批量写入使用
+"""
+
+import sqlite3
+import threading
+
+import config
+
+_local = threading.local()
+_wal_paths = set()
+_wal_lock = threading.Lock()
+
+
+class PooledConnection(sqlite3.Connection):
+    """可复用的SQLite连接（close() 归还到本线程缓存）"""
+
+    def close(self):
+        """归还连接：回滚未提交的事务并重置连接状态（重复调用无副作用）"""
+        if self._pool_key is None:
+            # 独立连接不进入缓存
+            super().close()
+            return
+        idle = _idle_connections()
+        if idle.get(self._pool_key) is self:
+            return
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = None
+        except sqlite3.Error:
+            super().close()
+            return
+
+        if idle.get(self._pool_key) is None:
+            idle[self._pool_key] = self
+        else:
+            super().close()
+
+    def close_now(self):
+        """真正关闭连接"""
+        super().close()
+
+
+def _idle_connections() -> dict:
+    """本线程的空闲连接 {数据库路径: 连接}"""
+    idle = getattr(_local, 'idle', None)
+    if idle is None:
+        idle = _local.idle = {}
+    return idle
+
+
+def _open(db_path: str, pooled: bool = True) -> PooledConnection:
+    """打开新连接并设置WAL、忙等待和同步级别"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=config.SQLITE_BUSY_TIMEOUT,
+        cached_statements=config.SQLITE_STATEMENT_CACHE,
+        factory=PooledConnection,
+    )
+    conn._pool_key = db_path if pooled else None
+    if db_path not in _wal_paths:
+        with _wal_lock:
+            if db_path not in _wal_paths:
+                # journal_mode 写入数据库文件，每个进程每个数据库只需设置一次
+                conn.execute('PRAGMA journal_mode = WAL')
+                _wal_paths.add(db_path)
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+def connect(db_path: str) -> PooledConnection:
+    """
+    获取数据库连接（优先复用本线程缓存的空闲连接）
+
+    Args:
+        db_path: 数据库文件路径
+
+    Returns:
+        PooledConnection: sqlite3.Connection 子类，用完调用 close() 归还
+    """
+    conn = _idle_connections().pop(db_path, None)
+    if conn is not None:
+        return conn
+    return _open(db_path)
+
+
+def connect_dedicated(db_path: str) -> PooledConnection:
+    """
+    打开独立连接（同样启用WAL和忙等待），close() 时真正关闭，不放回缓存
+
+    连接级 PRAGMA（如 temp_store、cache_size）只影响该连接，不会带到后续复用缓存连接的普通查询
+
+    Args:
+        db_path: 数据库文件路径
+    """
+    return _open(db_path, pooled=False)
+
+
+def close_thread_connections():
+    """关闭本线程缓存的全部空闲连接（线程退出前或测试时使用）"""
+    idle = _idle_connections()
+    for conn in idle.values():
+        conn.close_now()
+    idle.clear()
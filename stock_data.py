@@ -2,12 +2,13 @@ import yfinance as yf
 import akshare as ak
 import pandas as pd
 import numpy as np
-import ta
 from datetime import datetime, timedelta
 import requests
 import json
 import pywencai
+from circuit_breaker import circuit_breakers
 from data_source_manager import data_source_manager
+from indicator_kernel import align_panel, classic_indicators
 
 class StockDataFetcher:
     """股票数据获取类"""
@@ -91,7 +92,7 @@ class StockDataFetcher:
             
             # 方法1: 尝试获取个股详细信息（akshare）
             try:
-                stock_info = ak.stock_individual_info_em(symbol=symbol)
+                stock_info = circuit_breakers.call('akshare', 'stock_detail', ak.stock_individual_info_em, symbol=symbol)
                 if stock_info is not None and not stock_info.empty:
                     for _, row in stock_info.iterrows():
                         key = row['item']
@@ -128,7 +129,8 @@ class StockDataFetcher:
                     print(f"[Tushare] 尝试获取基本信息（tushare）...")
                     try:
                         ts_code = self.data_source_manager._convert_to_ts_code(symbol)
-                        df = self.data_source_manager.tushare_api.daily_basic(
+                        df = circuit_breakers.call(
+                            'tushare', 'daily_basic', self.data_source_manager.tushare_api.daily_basic,
                             ts_code=ts_code,
                             trade_date=datetime.now().strftime('%Y%m%d')
                         )
@@ -528,40 +530,59 @@ class StockDataFetcher:
             if isinstance(df, dict) and "error" in df:
                 return df
                 
-            # 移动平均线
-            df['MA5'] = ta.trend.sma_indicator(df['Close'], window=5)
-            df['MA10'] = ta.trend.sma_indicator(df['Close'], window=10)
-            df['MA20'] = ta.trend.sma_indicator(df['Close'], window=20)
-            df['MA60'] = ta.trend.sma_indicator(df['Close'], window=60)
-            
-            # RSI
-            df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
-            
-            # MACD
-            macd = ta.trend.MACD(df['Close'])
-            df['MACD'] = macd.macd()
-            df['MACD_signal'] = macd.macd_signal()
-            df['MACD_histogram'] = macd.macd_diff()
-            
-            # 布林带
-            bollinger = ta.volatility.BollingerBands(df['Close'])
-            df['BB_upper'] = bollinger.bollinger_hband()
-            df['BB_middle'] = bollinger.bollinger_mavg()
-            df['BB_lower'] = bollinger.bollinger_lband()
-            
-            # KDJ指标
-            df['K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'])
-            df['D'] = ta.momentum.stoch_signal(df['High'], df['Low'], df['Close'])
-            
-            # 成交量指标
-            df['Volume_MA5'] = ta.trend.sma_indicator(df['Volume'], window=5)
-            df['Volume_ratio'] = df['Volume'] / df['Volume_MA5']
+            # 均线、RSI、MACD、布林带、KDJ、量比一次性向量化计算（口径同 ta 库）
+            indicators = classic_indicators(df['High'], df['Low'], df['Close'], df['Volume'])
+            for column, values in indicators.items():
+                df[column] = values
             
             return df
             
         except Exception as e:
             return {"error": f"计算技术指标失败: {str(e)}"}
     
+    def _calculate_panel(self, stock_frames):
+        """
+        面板模式计算：把多只股票的K线对齐为 (日期, 股票) 二维数组，一次向量化计算全部指标
+        
+        Returns:
+            tuple: (有效股票代码列表, {指标名: 二维数组})
+        """
+        symbols = [symbol for symbol, df in stock_frames.items()
+                   if isinstance(df, pd.DataFrame) and not df.empty]
+        if not symbols:
+            return [], {}
+        
+        columns = {col: align_panel([stock_frames[symbol][col] for symbol in symbols])
+                   for col in ('High', 'Low', 'Close', 'Volume')}
+        indicators = classic_indicators(columns['High'], columns['Low'], columns['Close'], columns['Volume'])
+        indicators['Close'] = columns['Close']
+        return symbols, indicators
+    
+    def calculate_technical_indicators_panel(self, stock_frames):
+        """
+        批量计算技术指标（面板模式，结果与逐只调用 calculate_technical_indicators 相同）
+        
+        Args:
+            stock_frames: {股票代码: get_stock_data 返回的DataFrame}，出错的股票（错误字典）原样返回
+        
+        Returns:
+            dict: {股票代码: 带指标列的DataFrame}
+        """
+        try:
+            symbols, indicators = self._calculate_panel(stock_frames)
+        except Exception as e:
+            return {symbol: {"error": f"计算技术指标失败: {str(e)}"} for symbol in stock_frames}
+        
+        results = dict(stock_frames)
+        for j, symbol in enumerate(symbols):
+            df = stock_frames[symbol].copy()
+            rows = len(df)
+            for column, values in indicators.items():
+                if column != 'Close':
+                    df[column] = values[-rows:, j]
+            results[symbol] = df
+        return results
+    
     def get_latest_indicators(self, df):
         """获取最新的技术指标值"""
         try:
@@ -0,0 +1,107 @@
+"""
+A股交易日历
+进程内缓存 ak.tool_trade_date_hist_sina() 的交易日列表（每天最多下载一次），
+用于跳过周末和法定节假日；日历获取失败或日期超出日历范围时按工作日处理。
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+
+class TradingCalendar:
+    """A股交易日历"""
+
+    def __init__(self):
+        self._dates = None
+        self._first = None
+        self._last = None
+        self._loaded_on = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Optional[set]:
+        """获取交易日集合（当天已加载过则直接返回缓存，失败时返回None）"""
+        today = datetime.now().date()
+        if self._loaded_on == today:
+            return self._dates
+
+        with self._lock:
+            if self._loaded_on == today:
+                return self._dates
+            try:
+                import akshare as ak
+                import pandas as pd
+
+                df = ak.tool_trade_date_hist_sina()
+                dates = pd.to_datetime(df['trade_date']).dt.strftime('%Y-%m-%d')
+                if dates.empty:
+                    raise ValueError("交易日历为空")
+                self._dates = set(dates)
+                self._first = dates.min()
+                self._last = dates.max()
+                print(f"[交易日历] ✅ 已加载 {len(self._dates)} 个交易日（{self._first} 至 {self._last}）")
+            except Exception as e:
+                print(f"[交易日历] ⚠️ 获取失败，按工作日处理: {e}")
+            # 失败时当天不再重试，沿用旧日历或按工作日处理
+            self._loaded_on = today
+        return self._dates
+
+    def is_trading_day(self, date: str) -> bool:
+        """
+        判断是否为交易日
+
+        Args:
+            date: 日期，格式为 YYYY-MM-DD
+        """
+        dates = self._load()
+        if dates is not None and self._first <= date <= self._last:
+            return date in dates
+        return datetime.strptime(date, '%Y-%m-%d').weekday() < 5
+
+    def trading_dates(self, start_date: str, end_date: str) -> List[str]:
+        """
+        获取日期范围内的交易日
+
+        Args:
+            start_date: 开始日期，格式为 YYYY-MM-DD
+            end_date: 结束日期，格式为 YYYY-MM-DD
+
+        Returns:
+            list: 交易日列表（升序）
+        """
+        dates = []
+        current = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        while current <= end:
+            date_str = current.strftime('%Y-%m-%d')
+            if self.is_trading_day(date_str):
+                dates.append(date_str)
+            current += timedelta(days=1)
+        return dates
+
+    def recent_trading_dates(self, days: int, end_date: str = None) -> List[str]:
+        """
+        获取截至某日（含）的最近N个交易日
+
+        Args:
+            days: 交易日数量
+            end_date: 截止日期，默认今天
+
+        Returns:
+            list: 交易日列表（升序）
+        """
+        current = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+        dates = []
+        # 最长回看一年，避免日历异常时死循环
+        for _ in range(366):
+            if len(dates) >= days:
+                break
+            date_str = current.strftime('%Y-%m-%d')
+            if self.is_trading_day(date_str):
+                dates.append(date_str)
+            current -= timedelta(days=1)
+        return sorted(dates)
+
+
+# 全局交易日历实例
+trading_calendar = TradingCalendar()